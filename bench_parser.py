@@ -0,0 +1,216 @@
+# bench_parser.py
+"""
+Throughput benchmark for utils.universal_parser.parse_detail_blocks.
+
+Builds a synthetic “/ip dhcp-server lease print detail” dump (500k lines by
+default), checks every reader returns exactly what the previous
+implementation returned, and prints lines/sec and the speed-up over it for:
+
+    current   parse_detail_blocks, in-process
+    pool      parse_detail_blocks_parallel over all cores (the path table
+              reads take, see core.taskrunner.RecordStreamRunner)
+    json      the same table as RouterOS 7 ``:serialize to=json`` output
+              (utils.wire_formats.parse_json, preferred by core.formats)
+    floor     marshal.loads of the finished records – only building the
+              dicts, the bound for any single-threaded Python reader
+
+    python bench_parser.py [line_count]
+
+On one core the in-process parser is about 1.5x the previous one and the
+floor itself is below 10x, so the 10x target is only reachable through the
+pool; the last line says whether this machine reaches it.
+"""
+import json
+import marshal
+import os
+import random
+import sys
+import time
+
+from utils.text import clean_field
+from utils.flag_decoder import decode_flags, flag_letters
+from utils.universal_parser import (
+    parse_detail_blocks, parse_detail_blocks_parallel, shutdown_pool,
+)
+from utils.wire_formats import parse_json
+
+
+# ──────────────────────────────────────────────────────────── sample data
+def make_lease_dump(n_lines: int, seed: int = 1) -> list[str]:
+    rnd   = random.Random(seed)
+    lines = ["Flags: X - disabled, R - radius, D - dynamic, B - blocked "]
+    i = 0
+    while len(lines) < n_lines:
+        flags = rnd.choice(["", "", "", "X", "D", "XD", "B"])
+        ip    = f"10.20.{(i >> 8) & 255}.{i & 255}"
+        mac   = ":".join(f"{rnd.randrange(256):02X}" for _ in range(6))
+        rate  = rnd.choice(["8300k/82100k", "14400k/143500k", "3200k/30900k"])
+        kind  = rnd.random()
+        if kind < 0.4:
+            lines.append(f" {i:>2} {flags:<2} ;;; Customer {i} - {rnd.choice(['Main St', 'Tower 4'])}")
+            if kind < 0.1:
+                lines.append(f"        tail{i} of a wrapped comment")
+            lines.append(f"        address={ip} mac-address={mac} client-id=\"1:{mac.lower()}\" ")
+        elif kind < 0.5:
+            lines.append(f" {i:>2} {flags:<2} address={ip} mac-address={mac} ;;; inline {i}")
+        else:
+            lines.append(f" {i:>2} {flags:<2} address={ip} mac-address={mac} client-id=\"1:{mac.lower()}\" ")
+        lines.append(f"        address-lists=\"\" server=dhcp1 dhcp-option=\"\" rate-limit=\"{rate}\" ")
+        lines.append(f"        status=bound expires-after=9m41s last-seen=19s active-address={ip} ")
+        lines.append(f"        active-mac-address={mac} active-client-id=\"1:{mac.lower()}\" ")
+        lines.append(f"        active-server=dhcp1 host-name=\"cpe {i}\" ")
+        lines.append("")
+        i += 1
+    return lines[:n_lines]
+
+
+# ──────────────────────────────────────────────── previous implementation
+def legacy_parse_detail_blocks(lines, section):
+    import re
+    records = []
+    current = {}
+    current_flags = None
+    pending_comment = None
+
+    def flush():
+        nonlocal current, current_flags, pending_comment
+        if current:
+            if current_flags:
+                current["_flags"] = current_flags
+                current.update(decode_flags(current_flags, section))
+            if pending_comment and "comment" not in current:
+                current["comment"] = pending_comment
+                pending_comment = None
+            records.append(current)
+            current = {}
+            current_flags = None
+
+    for raw in lines:
+        line = raw.rstrip("\n")
+        stripped = line.strip()
+        if stripped.startswith("Flags:"):
+            continue
+        if not stripped:
+            flush(); continue
+        left  = line.lstrip()
+        first = left[0]
+        if (first.isdigit() or first == "*") and ";;;" in left and "=" not in left:
+            flush()
+            hdr_parts = left.split(";;;", 1)[0].split(None, 2)
+            if len(hdr_parts) >= 2 and hdr_parts[1].isalpha():
+                current_flags = hdr_parts[1]
+            pending_comment = left.split(";;;", 1)[1].strip()
+            continue
+        if (first.isdigit() or first == "*") and "=" in left:
+            flush()
+            if ";;;" in left:
+                before, after = left.split(";;;", 1)
+                inline = after.strip(); left = before.rstrip()
+            else:
+                inline = None
+            if left[0] == "*":
+                left = left[1:].lstrip()
+            parts = left.split(None, 2)
+            if len(parts) >= 2 and parts[1].isalpha():
+                current_flags = parts[1]
+                remainder     = parts[2] if len(parts) == 3 else ""
+            else:
+                current_flags = None
+                remainder     = " ".join(parts[1:]) if len(parts) > 1 else ""
+            if pending_comment:
+                current["comment"] = pending_comment; pending_comment = None
+            if inline:
+                current["comment"] = inline
+            for key, val in re.findall(r'([\w\-]+)=("[^"]*"|\S+)', remainder):
+                if key == "comment":
+                    current["comment"] = clean_field(val)
+                else:
+                    current[clean_field(key)] = clean_field(val)
+            continue
+        if pending_comment and "=" not in stripped:
+            fragment = stripped
+            if pending_comment[-1].isalnum() and fragment and fragment[0].isalnum():
+                pending_comment += fragment
+            else:
+                pending_comment += " " + fragment
+            continue
+        for key, val in re.findall(r'([\w\-]+)=("[^"]*"|\S+)', line):
+            if key == "comment":
+                current["comment"] = clean_field(val)
+            else:
+                current[clean_field(key)] = clean_field(val)
+    flush()
+    return records
+
+
+# ──────────────────────────────────────────────────────────────── runner
+def _legacy_shape(rec: dict) -> dict:
+    """Flags as the previous parser stored them: one boolean key per flag."""
+    rec = dict(rec)
+    if rec.pop("_mask", None) is not None:
+        rec.update(decode_flags(rec["_flags"], "/ip dhcp-server lease"))
+    return rec
+
+
+def _as_json(records: list[dict], section: str) -> str:
+    """*records* as ``:serialize to=json`` prints them – flags as booleans."""
+    letters = flag_letters(section)
+    out = []
+    for rec in records:
+        obj = {k: v for k, v in rec.items() if k not in ("_flags", "_mask")}
+        flags = rec.get("_flags", "")
+        obj.update({prop: letter in flags for prop, letter in letters.items()})
+        out.append(obj)
+    return json.dumps(out)
+
+
+def _best_of(fn, lines, rounds: int = 3) -> float:
+    best = float("inf")
+    for _ in range(rounds):
+        t0 = time.perf_counter()
+        fn(lines, "/ip dhcp-server lease")
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main() -> None:
+    n_lines = int(sys.argv[1]) if len(sys.argv) > 1 else 500_000
+    lines   = make_lease_dump(n_lines)
+    section = "/ip dhcp-server lease"
+    workers = os.cpu_count() or 1
+
+    old = legacy_parse_detail_blocks(lines, section)
+    new = parse_detail_blocks(lines, section)
+    assert old == [_legacy_shape(r) for r in new], \
+        "parser output differs from previous implementation"
+
+    text = _as_json(new, section)
+    assert parse_json(text, section) == new, \
+        "JSON decoder output differs from the detail parser"
+
+    def pool(_lines, _section):
+        return parse_detail_blocks_parallel(_lines, _section, workers=workers,
+                                            chunk_lines=max(len(_lines) // (2 * workers), 1))
+    # also starts the worker processes, so their start-up is not timed
+    assert pool(lines, section) == new, "pool output differs from the detail parser"
+
+    frozen = marshal.dumps(new)
+    t_old = _best_of(legacy_parse_detail_blocks, lines)
+    rows = [
+        ("current", _best_of(parse_detail_blocks, lines)),
+        (f"pool x{workers}", _best_of(pool, lines)),
+        ("json", _best_of(lambda _lines, _section: parse_json(text, _section), lines)),
+        ("floor", _best_of(lambda _lines, _section: marshal.loads(frozen), lines)),
+    ]
+    shutdown_pool()
+
+    print(f"{n_lines} lines → {len(new)} records")
+    print(f"{'previous':<9}: {t_old:6.3f}s  {n_lines / t_old:>12,.0f} lines/s")
+    for name, took in rows:
+        print(f"{name:<9}: {took:6.3f}s  {n_lines / took:>12,.0f} lines/s  ({t_old / took:.1f}x)")
+    best = max(t_old / took for name, took in rows if name != "floor")
+    print(f"10x target: {'met' if best >= 10 else 'not met'} ({best:.1f}x best on {workers} core(s))")
+
+
+if __name__ == "__main__":
+    main()
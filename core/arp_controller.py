@@ -9,6 +9,8 @@ Updated to use shared SSH connection from client.py and fallback to profiles for
 from typing import List, Dict
 
 from .client import MikrotikClient, Profiles
+from .formats import FormatNegotiator
+from .ids import run_on_item
 from .log import append
 import logging
 
@@ -41,8 +43,7 @@ class ArpController:
         """Fetch and parse the ARP table from the Mikrotik router."""
         try:
             client = self._get_client()
-            output = client.cmd("/ip arp print detail")
-            arp_entries = self._parse_arp_output(output)
+            arp_entries = FormatNegotiator(client).fetch("/ip arp")
             logging.info(f"Fetched {len(arp_entries)} ARP entries")
             append(f"Fetched ARP table")
             return arp_entries
@@ -51,24 +52,6 @@ class ArpController:
             append(f"Error in ARP fetch: {e}")
             return []
 
-    def _parse_arp_output(self, output: str) -> List[Dict[str, str]]:
-        """Parse the raw ARP output into a list of dictionaries."""
-        entries = []
-        lines = output.splitlines()
-        for line in lines:
-            if line.strip():
-                parts = line.split()
-                if len(parts) >= 4:
-                    entry = {
-                        "flags": parts[0] if len(parts) > 4 else "",
-                        "address": parts[1],
-                        "mac": parts[2],
-                        "interface": parts[3],
-                        "comment": " ".join(parts[4:]) if len(parts) > 4 else "",
-                    }
-                    entries.append(entry)
-        return entries
-
     def add_arp_entry(self, address: str, mac: str, interface: str, comment: str = "") -> bool:
         """Add a new ARP entry to the Mikrotik router."""
         try:
@@ -89,8 +72,10 @@ class ArpController:
         """Remove an ARP entry from the Mikrotik router."""
         try:
             client = self._get_client()
-            command = f"/ip arp remove [find address={address}]"
-            client.cmd(command)
+            # by the cached .id, retried by [find address=…] if it went stale
+            out, err = run_on_item(client, "/ip arp", "remove", address=address)
+            if err or "failure" in out.lower():
+                raise RuntimeError(err or out)
             logging.info(f"Removed ARP entry {address}")
             append(f"Removed ARP: {address}")
             return True
@@ -103,14 +88,16 @@ class ArpController:
         """Update an ARP entry on the Mikrotik router."""
         try:
             client = self._get_client()
-            command = f"/ip arp set [find address={address}]"
+            args = ""
             if new_mac:
-                command += f" mac-address={new_mac}"
+                args += f" mac-address={new_mac}"
             if new_interface:
-                command += f" interface={new_interface}"
+                args += f" interface={new_interface}"
             if new_comment:
-                command += f" comment={new_comment}"
-            client.cmd(command)
+                args += f" comment={new_comment}"
+            out, err = run_on_item(client, "/ip arp", "set", args.lstrip(), address=address)
+            if err or "failure" in out.lower():
+                raise RuntimeError(err or out)
             logging.info(f"Updated ARP entry {address}")
             append(f"Updated ARP: {address}")
             return True
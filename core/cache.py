@@ -0,0 +1,368 @@
+# core/cache.py
+"""
+Per-router read cache in front of a client's execute / run / stream.
+
+Only reads are cached (``print``, ``export``, ``:put [… print …]``), keyed
+by (router, normalized command).  Each menu path has its own TTL and the
+whole cache has a memory budget; the least recently used entries go
+first.  Any other command on a path – ``add``, ``set``, ``remove``,
+``make-static`` … – drops every cached read of that path, its sub-menus
+and whole-config exports, so a page never re-reads its own stale data::
+
+    client = CachedClient(ssh)                 # drop-in for SSHClient / MikrotikClient
+    client.execute("/queue simple print detail without-paging")   # router
+    client.execute("/queue simple print detail without-paging")   # cache
+    client.execute('/queue simple set [find name=q1] limit-at=1M/1M')
+    client.execute("/queue simple print detail without-paging")   # router again
+
+Commands that do not name a menu (``ping …``) pass straight through;
+scripts (``:foreach …``) flush the router's entries to be safe.
+
+Cache misses go through core.singleflight, so identical reads issued at
+the same moment (several pages refreshing on connect) share one request.
+"""
+from __future__ import annotations
+
+import re
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Iterator
+
+from .log import append
+from .singleflight import SingleFlight, flights
+
+#: seconds a read of a menu path stays valid (longest matching prefix wins)
+DEFAULT_TTLS: dict[str, float] = {
+    "/queue simple":          10.0,
+    "/ip dhcp-server lease":  10.0,
+    "/ip route":              10.0,
+    "/ip arp":                 5.0,
+    "/ip address":            30.0,
+    "/interface":             30.0,
+    "/system resource":      300.0,
+    "/":                      30.0,      # /export
+}
+DEFAULT_TTL    = 5.0
+DEFAULT_BUDGET = 32 * 1024 * 1024        # bytes of cached output
+
+_READ_VERBS  = frozenset({"print", "export", "get", "find"})
+_WRITE_VERBS = frozenset({
+    "add", "set", "remove", "unset", "enable", "disable", "move", "comment",
+    "reset", "make-static", "import", "run",
+})
+_LIVE_WORDS = frozenset({"follow", "follow-only", "interval"})
+_PUT_READ   = re.compile(r"^:put \[(?P<inner>/[^\[\]]*)\]\s*$")
+#: as-value read printed one record per line (core.formats)
+_EACH_READ  = re.compile(r"^:foreach (?P<var>\w+) in=\[(?P<inner>/[^\[\]]*)\] do=\{:put \$(?P=var)\}\s*$")
+_WS         = re.compile(r"\s+")
+
+
+# ──────────────────────────────────────────────────────────── commands
+def normalize_command(command: str) -> str:
+    return _WS.sub(" ", command.strip())
+
+
+def classify(command: str) -> tuple[str, str | None]:
+    """
+    ``("read" | "write" | "script" | "other", menu path)`` for a command.
+
+        /queue simple print detail        → ("read",  "/queue simple")
+        :put [/ip arp print as-value]     → ("read",  "/ip arp")
+        :foreach r in=[/ip arp print as-value] do={:put $r}
+                                          → ("read",  "/ip arp")
+        /export terse                     → ("read",  "/")
+        /queue simple set [find …] …      → ("write", "/queue simple")
+        :foreach i in=[…] do={…}          → ("script", None)
+        ping 10.0.0.1                     → ("other", None)
+    """
+    cmd = normalize_command(command)
+    m = _PUT_READ.match(cmd) or _EACH_READ.match(cmd)
+    if m:
+        cmd = m["inner"]
+    elif cmd.startswith(":"):
+        # :serialize / nested reads are still reads; anything else is a script
+        if cmd.startswith(":put [:serialize") and " print " in cmd:
+            inner = cmd[cmd.index("[/") + 1:] if "[/" in cmd else ""
+            return ("read", classify(inner)[1]) if inner else ("script", None)
+        return "script", None
+    if not cmd.startswith("/"):
+        return "other", None
+
+    words = cmd[1:].split(" ")
+    path: list[str] = []
+    verb = None
+    for word in words:
+        if word in _READ_VERBS or word in _WRITE_VERBS:
+            verb = word
+            break
+        if not word or "=" in word or not word.replace("-", "").isalpha():
+            break                               # [find …], item numbers, args
+        path.append(word)
+    if verb is None and path:
+        verb = path.pop()                       # unknown command: last word
+    menu = "/" + " ".join(path)
+    if verb in _READ_VERBS:
+        if _LIVE_WORDS & set(words):
+            return "other", menu              # never ends – do not cache
+        return "read", menu
+    return "write", menu
+
+
+def _under(path: str, prefix: str) -> bool:
+    return prefix == "/" or path == prefix or path.startswith(prefix + " ")
+
+
+# ──────────────────────────────────────────────────────────────── cache
+class ReadCache:
+    """LRU cache of read output, shared by every CachedClient."""
+
+    def __init__(
+        self,
+        ttls: dict[str, float] | None = None,
+        default_ttl: float = DEFAULT_TTL,
+        budget: int = DEFAULT_BUDGET,
+    ) -> None:
+        self.ttls        = dict(DEFAULT_TTLS if ttls is None else ttls)
+        self.default_ttl = default_ttl
+        self.budget      = budget
+        self.size        = 0
+        self.hits        = 0
+        self.misses      = 0
+        # (host, command) → (path, stdout, stderr, expires, size)
+        self._entries: OrderedDict[tuple[str, str], tuple] = OrderedDict()
+        self._gen: dict[str, int] = {}           # host → bumped on every invalidation
+        self._listeners: list[Callable[[str, str | None, str | None], None]] = []
+        self._lock = threading.Lock()
+
+    # ------------------------------------------------------------ config
+    def ttl_for(self, path: str) -> float:
+        best, ttl = -1, self.default_ttl
+        for prefix, seconds in self.ttls.items():
+            if _under(path, prefix) and len(prefix) > best:
+                best, ttl = len(prefix), seconds
+        return ttl
+
+    def add_listener(self, fn: Callable[[str, str | None, str | None], None]) -> None:
+        """
+        Call ``fn(host, path, command)`` on every invalidation (path None =
+        everything; command is the write that caused it, if known).
+        """
+        self._listeners.append(fn)
+
+    def remove_listener(self, fn: Callable[[str, str | None, str | None], None]) -> None:
+        if fn in self._listeners:
+            self._listeners.remove(fn)
+
+    # ------------------------------------------------------------ access
+    def get(self, host: str, command: str) -> tuple[str, str] | None:
+        key = (host, command)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[3] <= time.monotonic():
+                if entry is not None:
+                    self._drop(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1], entry[2]
+
+    def generation(self, host: str) -> int:
+        return self._gen.get(host, 0)
+
+    def put(self, host: str, command: str, path: str, out: str, err: str,
+            generation: int | None = None) -> None:
+        """Store a read; skipped if *host* was invalidated since *generation*."""
+        ttl = self.ttl_for(path)
+        if ttl <= 0:
+            return
+        size = sys.getsizeof(out) + sys.getsizeof(err)
+        if size > self.budget:
+            return
+        key = (host, command)
+        with self._lock:
+            if generation is not None and generation != self._gen.get(host, 0):
+                return                          # a write raced this read
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (path, out, err, time.monotonic() + ttl, size)
+            self.size += size
+            while self.size > self.budget:
+                self._drop(next(iter(self._entries)))
+
+    def invalidate(self, host: str, path: str | None = None,
+                   command: str | None = None) -> int:
+        """Drop *host*'s reads of *path* (sub-menus and exports included; all if None)."""
+        with self._lock:
+            self._gen[host] = self._gen.get(host, 0) + 1
+            doomed = [
+                key for key, entry in self._entries.items()
+                if key[0] == host and (
+                    path is None or _under(entry[0], path) or entry[0] == "/"
+                )
+            ]
+            for key in doomed:
+                self._drop(key)
+        for fn in list(self._listeners):
+            fn(host, path, command)
+        return len(doomed)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    def _drop(self, key) -> None:
+        self.size -= self._entries.pop(key)[4]
+
+    def stats(self) -> str:
+        total = self.hits + self.misses
+        ratio = self.hits / total if total else 0.0
+        return (f"{ratio:.0%} hits ({self.hits}/{total}), {len(self._entries)} entries, "
+                f"{self.size / 1024:.0f} KiB")
+
+
+read_cache = ReadCache()
+
+
+# ─────────────────────────────────────────────────────────────── client
+class CachedClient:
+    """
+    Wraps an SSHClient / MikrotikClient; reads go through a ReadCache,
+    writes invalidate it.  Every other attribute is the wrapped client's.
+    """
+
+    def __init__(self, client, cache: ReadCache = read_cache,
+                 group: SingleFlight = flights) -> None:
+        self._client  = client
+        self._cache   = cache
+        self._flights = group
+
+    def __getattr__(self, name):
+        return getattr(self._client, name)
+
+    @property
+    def wrapped(self):
+        return self._client
+
+    # ------------------------------------------------------------ helpers
+    def _prepare(self, command: str) -> tuple[str, str | None, bool]:
+        """Invalidate on writes; return (normalized command, path if cacheable, is write)."""
+        kind, path = classify(command)
+        write = kind in ("write", "script")
+        if write:
+            self._invalidate(command)
+        return normalize_command(command), (path if kind == "read" else None), write
+
+    def _invalidate(self, command: str) -> None:
+        # runs before the write and again once it returned: a read that
+        # started while the write was in flight may have fetched (and
+        # cached, under the then-current generation) what it replaced
+        kind, path = classify(command)
+        host = self._client.host
+        n = self._cache.invalidate(host, path if kind == "write" else None, command)
+        # reads already on the wire may predate the write – don't join them
+        self._flights.forget(
+            lambda k: k[0] == host and (kind == "script" or _under(k[2], path) or k[2] == "/")
+        )
+        if n:
+            append(f"CACHE invalidate {path or 'all'} on {host} ({n} reads)")
+
+    def _fetch(self, command: str, key: str, path: str) -> tuple[str, str]:
+        host = self._client.host
+        gen  = self._cache.generation(host)
+        out, err = self._client.execute(command)
+        if not err:
+            self._cache.put(host, key, path, out, err, gen)
+        return out, err
+
+    # ----------------------------------------------------------- commands
+    def execute(self, command: str) -> tuple[str, str]:
+        key, path, write = self._prepare(command)
+        if write:
+            try:
+                return self._client.execute(command)
+            finally:
+                self._invalidate(command)
+        if path is None:
+            return self._client.execute(command)
+        hit = self._cache.get(self._client.host, key)
+        if hit is not None:
+            return hit
+        try:
+            return self._flights.do(
+                (self._client.host, key, path), lambda: self._fetch(command, key, path)
+            )
+        except _Abandoned:
+            return self._fetch(command, key, path)
+
+    def run(self, command: str) -> list[str]:
+        out, err = self.execute(command)
+        if err:
+            raise RuntimeError(err)
+        return out.splitlines()
+
+    def stream(self, command: str) -> Iterator[str]:
+        key, path, write = self._prepare(command)
+        if write:
+            try:
+                yield from self._client.stream(command)
+            finally:
+                self._invalidate(command)
+            return
+        if path is None:
+            yield from self._client.stream(command)
+            return
+        host = self._client.host
+        hit = self._cache.get(host, key)
+        if hit is None:
+            flight_key = (host, key, path)
+            fut, leader = self._flights.begin(flight_key)
+            if leader:
+                yield from self._lead_stream(command, key, path, flight_key, fut)
+                return
+            try:
+                hit = fut.result()                  # same read already streaming
+            except _Abandoned:
+                yield from self._client.stream(command)
+                return
+        out, err = hit
+        if err:
+            raise RuntimeError(err)
+        yield from out.splitlines()
+
+    def _lead_stream(self, command, key, path, flight_key, fut) -> Iterator[str]:
+        """Stream to the caller, then hand the full output to joined callers."""
+        host = self._client.host
+        gen  = self._cache.generation(host)
+        lines: list[str] = []
+        done = False
+        try:
+            for line in self._client.stream(command):
+                lines.append(line)
+                yield line
+            done = True
+        except Exception as exc:
+            self._flights.finish(flight_key, fut, error=exc)
+            raise
+        finally:
+            if not done and not fut.done():
+                self._flights.finish(flight_key, fut, error=_Abandoned(command))
+        out = "\n".join(lines) + "\n"
+        self._cache.put(host, key, path, out, "", gen)
+        self._flights.finish(flight_key, fut, (out, ""))
+
+    def cmd(self, command: str) -> str:
+        return "\n".join(self.run(command))
+
+
+class _Abandoned(Exception):
+    """The leading stream was closed early; joined callers read for themselves."""
+
+
+__all__ = [
+    "ReadCache", "CachedClient", "read_cache", "classify", "normalize_command",
+    "DEFAULT_TTLS", "DEFAULT_TTL", "DEFAULT_BUDGET",
+]
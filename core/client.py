@@ -13,7 +13,7 @@ from __future__ import annotations
 
 import json
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterator, List, Optional
 
 import paramiko  # pip install paramiko
 
@@ -112,6 +112,20 @@ class MikrotikClient:
             raise RuntimeError(err)
         return out.splitlines()
 
+    def stream(self, command: str) -> Iterator[str]:
+        """
+        Yield stdout *lines* as the router sends them; raise if stderr
+        is not empty once the command has finished.
+        """
+        if not self._ssh:
+            raise RuntimeError("Not connected – call .login() first")
+        stdin, stdout, stderr = self._ssh.exec_command(command)
+        for line in stdout:
+            yield line.rstrip("\r\n")
+        err = stderr.read().decode()
+        if err:
+            raise RuntimeError(err)
+
     # 👉 legacy alias so older controllers using .cmd() keep working
     def cmd(self, command: str) -> str:
         """Run and return *joined* stdout for back-compat."""
@@ -0,0 +1,53 @@
+# core/customers.py
+"""
+Per-customer view of a router, joined from the RouterState snapshots.
+
+    state = router_state(client)
+    refresh_customers(state)                 # leases, queues, ARP, addresses
+    …
+    for c in customer_view(state):           # after the snapshots arrived
+        print(c.ip, c.mac, c.rate, c.network, c.online)
+
+The join itself lives in utils.customers; here it reuses the hash
+indexes the store already built for each snapshot, so the view costs one
+pass over the leases.  Missing snapshots count as empty tables.
+"""
+from __future__ import annotations
+
+from utils.customers import Customer, join_customers
+from .state import RouterState, Section
+
+LEASES    = "/ip dhcp-server lease"
+QUEUES    = "/queue simple"
+ARP       = "/ip arp"
+ADDRESSES = "/ip address"
+
+#: the snapshots a customer view is joined from
+CUSTOMER_PATHS = (LEASES, QUEUES, ARP, ADDRESSES)
+
+
+def join_sections(sections: dict[str, Section | None]) -> list[Customer]:
+    """Join snapshots keyed by menu path (see CUSTOMER_PATHS); safe in any thread."""
+    def records(path: str) -> tuple:
+        sec = sections.get(path)
+        return sec.records if sec is not None else ()
+
+    queues, arp = sections.get(QUEUES), sections.get(ARP)
+    return join_customers(
+        records(LEASES), records(QUEUES), records(ARP), records(ADDRESSES),
+        queue_index=queues.indexes["target"] if queues is not None else None,
+        arp_index=arp.indexes["address"] if arp is not None else None,
+    )
+
+
+def customer_view(state: RouterState) -> list[Customer]:
+    return join_sections({path: state.section(path) for path in CUSTOMER_PATHS})
+
+
+def refresh_customers(state: RouterState, fresh: bool = False) -> bool:
+    """Refresh every table of the view; False if none could start."""
+    started = [state.refresh(path, fresh=fresh) for path in CUSTOMER_PATHS]
+    return any(started)
+
+
+__all__ = ["CUSTOMER_PATHS", "customer_view", "join_sections", "refresh_customers"]
@@ -0,0 +1,192 @@
+# core/formats.py
+"""
+Wire-format negotiation for table reads.
+
+``print detail`` is the most verbose format RouterOS has and the only one
+that needs the comment-wrapping heuristics in ``parse_detail_blocks``.
+FormatNegotiator asks for the cheapest format the router understands and
+decodes it with the matching fast decoder from utils.wire_formats:
+
+    json       :serialize to=json  (RouterOS 7, decoded by the C json module)
+    terse      … print terse
+    detail     … print detail without-paging   (always works – last resort)
+    as-value   :foreach r in=[… print as-value] do={:put $r}   (opt-in)
+
+as-value leaves values unquoted, so a ``;`` inside a comment is
+indistinguishable from the separator; the decoder rejects what it can
+detect (and the read falls back), but ``a; b=c`` would still parse as
+two properties.  It is therefore only used when a caller asks for it.
+
+A format the router rejects outright (``bad command name``, ``syntax
+error``, …) on a plain read of a path is remembered for that host and
+path for the rest of the session.  Anything else – an item that vanished,
+a filter the router refused, output the decoder could not trust – only
+makes this one read fall back to the next format.
+Records that carry ``.id`` (as-value, JSON) are handed to core.ids.
+"""
+from __future__ import annotations
+
+import re
+from typing import Any, ClassVar, Sequence
+
+from utils.universal_parser import parse_detail_blocks
+from utils.wire_formats import parse_as_value, parse_json, parse_terse
+from .ids import id_cache
+from .log import append
+
+#: default preference; "as-value" is understood but has to be asked for
+FORMATS = ("json", "terse", "detail")
+
+# what RouterOS prints (on stdout) when a command fails …
+_CLI_ERROR = re.compile(
+    r"^\s*(bad command name|syntax error|expected |input does not match|"
+    r"no such (item|command)|invalid value|failure:)",
+    re.M,
+)
+# … and the subset that means it does not understand the command at all
+_CLI_UNSUPPORTED = re.compile(
+    r"^\s*(bad command name|syntax error|expected |input does not match|no such command)",
+    re.M,
+)
+_VERSION_RE = re.compile(r"version:\s*(\d+)")
+
+
+class FormatUnavailable(Exception):
+    """The router rejected (or garbled) a given print format."""
+
+    def __init__(self, message: str, unsupported: bool = False) -> None:
+        super().__init__(message)
+        self.unsupported = unsupported      # the router lacks the format, not just this read
+
+
+class FormatNegotiator:
+    """
+    Fetch a whole table in the best available format.
+
+        recs = FormatNegotiator(client).fetch("/ip arp")
+        recs = FormatNegotiator(client).fetch("/ip dhcp-server lease",
+                                              where="address=10.0.0.5",
+                                              proplist=("address", "rate-limit"))
+
+    Filters and property lists are applied by the router, so only the
+    matching rows and columns cross the wire (see core.query).
+    """
+
+    # (host, path) → formats the router rejected / host → RouterOS major version
+    _unsupported: ClassVar[dict[tuple[str, str], set[str]]] = {}
+    _ros_major:   ClassVar[dict[str, int]]      = {}
+
+    def __init__(self, client, preferred: tuple[str, ...] = FORMATS) -> None:
+        self.client    = client
+        self.preferred = tuple(preferred)
+        self.host      = getattr(client, "host", "")
+        self.last_format: str | None = None
+
+    # ---------------------------------------------------------------- info
+    def ros_major(self) -> int:
+        if self.host not in self._ros_major:
+            out, _ = self.client.execute("/system resource print")
+            m = _VERSION_RE.search(out)
+            self._ros_major[self.host] = int(m.group(1)) if m else 0
+        return self._ros_major[self.host]
+
+    @classmethod
+    def known_major(cls, host: str) -> int:
+        """RouterOS major version of *host* if already asked for, else 0 (no I/O)."""
+        return cls._ros_major.get(host, 0)
+
+    @classmethod
+    def remember_major(cls, host: str, major: int) -> None:
+        """Seed the version of *host* learned elsewhere (a saved snapshot); never overrides."""
+        if major:
+            cls._ros_major.setdefault(host, major)
+
+    def available(self, path: str = "") -> list[str]:
+        bad = self._unsupported.get((self.host, path), set())
+        fmts = [f for f in self.preferred if f not in bad]
+        if "json" in fmts and self.ros_major() < 7:
+            fmts.remove("json")
+        if "detail" not in fmts:
+            fmts.append("detail")
+        return fmts
+
+    # ------------------------------------------------------------ commands
+    @staticmethod
+    def command(fmt: str, path: str, where: str = "", proplist: Sequence[str] = ()) -> str:
+        # “where” swallows the rest of the line, so it has to come last
+        tail = f" proplist={','.join(proplist)}" if proplist else ""
+        if where:
+            tail += f" where {where}"
+        if fmt == "json":
+            return f":put [:serialize to=json value=[{path} print as-value{tail}]]"
+        if fmt == "as-value":
+            # one record per line – a bare :put joins every record with ";"
+            return f":foreach r in=[{path} print as-value{tail}] do={{:put $r}}"
+        if fmt == "terse":
+            return f"{path} print terse without-paging{tail}"
+        return f"{path} print detail without-paging{tail}"
+
+    @staticmethod
+    def decode(fmt: str, out: str, section: str) -> list[dict[str, Any]]:
+        lines = out.splitlines()
+        if fmt == "json":
+            text = out.strip()
+            if not text:
+                return []
+            try:
+                return parse_json(text, section)
+            except ValueError as exc:
+                raise FormatUnavailable(f"bad JSON: {exc}") from exc
+        if fmt == "as-value":
+            try:
+                return parse_as_value(lines, section)
+            except ValueError as exc:
+                raise FormatUnavailable(str(exc)) from exc
+        if fmt == "terse":
+            return parse_terse(lines, section)
+        return parse_detail_blocks(lines, section)
+
+    # ----------------------------------------------------------------- read
+    def fetch(
+        self,
+        path: str,
+        where: str = "",
+        section: str | None = None,
+        proplist: Sequence[str] = (),
+    ) -> list[dict[str, Any]]:
+        """
+        Read *path* (optionally filtered by a RouterOS *where* expression and
+        cut down to the *proplist* properties) in the first format that
+        works.  Raises RuntimeError only when even ``print detail`` fails.
+        """
+        section = section or path
+        for fmt in self.available(path):
+            out, err = self.client.execute(self.command(fmt, path, where, proplist))
+            try:
+                if err or (fmt != "detail" and _CLI_ERROR.search(out)):
+                    text = (err or out).strip()
+                    raise FormatUnavailable(text, bool(_CLI_UNSUPPORTED.search(text)))
+                records = self.decode(fmt, out, section)
+                if records and ".id" in records[0] and len({r.get(".id") for r in records}) != len(records):
+                    # one row per item or the decoder merged / split records
+                    raise FormatUnavailable(f"{len(records)} records, repeated .id")
+            except FormatUnavailable as exc:
+                if fmt == "detail":
+                    raise RuntimeError(str(exc)) from exc
+                # a filtered read may fail on its filter – only plain reads teach us
+                if exc.unsupported and not where and not proplist:
+                    append(f"FORMAT {fmt} unavailable on {self.host} {path}: {exc}")
+                    self._unsupported.setdefault((self.host, path), set()).add(fmt)
+                else:
+                    append(f"FORMAT {fmt} failed on {self.host} {path}, falling back: {exc}")
+                continue
+            self.last_format = fmt
+            if records and ".id" in records[0]:
+                # a read without where / proplist is the whole table
+                id_cache.learn(self.host, path, records,
+                               complete=not where and not proplist)
+            return records
+        raise RuntimeError(f"No usable print format for {path}")     # pragma: no cover
+
+
+__all__ = ["FORMATS", "FormatNegotiator", "FormatUnavailable"]
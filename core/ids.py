@@ -0,0 +1,211 @@
+# core/ids.py
+"""
+Per-router cache of natural key → RouterOS ``.id``.
+
+A write such as ``/queue simple set [find name="Jane"] …`` makes the
+router scan the whole table for every command.  The records we already
+hold usually carry the item's internal id (``.id=*1A2B`` – as-value /
+JSON reads and ``print … show-ids`` snapshots), so the write can name the
+item directly::
+
+    ref = item_ref(client, "/queue simple", name="Jane")
+    client.execute(f"/queue simple set {ref} limit-at=1M/1M")
+    # → /queue simple set numbers=*1A2B limit-at=1M/1M   (id known)
+    # → /queue simple set [find name=Jane] limit-at=1M/1M (otherwise)
+
+Ids are learned from whole snapshots (core.state) and from filtered reads
+(core.formats).  The utils.index indexes of the menu find the candidates,
+but only items whose field is exactly the value count – like the
+``[find field=value]`` the ref replaces.  The indexes normalize (a queue
+is filed under each of its targets, without ``/32``), and a ``remove``
+must not reach a multi-target queue that ``[find target=x/32]`` never
+matched.
+
+The cache listens to core.cache: ``add`` / ``remove`` / ``move`` and
+scripts forget the table, as does a ``set`` that changes a key field
+(``name=``, ``target=``, ``address=``, ``mac-address=``); other ``set``s
+keep it.  An id that vanished anyway (another admin removed the item)
+fails with "no such item" – run_on_item() then forgets the table and
+retries with ``[find …]``.
+"""
+from __future__ import annotations
+
+import re
+import threading
+from typing import Any, Iterable, Mapping
+
+from utils.index import INDEX_SPECS, IndexSet, build_indexes
+from utils.text import clean_field, quote_field
+from .cache import normalize_command, read_cache
+from .log import append
+
+#: field of a ``[find …]`` → index name, where the two differ
+_INDEX_OF = {"mac-address": "mac"}
+
+#: filtered reads kept per table on top of the last snapshot
+_MAX_PARTIAL = 64
+
+#: verbs that leave every item where it is
+_KEEPS_ITEMS = frozenset({"set", "enable", "disable", "comment", "unset", "reset"})
+
+_BRACKETS = re.compile(r"\[[^\[\]]*\]")
+_NO_ITEM  = re.compile(r"no such item", re.I)
+
+
+def _index_name(field: str) -> str:
+    return _INDEX_OF.get(field, field)
+
+
+def _key_fields(path: str) -> tuple[str, ...]:
+    """Raw fields the indexes of *path* are keyed on (``name=``, ``mac-address=`` …)."""
+    names = INDEX_SPECS.get(path, {})
+    fields = {"mac": "mac-address"}
+    return tuple(f"{fields.get(n, n)}=" for n in names)
+
+
+# ──────────────────────────────────────────────────────────────── cache
+class IdCache:
+    """(host, menu path) → indexes of records that carry ``.id``."""
+
+    def __init__(self) -> None:
+        # (host, path) → [snapshot indexes or None, *indexes of filtered reads]
+        self._tables: dict[tuple[str, str], list[IndexSet | None]] = {}
+        self._lock = threading.Lock()
+
+    # ------------------------------------------------------------ learning
+    def learn(self, host: str, path: str, records: Iterable[Mapping[str, Any]] = (),
+              *, indexes: IndexSet | None = None, complete: bool = True) -> None:
+        """
+        File the ids of *records* (or of ready-made *indexes*).  A complete
+        snapshot replaces what was known; a filtered read is added to it.
+        """
+        if path not in INDEX_SPECS:
+            return
+        if indexes is None:
+            records = [r for r in records if r.get(".id")]
+            if not records:
+                return
+            indexes = build_indexes(path, records)
+        with self._lock:
+            known = self._tables.setdefault((host, path), [None])
+            if complete:
+                known[:] = [indexes]
+            else:
+                known.append(indexes)
+                if len(known) > _MAX_PARTIAL + 1:
+                    del known[1]
+
+    def replace(self, host: str, path: str, old: IndexSet, new: IndexSet) -> None:
+        """Swap in *new* snapshot indexes, if *old* is still the ones filed."""
+        with self._lock:
+            known = self._tables.get((host, path))
+            if known and known[0] is old:
+                known[0] = new
+
+    def forget(self, host: str, path: str | None = None) -> None:
+        with self._lock:
+            doomed = [k for k in self._tables if k[0] == host and path in (None, k[1])]
+            for key in doomed:
+                del self._tables[key]
+
+    def known(self, host: str, path: str) -> bool:
+        with self._lock:
+            return (host, path) in self._tables
+
+    # ------------------------------------------------------------- look-up
+    def ids(self, host: str, path: str, field: str, value: str | None) -> list[str]:
+        """Ids of the items whose *field* is exactly *value* (empty if unknown)."""
+        with self._lock:
+            known = list(self._tables.get((host, path), ()))
+        name = _index_name(field)
+        want = clean_field(value)
+        found: dict[str, None] = {}
+        for indexes in known:
+            if indexes is None or name not in indexes:
+                continue
+            for rec in indexes[name].get_all(value):
+                rid = rec.get(".id")
+                if rid and clean_field(rec.get(field)) == want:
+                    found[rid] = None
+        return list(found)
+
+    # ------------------------------------------------------- invalidation
+    def observe(self, host: str, path: str | None, command: str | None = None) -> None:
+        """ReadCache listener – forget tables a write may have restructured."""
+        if path is None:
+            self.forget(host)
+            return
+        if command is not None:
+            cmd = normalize_command(command)
+            rest = cmd[len(path):].strip().split(" ", 1) if cmd.startswith(path) else [""]
+            verb, args = rest[0], _BRACKETS.sub("", rest[1] if len(rest) > 1 else "")
+            if verb in _KEEPS_ITEMS and not any(
+                f" {key}" in f" {args}" for key in _key_fields(path)
+            ):
+                return
+        with self._lock:
+            doomed = [k for k in self._tables
+                      if k[0] == host and (k[1] == path or k[1].startswith(path + " ")
+                                           or path == "/")]
+            for key in doomed:
+                del self._tables[key]
+
+
+id_cache = IdCache()
+read_cache.add_listener(id_cache.observe)
+
+
+# ─────────────────────────────────────────────────────────────── writes
+def _find(field: str, value: str) -> str:
+    return f"[find {field}={quote_field(value)}]"
+
+
+def item_ref(client, path: str, rec: Mapping[str, Any] | None = None, **key: str) -> str:
+    """
+    ``numbers=*1A,*2B`` for the items matching *key* (one ``field=value``;
+    ``_`` in the keyword stands for ``-``) – or the record's own ``.id`` –
+    when known, else ``[find field=value]``.
+    """
+    rid = rec.get(".id") if rec is not None else None
+    if rid:
+        return f"numbers={rid}"
+    (field, value), = key.items()
+    field = field.replace("_", "-")
+    ids = id_cache.ids(getattr(client, "host", ""), path, field, value)
+    return f"numbers={','.join(ids)}" if ids else _find(field, value)
+
+
+def any_ref(client, path: str, rec: Mapping[str, Any] | None = None, **keys: str) -> str | None:
+    """
+    ``numbers=…`` for every item matching any of *keys* (plus *rec*'s own
+    ``.id``), or None unless ids of *path* were learned – the caller then
+    falls back to one ``[find …]`` per key.
+    """
+    host = getattr(client, "host", "")
+    if not id_cache.known(host, path):
+        return None
+    ids = [rec[".id"]] if rec is not None and rec.get(".id") else []
+    for field, value in keys.items():
+        ids += id_cache.ids(host, path, field.replace("_", "-"), value)
+    return f"numbers={','.join(dict.fromkeys(ids))}" if ids else None
+
+
+def run_on_item(client, path: str, verb: str, args: str = "",
+                rec: Mapping[str, Any] | None = None, **key: str) -> tuple[str, str]:
+    """
+    ``client.execute(f"{path} {verb} {item_ref(…)} {args}")``; a stale id
+    is retried once by ``[find …]``.  Returns the (stdout, stderr) of the run.
+    """
+    tail = f" {args}" if args else ""
+    ref = item_ref(client, path, rec, **key)
+    out, err = client.execute(f"{path} {verb} {ref}{tail}")
+    if ref.startswith("numbers=") and _NO_ITEM.search(err or out) and key:
+        host = getattr(client, "host", "")
+        append(f"IDS stale {ref} for {path} on {host} – retrying by key")
+        id_cache.forget(host, path)
+        (field, value), = key.items()
+        out, err = client.execute(f"{path} {verb} {_find(field.replace('_', '-'), value)}{tail}")
+    return out, err
+
+
+__all__ = ["IdCache", "id_cache", "item_ref", "any_ref", "run_on_item"]
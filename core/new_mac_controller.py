@@ -13,10 +13,14 @@ from typing import Optional
 from PyQt6.QtCore import QObject, pyqtSignal, QRunnable, QThreadPool
 
 from core.client                      import MikrotikClient
+from core.cache                       import CachedClient
+from core.ids                         import item_ref
 from core.queue_converter             import QueueConverter, QueueConversionError
 from core.queue_conversion_controller import QueueConversionController
 from utils.action_manager             import manager as action_manager
 from core.log                         import append as log_append
+from core.state                       import fresh_section
+from core.write_plan                  import WritePlanner
 from utils.universal_parser           import parse_detail_blocks
 
 
@@ -41,7 +45,8 @@ class NewMacController(QObject, QRunnable):
                 self._p["host"], self._p["user"],
                 self._p["password"], self._p["port"]
             ) as cli:
-                summary = self._process(cli, self._p)
+                # cached + coalesced reads, shared with the pages' clients
+                summary = self._process(CachedClient(cli), self._p)
             self.finished.emit(summary)
         except Exception as exc:
             self.error.emit(str(exc))
@@ -49,6 +54,10 @@ class NewMacController(QObject, QRunnable):
     # ───────────────────────────────── helpers
     @staticmethod
     def _find_lease(cli: "MikrotikClient", ip_addr: str) -> Optional[dict]:
+        sec = fresh_section(cli.host, "/ip dhcp-server lease")
+        if sec is not None:                       # O(1) on the shared snapshot
+            rec = sec.find("address", ip_addr)
+            return dict(rec) if rec is not None else None
         raw = cli.cmd(f"/ip dhcp-server lease print detail without-paging where address={ip_addr}").splitlines()
         recs = parse_detail_blocks(raw, "ip dhcp-server lease")
         return next((r for r in recs if r.get("address") == ip_addr), None)
@@ -64,12 +73,19 @@ class NewMacController(QObject, QRunnable):
         old_mac     = lease.get("mac-address", "")
         lease_rate  = lease.get("rate-limit", "").strip('"')
 
-        # 2) swap MAC
-        cli.cmd(f'/ip dhcp-server lease set [find address="{ip_only}"] mac-address={p["new_mac"]}')
+        # 2) swap MAC – the lease's .id stays valid across both writes
+        ref = item_ref(cli, "/ip dhcp-server lease", lease, address=ip_only)
+        writes = [f'/ip dhcp-server lease set {ref} mac-address={p["new_mac"]}']
 
         # 3) enable?
         if p["enable_lease"]:
-            cli.cmd(f'/ip dhcp-server lease set [find address="{ip_only}"] disabled=no')
+            writes.append(f'/ip dhcp-server lease set {ref} disabled=no')
+
+        # both judged before either runs – the lease snapshot is fresh only until then
+        planner = WritePlanner(cli)
+        for cmd in planner.plan(writes):
+            cli.cmd(cmd)
+        planner.log(f"new MAC {ip_only}")
 
         # 4) queue / rate-limit handling
         qc     = QueueConversionController(cli, p["default_limit_at"])
@@ -101,4 +117,5 @@ class NewMacController(QObject, QRunnable):
                 "old_mac": old_mac,
                 "new_mac": p["new_mac"],
                 "queue_msg": q_msg,
+                "writes_skipped": planner.skipped,
                 }
@@ -0,0 +1,110 @@
+# core/query.py
+"""
+Small query builder that pushes filters and column lists to the router.
+
+Instead of printing a whole table and scanning it in Python, describe the
+rows and properties you need and let RouterOS do the filtering::
+
+    q = query("/queue simple").where(target="10.0.0.5/32").fields("name", "max-limit")
+    q.command()      # /queue simple print detail without-paging
+                     #     proplist=.id,name,max-limit where target=10.0.0.5/32
+    q.fetch(client)  # → [{"name": "Jane", "max-limit": "10M/10M", …}]
+
+``where(**eq)`` ANDs equality tests, ``any_of(**eq)`` adds one OR-group and
+``having(expr)`` takes a raw RouterOS expression (``"dynamic"``,
+``"!disabled"``).  Keyword names use ``_`` for ``-`` (``rate_limit=`` →
+``rate-limit=``).  A property list always includes ``.id``, so every row
+stays a row of its own whatever the format.  Queries are immutable, so a base query can be shared
+and refined.  Reading goes through FormatNegotiator, so the cheapest
+format the router supports is used.
+"""
+from __future__ import annotations
+
+import re
+from typing import Any
+
+from .formats import FormatNegotiator
+
+# values RouterOS reads as a single bare token (names, IPs, prefixes, MACs, rates)
+_BARE_RE = re.compile(r"^[\w.:/@+*-]+$")
+
+
+# ──────────────────────────────────────────────────────────── literals
+def literal(value: Any) -> str:
+    """Render *value* for a where-expression (``True`` → ``yes``, quoted if needed)."""
+    if isinstance(value, bool):
+        return "yes" if value else "no"
+    text = str(value)
+    if _BARE_RE.match(text):
+        return text
+    escaped = (text.replace("\\", "\\\\").replace('"', '\\"')
+                   .replace("$", "\\$").replace("?", "\\?"))
+    return f'"{escaped}"'
+
+
+def _prop(name: str) -> str:
+    return name.replace("_", "-")
+
+
+def _equals(eq: dict[str, Any]) -> list[str]:
+    return [f"{_prop(k)}={literal(v)}" for k, v in eq.items()]
+
+
+# ────────────────────────────────────────────────────────────── query
+class Query:
+    """Immutable description of one ``print`` – see the module docstring."""
+
+    __slots__ = ("path", "terms", "props")
+
+    def __init__(self, path: str, terms: tuple[str, ...] = (),
+                 props: tuple[str, ...] = ()) -> None:
+        self.path  = path
+        self.terms = terms              # ANDed where-expression terms
+        self.props = props              # proplist (empty = every property)
+
+    def __repr__(self) -> str:
+        return f"Query({self.command()!r})"
+
+    # ------------------------------------------------------------ building
+    def where(self, **eq: Any) -> "Query":
+        return Query(self.path, self.terms + tuple(_equals(eq)), self.props)
+
+    def any_of(self, **eq: Any) -> "Query":
+        if not eq:
+            return self
+        group = " || ".join(_equals(eq))
+        term = f"({group})" if len(eq) > 1 else group
+        return Query(self.path, self.terms + (term,), self.props)
+
+    def having(self, expr: str) -> "Query":
+        return Query(self.path, self.terms + (expr,), self.props)
+
+    def fields(self, *names: str) -> "Query":
+        props = self.props or (".id",)
+        props += tuple(dict.fromkeys(_prop(n) for n in names if _prop(n) not in props))
+        return Query(self.path, self.terms, props)
+
+    # ----------------------------------------------------------- compiling
+    @property
+    def where_expr(self) -> str:
+        return " && ".join(self.terms)
+
+    def command(self, fmt: str = "detail") -> str:
+        return FormatNegotiator.command(fmt, self.path, self.where_expr, self.props)
+
+    # ------------------------------------------------------------- running
+    def fetch(self, client, section: str | None = None) -> list[dict[str, Any]]:
+        return FormatNegotiator(client).fetch(
+            self.path, self.where_expr, section, proplist=self.props
+        )
+
+    def first(self, client, section: str | None = None) -> dict[str, Any] | None:
+        recs = self.fetch(client, section)
+        return recs[0] if recs else None
+
+
+def query(path: str) -> Query:
+    return Query(path)
+
+
+__all__ = ["Query", "query", "literal"]
@@ -5,6 +5,7 @@ from core.queue_converter import QueueConverter, QueueConversionError
 from utils.action_manager import manager as action_manager
 from core.log import append as log_append
 from utils.text import quote_field
+from core.ids import any_ref
 
 
 class QueueConversionController:
@@ -113,8 +114,7 @@ class QueueConversionController:
 
         # ---- OVERWRITE ------------------------------------------------------
         if choice is overwrite:
-            cmd_rm1 = f'/queue simple remove [find name={quote_field(old["name"])}]'
-            cmd_rm2 = f'/queue simple remove [find target={quote_field(old["target"]+"/32")}]'
+            cmds_rm = self._remove_old_queue(conflict, old)
             cmd_add = (
                 f'/queue simple add '
                 f'name={quote_field(ip)} '
@@ -124,7 +124,7 @@ class QueueConversionController:
                 f'queue=default-small/default-small '
                 f'comment={quote_field(old["comment"])}'
             )
-            for c in (cmd_rm1, cmd_rm2, cmd_add):
+            for c in (*cmds_rm, cmd_add):
                 self.ssh.execute(c)
 
             inverse_cmds = [
@@ -149,7 +149,7 @@ class QueueConversionController:
                 {
                     "existing":      old,
                     "new_lease":     lease_rate,
-                    "cmds_executed": [cmd_rm1, cmd_rm2, cmd_add],
+                    "cmds_executed": [*cmds_rm, cmd_add],
                     "inverse_cmds":  inverse_cmds,
                 },
             )
@@ -180,6 +180,21 @@ class QueueConversionController:
             )
             log_append(f"Cancelled conversion for {dhcp_name} / {ip}")
 
+    def _remove_old_queue(self, conflict: dict, old: dict) -> list:
+        """
+        Commands that drop the conflicting static queue by name and by /32
+        target – a single ``remove numbers=…`` when the ids are known.
+        Inverse commands keep ``[find …]``: ids change once Undo re-adds.
+        """
+        ref = any_ref(self.ssh, "/queue simple", conflict,
+                      name=old["name"], target=old["target"] + "/32")
+        if ref:
+            return [f'/queue simple remove {ref}']
+        return [
+            f'/queue simple remove [find name={quote_field(old["name"])}]',
+            f'/queue simple remove [find target={quote_field(old["target"]+"/32")}]',
+        ]
+
     # ──────────────────────────────────────────────────────────────── Direct methods
     def _add_static_queue_direct(self, dhcp_name: str, ip: str, lease_rate: str):
         """
@@ -236,8 +251,7 @@ class QueueConversionController:
             "comment":  conflict.get("comment", ""),
         }
 
-        cmd_rm1 = f'/queue simple remove [find name={quote_field(old["name"])}]'
-        cmd_rm2 = f'/queue simple remove [find target={quote_field(old["target"]+"/32")}]'
+        cmds_rm = self._remove_old_queue(conflict, old)
         cmd_add = (
             f'/queue simple add '
             f'name={quote_field(ip)} '
@@ -248,7 +262,7 @@ class QueueConversionController:
             f'comment={quote_field(old["comment"])}'
         )
 
-        for c in (cmd_rm1, cmd_rm2, cmd_add):
+        for c in (*cmds_rm, cmd_add):
             self.ssh.execute(c)
 
         inverse_cmds = [
@@ -274,7 +288,7 @@ class QueueConversionController:
             {
                 "existing":      old,
                 "new_lease":     lease_rate,
-                "cmds_executed": [cmd_rm1, cmd_rm2, cmd_add],
+                "cmds_executed": [*cmds_rm, cmd_add],
                 "inverse_cmds":  inverse_cmds,
             },
         )
@@ -1,9 +1,13 @@
 # core/queue_converter.py
-import re
-from typing import List, Dict
+from typing import Dict
 
-from utils.universal_parser import parse_detail_blocks
-from utils.text             import clean_field, quote_field
+from utils.text  import clean_field, quote_field
+from core.ids   import run_on_item
+from core.query import query
+from core.state import fresh_section
+
+#: only these queue properties are read back when looking for a conflict
+CONFLICT_FIELDS = ("name", "target", "max-limit", "limit-at", "comment")
 
 
 class QueueConversionError(Exception):
@@ -43,17 +47,22 @@ class QueueConverter:
         """
 
         # 1) ------------- fetch the lease ----------------------------------
-        lease_cmd = f'/ip dhcp-server lease print detail where address={target}'
-        lease_out, lease_err = self.ssh.execute(lease_cmd)
-        if lease_err or not lease_out:
-            raise QueueConversionError(f"No DHCP lease for {target}: {lease_err or '<empty>'}")
-
-        # grab rate-limit
-        lease_rate = ""
-        for ln in lease_out.splitlines():
-            if "rate-limit=" in ln:
-                lease_rate = ln.split("rate-limit=", 1)[1].split()[0]
-                break
+        host  = getattr(self.ssh, "host", "")
+        lease = None
+        sec = fresh_section(host, "/ip dhcp-server lease")
+        if sec is not None:
+            lease = sec.find("address", target)
+        else:
+            try:
+                lease = (query("/ip dhcp-server lease")
+                         .where(address=target).fields("address", "rate-limit")
+                         .first(self.ssh))
+            except RuntimeError as err:
+                raise QueueConversionError(f"No DHCP lease for {target}: {err}") from err
+        if lease is None:
+            raise QueueConversionError(f"No DHCP lease for {target}: <empty>")
+
+        lease_rate = clean_field(lease.get("rate-limit", ""))
         if not lease_rate:
             raise QueueConversionError(f"No rate-limit in lease for {target}")
 
@@ -61,13 +70,22 @@ class QueueConverter:
         self._stash[target] = {"rate": lease_rate, "comment": ""}
 
         # 2) ------------- clear rate-limit on the router --------------------
-        self.ssh.execute(
-            f'/ip dhcp-server lease set [find address={quote_field(target)}] rate-limit=""'
-        )
+        # by the lease's .id when the read carried it, else [find address=…]
+        run_on_item(self.ssh, "/ip dhcp-server lease", "set", 'rate-limit=""',
+                    rec=lease, address=target)
 
         # 3) ------------- look for an existing *static* queue --------------
-        raw_qs, _ = self.ssh.execute("/queue simple print detail without-paging")
-        recs: List[Dict[str, str]] = parse_detail_blocks(raw_qs.splitlines(), "/queue simple")
+        # index hits on a fresh shared snapshot, else the router filters by
+        # name / target; the check below only guards against multi-target
+        # queues and quoting differences
+        sec = fresh_section(host, "/queue simple")
+        if sec is not None:
+            recs = sec.find_all("name", name) + sec.find_all("target", target)
+        else:
+            recs = (query("/queue simple")
+                    .any_of(name=name, target=f"{target}/32")
+                    .fields(*CONFLICT_FIELDS)
+                    .fetch(self.ssh))
 
         conflict = next((
             r for r in recs
@@ -95,7 +113,7 @@ class QueueConverter:
         comment = comment if comment is not None else info.get("comment", "")
 
         # 1) drop old static
-        self.ssh.execute(f'/queue simple remove [find name={quote_field(existing_name)}]')
+        run_on_item(self.ssh, "/queue simple", "remove", name=existing_name)
 
         # 2) re-create with new params
         add_cmd = (
@@ -121,10 +139,7 @@ class QueueConverter:
         if not info:
             raise QueueConversionError("Nothing to roll back")
         rate = info["rate"]
-        cmd  = (
-            f'/ip dhcp-server lease set '
-            f'[find address={quote_field(target)}] rate-limit={quote_field(rate)}'
-        )
-        out, err = self.ssh.execute(cmd)
+        out, err = run_on_item(self.ssh, "/ip dhcp-server lease", "set",
+                               f"rate-limit={quote_field(rate)}", address=target)
         if err:
             raise QueueConversionError(f"Rollback failed: {err}")
@@ -2,15 +2,16 @@
 # core/route_controller.py
 
 from PyQt6.QtCore import QObject, pyqtSignal
+from core.state import Section, router_state
 from core.taskrunner import CommandRunner
-from utils.universal_parser import parse_detail_blocks
 
 
 class RouteController(QObject):
     """
     Handles all MikroTik I/O for /ip route, ping, and trace.
     Emits:
-      - routesReady(list[dict]) when a refresh completes.
+      - routesReady(list[dict]) whenever the router's shared store gets a
+        new /ip route snapshot (an unchanged refresh emits nothing).
       - cmdFinished(str, list[str]) when ping/trace completes.
     """
     routesReady = pyqtSignal(list)
@@ -19,14 +20,14 @@ class RouteController(QObject):
     def __init__(self, parent=None):
         super().__init__(parent)
         self._client = None
-        self._refresh_runner = None
+        self._state = None
+        self._unsubscribe = None
         self._tool_runners: list[CommandRunner] = []
 
     def set_ssh_client(self, client):
-        # Stop any in‐flight refresh
-        if self._refresh_runner and self._refresh_runner.isRunning():
-            self._refresh_runner.quit()
-            self._refresh_runner.wait()
+        if self._unsubscribe is not None:
+            self._unsubscribe()
+            self._unsubscribe = self._state = None
         # Stop any ping/trace runners
         for tn in list(self._tool_runners):
             if tn.isRunning():
@@ -34,18 +35,16 @@ class RouteController(QObject):
                 tn.wait()
         self._tool_runners.clear()
         self._client = client
+        if client is not None:
+            self._state = router_state(client)
+            self._unsubscribe = self._state.subscribe("/ip route", self._on_routes)
 
     def refresh_routes(self):
-        if not self._client or (self._refresh_runner and self._refresh_runner.isRunning()):
-            return
-        cmd = "/ip route print detail without-paging"
-        self._refresh_runner = CommandRunner(self._client, cmd)
-        self._refresh_runner.finished.connect(self._on_refresh_done)
-        self._refresh_runner.start()
+        if self._state is not None:
+            self._state.refresh("/ip route")     # no-op while one is running
 
-    def _on_refresh_done(self, cmd: str, lines: list[str]):
-        recs = parse_detail_blocks(lines, "/ip route")
-        self.routesReady.emit(recs)
+    def _on_routes(self, section: Section):
+        self.routesReady.emit(list(section.records))
 
     def ping(self, target: str):
         if not self._client:
@@ -73,9 +72,9 @@ class RouteController(QObject):
 
     def stop(self):
         # Called on close to ensure no threads linger
-        if self._refresh_runner and self._refresh_runner.isRunning():
-            self._refresh_runner.quit()
-            self._refresh_runner.wait()
+        if self._unsubscribe is not None:
+            self._unsubscribe()
+            self._unsubscribe = None
         for tn in list(self._tool_runners):
             if tn.isRunning():
                 tn.quit()
@@ -0,0 +1,104 @@
+# core/singleflight.py
+"""
+Single-flight coalescing: concurrent callers asking for the same key share
+one in-flight call and its result (or exception).
+
+Two entry points, one per threading style used in the app:
+
+    # QThread runners / QRunnables – block in the worker thread
+    out = flights.do(("10.0.0.1", cmd), lambda: client.execute(cmd))
+
+    # thread-pool users – get the shared Future of the running call
+    fut = flights.submit(("10.0.0.1", cmd), lambda: client.execute(cmd), pool)
+
+Streaming callers use :meth:`SingleFlight.begin` / :meth:`SingleFlight.finish`
+directly.
+
+CachedClient (core.cache) routes every cache miss through the process-wide
+:data:`flights`, so the Queues tab refreshing while a wizard step reads the
+same queue list costs the router one request.
+"""
+from __future__ import annotations
+
+import threading
+from concurrent.futures import Executor, Future
+from typing import Any, Callable, Hashable
+
+from .log import append
+
+
+class SingleFlight:
+    def __init__(self) -> None:
+        self._calls: dict[Hashable, Future] = {}
+        self._lock = threading.Lock()
+        self.shared = 0                     # callers that joined a running call
+
+    # ------------------------------------------------------------ low level
+    def begin(self, key: Hashable) -> tuple[Future, bool]:
+        """``(future, is_leader)`` – the leader must finish the future via :meth:`finish`."""
+        with self._lock:
+            fut = self._calls.get(key)
+            if fut is not None:
+                self.shared += 1
+                return fut, False
+            fut = self._calls[key] = Future()
+            fut.set_running_or_notify_cancel()
+            return fut, True
+
+    def finish(self, key: Hashable, fut: Future, result: Any = None,
+               error: BaseException | None = None) -> None:
+        with self._lock:
+            if self._calls.get(key) is fut:
+                del self._calls[key]
+        if error is not None:
+            fut.set_exception(error)
+        else:
+            fut.set_result(result)
+
+    def forget(self, match: Callable[[Hashable], bool]) -> None:
+        """Let new callers of matching keys start a fresh call (e.g. after a write)."""
+        with self._lock:
+            for key in [k for k in self._calls if match(k)]:
+                del self._calls[key]
+
+    def in_flight(self, key: Hashable) -> bool:
+        with self._lock:
+            return key in self._calls
+
+    # ----------------------------------------------------------- blocking
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        fut, leader = self.begin(key)
+        if not leader:
+            append(f"SINGLEFLIGHT join {key}")
+            return fut.result()
+        try:
+            result = fn()
+        except BaseException as exc:
+            self.finish(key, fut, error=exc)
+            raise
+        self.finish(key, fut, result)
+        return result
+
+    # -------------------------------------------------------- thread pool
+    def submit(self, key: Hashable, fn: Callable[[], Any], executor: Executor) -> Future:
+        fut, leader = self.begin(key)
+        if not leader:
+            append(f"SINGLEFLIGHT join {key}")
+            return fut
+
+        def _call() -> None:
+            try:
+                result = fn()
+            except BaseException as exc:     # handed to every waiter
+                self.finish(key, fut, error=exc)
+            else:
+                self.finish(key, fut, result)
+
+        executor.submit(_call)
+        return fut
+
+
+flights = SingleFlight()
+
+
+__all__ = ["SingleFlight", "flights"]
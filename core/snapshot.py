@@ -0,0 +1,61 @@
+# core/snapshot.py
+"""
+Whole-router snapshot in one ``/export`` plus a few dynamic reads.
+
+The static configuration of every menu comes from a single
+``/export terse`` (parsed by utils.export_parser).  Entries that RouterOS
+never exports – dynamic ARP entries, dynamic DHCP leases, connected /
+dynamic routes – are read with ``print … where dynamic`` through the
+FormatNegotiator and appended to the matching section, so the result has
+the same shape as one ``print detail`` per section::
+
+    snap = take_snapshot(client)
+    snap["/ip dhcp-server lease"]      # static (exported) + dynamic leases
+"""
+from __future__ import annotations
+
+from typing import Any, Iterable
+
+from utils.export_parser import parse_export
+from .formats import FormatNegotiator
+from .log import append
+
+EXPORT_COMMAND         = "/export terse"
+EXPORT_VERBOSE_COMMAND = "/export terse verbose"
+
+#: (menu, where) pairs read with print because /export leaves them out
+DYNAMIC_READS: tuple[tuple[str, str], ...] = (
+    ("/ip arp", "dynamic"),
+    ("/ip dhcp-server lease", "dynamic"),
+    ("/ip route", "dynamic"),
+)
+
+
+def take_snapshot(
+    client,
+    *,
+    verbose: bool = False,
+    dynamic: Iterable[tuple[str, str]] = DYNAMIC_READS,
+) -> dict[str, list[dict[str, Any]]]:
+    """
+    ``{menu path: [records]}`` for the whole router.
+
+    *verbose* exports default values too (``/export verbose``); *dynamic*
+    lists the extra ``print`` reads.  Raises RuntimeError when the export
+    itself fails.
+    """
+    out, err = client.execute(EXPORT_VERBOSE_COMMAND if verbose else EXPORT_COMMAND)
+    if err.strip():
+        raise RuntimeError(err.strip())
+    sections = parse_export(out.splitlines())
+
+    negotiator = FormatNegotiator(client)
+    for path, where in dynamic:
+        sections.setdefault(path, []).extend(negotiator.fetch(path, where=where))
+
+    append(f"SNAPSHOT {getattr(client, 'host', '')}: {len(sections)} sections, "
+           f"{sum(len(r) for r in sections.values())} records")
+    return sections
+
+
+__all__ = ["take_snapshot", "DYNAMIC_READS", "EXPORT_COMMAND", "EXPORT_VERBOSE_COMMAND"]
@@ -0,0 +1,143 @@
+# core/snapshot_cache.py
+"""
+The last snapshot of every table, per router, kept on disk between runs.
+
+Every complete snapshot the store (core.state) publishes is written in
+the background to ``cache/snapshots/<router>/<menu>.snap``
+(utils.snapshot_file).  When the app connects to a router again, the
+saved tables are read back in a worker and published as *cached*
+sections: pages render them at once, marked stale, while the store
+revalidates each table with a normal refresh::
+
+    state = router_state(client)        # schedules snapshot_cache.restore(state)
+    sec = state.section("/queue simple")
+    sec.stale, sec.cached_at            # True, time.time() of the saved read
+
+The saved output digest seeds the store's OutputDigests, so when the
+router's table did not change the refresh costs one transfer and the
+cached section simply becomes live – nothing is parsed or re-rendered.
+Otherwise the new snapshot replaces it and pages update only the rows
+that differ (RecordTableModel.sync_rows).
+"""
+from __future__ import annotations
+
+import re
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Any
+
+from utils.snapshot_file import SnapshotFormatError, read_snapshot, write_snapshot
+from .formats import FormatNegotiator
+from .log import append
+
+CACHE_DIR = Path(__file__).resolve().parent.parent / "cache" / "snapshots"
+
+_UNSAFE = re.compile(r"[^\w.-]+")
+
+
+def _safe(name: str) -> str:
+    return _UNSAFE.sub("_", name.strip("/ ")) or "_"
+
+
+class SnapshotCache:
+    """Reads and writes saved snapshots on one background thread."""
+
+    def __init__(self, root: Path = CACHE_DIR) -> None:
+        self.root = Path(root)
+        self.enabled = True
+        self._pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="snapshot-cache")
+        self._latest: dict[tuple[str, str], int] = {}    # newest version queued per table
+        self._lock = threading.Lock()
+
+    def file_for(self, host: str, path: str) -> Path:
+        return self.root / _safe(host) / f"{_safe(path)}.snap"
+
+    # ------------------------------------------------------------- saving
+    def save(self, host: str, section, digest: bytes | None = None,
+             ros_major: int = 0) -> Future | None:
+        """Queue *section* for writing; an older queued version of it is skipped."""
+        if not self.enabled or not section.command:
+            return None
+        with self._lock:
+            self._latest[host, section.path] = section.version
+        return self._pool.submit(self._write, host, section, digest, ros_major)
+
+    def _write(self, host: str, section, digest: bytes | None, ros_major: int) -> None:
+        with self._lock:
+            if self._latest.get((host, section.path)) != section.version:
+                return                                      # superseded
+        file = self.file_for(host, section.path)
+        meta = {
+            "host":      host,
+            "path":      section.path,
+            "command":   section.command,
+            "saved":     time.time(),
+            "digest":    digest.hex() if digest else "",
+            "ros_major": ros_major,
+        }
+        try:
+            file.parent.mkdir(parents=True, exist_ok=True)
+            size = write_snapshot(file, section.records, meta)
+        except (OSError, SnapshotFormatError) as exc:
+            append(f"SNAPSHOT save {host} {section.path} failed: {exc}")
+            return
+        append(f"SNAPSHOT saved {host} {section.path} ({len(section)} records, {size // 1024} KiB)")
+
+    # ------------------------------------------------------------ loading
+    def load(self, file: Path) -> tuple[dict[str, Any], list[dict[str, Any]]] | None:
+        """``(meta, records)`` of a saved snapshot; unreadable files are removed."""
+        try:
+            return read_snapshot(file)
+        except (OSError, SnapshotFormatError, KeyError) as exc:
+            append(f"SNAPSHOT {file.name} unreadable, dropped: {exc}")
+            file.unlink(missing_ok=True)
+            return None
+
+    def restore(self, state) -> Future | None:
+        """Publish *state*'s saved tables as cached sections (in the background)."""
+        if not self.enabled:
+            return None
+        return self._pool.submit(self._restore, state)
+
+    def _restore(self, state) -> None:
+        folder = self.root / _safe(state.host)
+        for file in sorted(folder.glob("*.snap")):
+            if state.closed:
+                return
+            t0 = time.perf_counter()
+            loaded = self.load(file)
+            if loaded is None:
+                continue
+            meta, records = loaded
+            if meta.get("host") != state.host or not meta.get("path"):
+                continue
+            FormatNegotiator.remember_major(state.host, meta.get("ros_major", 0))
+            if meta.get("digest") and meta.get("command"):
+                state.digests.seed(state.host, meta["command"], bytes.fromhex(meta["digest"]))
+            try:
+                state.publish(meta["path"], records, meta.get("command", ""),
+                              cached_at=meta.get("saved", 0.0))
+            except RuntimeError:                            # store deleted meanwhile
+                return
+            append(f"SNAPSHOT restored {state.host} {meta['path']} "
+                   f"({len(records)} records, {time.perf_counter() - t0:.2f}s)")
+
+    # ------------------------------------------------------------ cleanup
+    def forget(self, host: str | None = None) -> None:
+        """Delete saved snapshots of *host* (all routers if None)."""
+        folders = [self.root / _safe(host)] if host is not None else list(self.root.glob("*"))
+        for folder in folders:
+            for file in folder.glob("*.snap"):
+                file.unlink(missing_ok=True)
+
+    def wait(self) -> None:
+        """Block until queued reads / writes are done."""
+        self._pool.submit(lambda: None).result()
+
+
+snapshot_cache = SnapshotCache()
+
+
+__all__ = ["SnapshotCache", "snapshot_cache", "CACHE_DIR"]
@@ -0,0 +1,352 @@
+# core/snapshot_history.py
+"""
+What the router's tables looked like over time – every published snapshot,
+per router and path, in one SQLite file.
+
+    snapshot_history.record(host, "/queue simple", records)     # background
+    snapshot_history.snapshots(host, "/queue simple")           # [(id, taken, count, full)]
+    snapshot_history.state_at(host, "/queue simple", when)      # records at time *when*
+
+Records are content-addressed: each distinct record is stored once under
+the hash of its canonical JSON, so a snapshot is just a set of hashes.
+Most snapshots are stored as a *delta* against the previous one (hashes
+added / removed); every ``keyframe_every``-th snapshot – or one that
+changed more than half the table – is a *full* keyframe, which bounds
+how many deltas ``state_at`` has to replay.
+
+Compaction runs on the same background thread every ``compact_every``
+snapshots: snapshots older than ``max_age`` are dropped, those older
+than ``keep_all`` are thinned to the last one per ``thin_to`` seconds
+(each dropped delta is merged into its successor), and records no
+snapshot refers to any more are deleted.  The latest snapshot of a table
+is always kept.
+
+Table order is not kept – ``state_at`` returns the records in no
+particular order.  Identical records in one table collapse into one.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import sqlite3
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Iterable, Mapping
+
+from .log import append
+from .snapshot_cache import CACHE_DIR
+
+HISTORY_DB = CACHE_DIR.parent / "history.sqlite3"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS records (
+    hash BLOB PRIMARY KEY,
+    body TEXT NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS snapshots (
+    id    INTEGER PRIMARY KEY,
+    host  TEXT    NOT NULL,
+    path  TEXT    NOT NULL,
+    taken REAL    NOT NULL,
+    full  INTEGER NOT NULL,
+    count INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS snapshots_by_table ON snapshots (host, path, taken);
+CREATE TABLE IF NOT EXISTS members (
+    snap  INTEGER NOT NULL,
+    hash  BLOB    NOT NULL,
+    added INTEGER NOT NULL,           -- 1 = in the table / added, 0 = removed
+    PRIMARY KEY (snap, hash)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS members_by_hash ON members (hash);
+"""
+
+Hashes = set[bytes]
+
+
+def _body(rec: Mapping[str, Any]) -> str:
+    return json.dumps(dict(rec), ensure_ascii=False, separators=(",", ":"))
+
+
+def _hash(body: str) -> bytes:
+    return hashlib.blake2b(body.encode("utf-8", "surrogatepass"), digest_size=16).digest()
+
+
+class SnapshotHistory:
+    """Content-addressed snapshot store; all SQLite work runs on one worker thread."""
+
+    def __init__(
+        self,
+        file: Path | str = HISTORY_DB,
+        *,
+        keyframe_every: int = 32,
+        compact_every: int = 64,
+        keep_all: float = 24 * 3600,
+        thin_to: float = 3600,
+        max_age: float = 30 * 24 * 3600,
+    ) -> None:
+        self.file           = Path(file)
+        self.keyframe_every = keyframe_every
+        self.compact_every  = compact_every
+        self.keep_all       = keep_all
+        self.thin_to        = thin_to
+        self.max_age        = max_age
+        self.enabled        = True
+        self._pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="snapshot-history")
+        self._db: sqlite3.Connection | None = None            # worker thread only
+        # (host, path) → (latest snapshot id, its hashes, deltas since the last keyframe)
+        self._last: dict[tuple[str, str], tuple[int, Hashes, int]] = {}
+        self._since_compact = 0
+
+    # ------------------------------------------------------------ plumbing
+    def _conn(self) -> sqlite3.Connection:
+        if self._db is None:
+            self.file.parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(self.file)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.executescript(_SCHEMA)
+        return self._db
+
+    def _call(self, fn, *args):
+        return self._pool.submit(fn, *args).result()
+
+    def close(self) -> None:
+        def _close():
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+            self._last.clear()
+        self._call(_close)
+
+    # ------------------------------------------------------------- writing
+    def record(self, host: str, path: str, records: Iterable[Mapping[str, Any]],
+               taken: float | None = None) -> Future | None:
+        """Store a complete snapshot of *path* (in the background)."""
+        if not self.enabled:
+            return None
+        records = tuple(records)
+        return self._pool.submit(self._record, host, path, records,
+                                 time.time() if taken is None else taken)
+
+    def _record(self, host: str, path: str, records: tuple, taken: float) -> int | None:
+        bodies: dict[bytes, str] = {}
+        for rec in records:
+            body = _body(rec)
+            bodies[_hash(body)] = body
+        current = set(bodies)
+
+        db = self._conn()
+        prev_id, prev, deltas = self._latest(db, host, path)
+        if prev_id is not None and current == prev:
+            return None                                      # nothing changed
+        added, removed = current - prev, prev - current
+        full = (prev_id is None or deltas + 1 >= self.keyframe_every
+                or len(added) + len(removed) > len(current) // 2)
+
+        with db:
+            db.executemany("INSERT OR IGNORE INTO records (hash, body) VALUES (?, ?)",
+                           ((h, bodies[h]) for h in (current if full else added)))
+            snap = db.execute(
+                "INSERT INTO snapshots (host, path, taken, full, count) VALUES (?, ?, ?, ?, ?)",
+                (host, path, taken, int(full), len(current)),
+            ).lastrowid
+            if full:
+                rows = ((snap, h, 1) for h in current)
+            else:
+                rows = [(snap, h, 1) for h in added] + [(snap, h, 0) for h in removed]
+            db.executemany("INSERT INTO members (snap, hash, added) VALUES (?, ?, ?)", rows)
+        self._last[host, path] = (snap, current, 0 if full else deltas + 1)
+        append(f"HISTORY {host} {path} #{snap} {'full' if full else 'delta'} "
+               f"+{len(added)} -{len(removed)} ({len(current)} records)")
+
+        self._since_compact += 1
+        if self._since_compact >= self.compact_every:
+            self._compact(time.time())
+        return snap
+
+    def _latest(self, db: sqlite3.Connection, host: str,
+                path: str) -> tuple[int | None, Hashes, int]:
+        cached = self._last.get((host, path))
+        if cached is not None:
+            return cached
+        row = db.execute(
+            "SELECT id FROM snapshots WHERE host = ? AND path = ? ORDER BY taken DESC, id DESC LIMIT 1",
+            (host, path),
+        ).fetchone()
+        if row is None:
+            return None, set(), 0
+        hashes, deltas = self._hashes_of(db, host, path, row[0])
+        self._last[host, path] = (row[0], hashes, deltas)
+        return row[0], hashes, deltas
+
+    # ------------------------------------------------------------- reading
+    def _chain(self, db: sqlite3.Connection, host: str, path: str, snap: int) -> list[tuple[int, int]]:
+        """(id, full) from the last keyframe up to *snap*, oldest first."""
+        rows = db.execute(
+            "SELECT id, full FROM snapshots WHERE host = ? AND path = ? AND id <= ? "
+            "ORDER BY id DESC",
+            (host, path, snap),
+        )
+        chain = []
+        for sid, full in rows:
+            chain.append((sid, full))
+            if full:
+                break
+        chain.reverse()
+        return chain
+
+    def _hashes_of(self, db: sqlite3.Connection, host: str, path: str,
+                   snap: int) -> tuple[Hashes, int]:
+        """Hashes in snapshot *snap* and the number of deltas replayed."""
+        hashes: Hashes = set()
+        chain = self._chain(db, host, path, snap)
+        for sid, full in chain:
+            rows = db.execute("SELECT hash, added FROM members WHERE snap = ?", (sid,))
+            if full:
+                hashes = {h for h, _ in rows}
+                continue
+            for h, added in rows:
+                if added:
+                    hashes.add(h)
+                else:
+                    hashes.discard(h)
+        return hashes, max(len(chain) - 1, 0)
+
+    def _bodies(self, db: sqlite3.Connection, hashes: Hashes) -> list[dict[str, Any]]:
+        db.execute("CREATE TEMP TABLE IF NOT EXISTS wanted (hash BLOB PRIMARY KEY) WITHOUT ROWID")
+        db.execute("DELETE FROM wanted")
+        db.executemany("INSERT INTO wanted (hash) VALUES (?)", ((h,) for h in hashes))
+        rows = db.execute("SELECT body FROM records JOIN wanted USING (hash)").fetchall()
+        db.execute("DELETE FROM wanted")
+        return [json.loads(body) for (body,) in rows]
+
+    def snapshots(self, host: str, path: str) -> list[tuple[int, float, int, bool]]:
+        """``(id, taken, record count, keyframe?)`` of every stored snapshot, oldest first."""
+        def run():
+            return [
+                (sid, taken, count, bool(full))
+                for sid, taken, count, full in self._conn().execute(
+                    "SELECT id, taken, count, full FROM snapshots "
+                    "WHERE host = ? AND path = ? ORDER BY taken, id",
+                    (host, path),
+                )
+            ]
+        return self._call(run)
+
+    def state_at(self, host: str, path: str, when: float) -> list[dict[str, Any]] | None:
+        """The records of *path* as last seen at or before *when* (None if never seen)."""
+        def run():
+            db = self._conn()
+            row = db.execute(
+                "SELECT id FROM snapshots WHERE host = ? AND path = ? AND taken <= ? "
+                "ORDER BY taken DESC, id DESC LIMIT 1",
+                (host, path, when),
+            ).fetchone()
+            if row is None:
+                return None
+            hashes, _ = self._hashes_of(db, host, path, row[0])
+            return self._bodies(db, hashes)
+        return self._call(run)
+
+    # ---------------------------------------------------------- compaction
+    def compact(self, now: float | None = None) -> Future:
+        """Thin out old snapshots and drop unreferenced records (in the background)."""
+        return self._pool.submit(self._compact, time.time() if now is None else now)
+
+    def _compact(self, now: float) -> int:
+        self._since_compact = 0
+        db = self._conn()
+        tables = db.execute("SELECT DISTINCT host, path FROM snapshots").fetchall()
+        dropped = 0
+        with db:
+            for host, path in tables:
+                snaps = db.execute(
+                    "SELECT id, taken FROM snapshots WHERE host = ? AND path = ? ORDER BY id",
+                    (host, path),
+                ).fetchall()
+                doomed = self._doomed(snaps, now)
+                for sid in doomed:
+                    self._drop(db, host, path, sid)
+                dropped += len(doomed)
+                if doomed:
+                    self._last.pop((host, path), None)
+            gone = db.execute(
+                "DELETE FROM records WHERE NOT EXISTS "
+                "(SELECT 1 FROM members WHERE members.hash = records.hash)"
+            ).rowcount
+        if dropped or gone:
+            append(f"HISTORY compacted: {dropped} snapshots, {gone} records dropped")
+        return dropped
+
+    def _doomed(self, snaps: list[tuple[int, float]], now: float) -> list[int]:
+        """Snapshots to drop: too old, or not the last of their thinning bucket."""
+        doomed = []
+        for i, (sid, taken) in enumerate(snaps[:-1]):          # the latest always stays
+            age = now - taken
+            if age > self.max_age:
+                doomed.append(sid)
+            elif age > self.keep_all:
+                nxt = snaps[i + 1][1]
+                if int(nxt // self.thin_to) == int(taken // self.thin_to):
+                    doomed.append(sid)                        # a later one covers the bucket
+        return doomed
+
+    def _drop(self, db: sqlite3.Connection, host: str, path: str, sid: int) -> None:
+        """Delete snapshot *sid*, folding its delta into the next snapshot."""
+        nxt = db.execute(
+            "SELECT id, full FROM snapshots WHERE host = ? AND path = ? AND id > ? "
+            "ORDER BY id LIMIT 1",
+            (host, path, sid),
+        ).fetchone()
+        if nxt is not None and not nxt[1]:
+            nid = nxt[0]
+            (full,) = db.execute("SELECT full FROM snapshots WHERE id = ?", (sid,)).fetchone()
+            if full:
+                # the successor becomes the keyframe
+                hashes, _ = self._hashes_of(db, host, path, nid)
+                db.execute("DELETE FROM members WHERE snap = ?", (nid,))
+                db.executemany("INSERT INTO members (snap, hash, added) VALUES (?, ?, 1)",
+                               ((nid, h) for h in hashes))
+                db.execute("UPDATE snapshots SET full = 1 WHERE id = ?", (nid,))
+            else:
+                a1, r1 = self._delta(db, sid)
+                a2, r2 = self._delta(db, nid)
+                added   = (a1 - r2) | (a2 - r1)
+                removed = (r1 - a2) | (r2 - a1)
+                db.execute("DELETE FROM members WHERE snap = ?", (nid,))
+                db.executemany(
+                    "INSERT INTO members (snap, hash, added) VALUES (?, ?, ?)",
+                    [(nid, h, 1) for h in added] + [(nid, h, 0) for h in removed],
+                )
+        db.execute("DELETE FROM members WHERE snap = ?", (sid,))
+        db.execute("DELETE FROM snapshots WHERE id = ?", (sid,))
+
+    @staticmethod
+    def _delta(db: sqlite3.Connection, sid: int) -> tuple[Hashes, Hashes]:
+        added: Hashes = set()
+        removed: Hashes = set()
+        for h, flag in db.execute("SELECT hash, added FROM members WHERE snap = ?", (sid,)):
+            (added if flag else removed).add(h)
+        return added, removed
+
+    # ---------------------------------------------------------------- info
+    def stats(self) -> str:
+        def run():
+            db = self._conn()
+            snaps, = db.execute("SELECT COUNT(*) FROM snapshots").fetchone()
+            recs,  = db.execute("SELECT COUNT(*) FROM records").fetchone()
+            mems,  = db.execute("SELECT COUNT(*) FROM members").fetchone()
+            return f"{snaps} snapshots, {recs} distinct records, {mems} members"
+        return self._call(run)
+
+    def wait(self) -> None:
+        """Block until queued work is done."""
+        self._call(lambda: None)
+
+
+snapshot_history = SnapshotHistory()
+
+
+__all__ = ["SnapshotHistory", "snapshot_history", "HISTORY_DB"]
@@ -0,0 +1,828 @@
+# core/state.py
+"""
+Per-router store of the latest table snapshots, shared by every page.
+
+Pages no longer own their fetches.  They register how one record turns
+into a display row, subscribe to a menu path and ask the store to refresh
+it; one refresh feeds every subscriber, and memory holds one copy of the
+records (display rows point at the same objects)::
+
+    state = router_state(client)
+    state.view("/queue simple", "queues", queue_row)      # built in the worker
+    unsubscribe = state.subscribe("/queue simple", on_change, on_batch=on_batch)
+    state.refresh("/queue simple")
+
+Every published snapshot (:class:`Section`) gets the next version number
+for its path.  Subscribers are called in the GUI thread:
+
+  * ``on_batch(rows, first)`` while a refresh streams in – *rows* maps
+    view name → display rows, *first* marks the start of a new table,
+  * ``on_change(section)`` once the complete snapshot is published (also
+    right away on subscribing, if the store already has one),
+  * ``on_error(text)`` when a refresh fails.
+
+Unchanged router output (same digest as last time) publishes nothing, so
+the version – and every view – stays as it is.  A new version carries
+``section.diff`` (utils.diff) against the one it replaced: the records
+added, removed and changed, keyed by ``.id`` – pages apply just those to
+their models and the log lists them.  A refresh works the new snapshot
+out in its worker, diff included; the GUI thread only swaps it in.  Anything else that reads
+a whole table (a wizard, a snapshot) can hand its records to
+:meth:`RouterState.publish` from any thread.
+
+Each snapshot also carries the secondary hash indexes of utils.index
+(queues by name / target, leases and ARP entries by address / MAC),
+filled in the worker while the table streams in.  Code that needs one
+record – from any thread – asks for a *fresh* snapshot first::
+
+    sec = fresh_section(client.host, "/ip dhcp-server lease")
+    lease = sec.find("address", ip) if sec is not None else None
+
+A snapshot stops being fresh when it is older than the path's read-cache
+TTL or when a write to its path went through a CachedClient since it was
+taken; callers then read from the router as before.
+
+Complete snapshots are also saved to disk (core.snapshot_cache).  On the
+next connect the saved tables come back as *cached* sections
+(``section.stale``) for pages to show at once; the store revalidates each
+one right away and never treats it as fresh.  Every changed snapshot is
+kept historically as well (core.snapshot_history) for "state at time T".
+
+A Refresh button always reads the whole table, and from the router:
+``refresh(path, fresh=True)`` drops the path's read-cache entries first,
+so a click within the cache TTL never gets a cached answer.  Background checks (a
+page coming into view) use :meth:`RouterState.revalidate`, which probes a
+table first (``:put [/queue simple find]`` – a few bytes per item – or
+``print count-only``) and skips the read of an unchanged table, or reads
+only the items that appeared (``print … from=*1A,*1B``).  A probe cannot
+see a ``set`` made outside this app, so it never stands in for a Refresh
+the user asked for.  A page that
+wrote to a table hands the result to :meth:`RouterState.write_through`:
+the rows change at once and only the items the write touched are read
+back to replace the page's guess.
+
+Snapshots of routers known to run RouterOS 7 are read with ``show-ids``,
+and any snapshot whose records carry ``.id`` feeds core.ids, so writes
+can address items as ``numbers=*1A`` instead of ``[find …]``.
+"""
+from __future__ import annotations
+
+import threading
+import time
+from typing import Any, Callable, Iterable, Sequence
+
+from PyQt6.QtCore import QObject, QThread, QTimer, pyqtSignal
+
+from utils.diff import NATURAL_KEYS, SnapshotDiff, diff_snapshots
+from utils.digest import OutputDigests
+from utils.index import IndexSet, build_indexes, new_indexes
+from utils.text import clean_field
+from .cache import _under, read_cache
+from .formats import FormatNegotiator
+from .ids import id_cache
+from .log import append
+from .snapshot_cache import snapshot_cache
+from .snapshot_history import snapshot_history
+from .taskrunner import CommandRunner, RecordStreamRunner
+
+#: command used by :meth:`RouterState.refresh` unless one is given
+DETAIL_COMMAND = "{path} print detail without-paging"
+#: the same on RouterOS 7, which can print each item's ``.id``
+DETAIL_IDS_COMMAND = DETAIL_COMMAND + " show-ids"
+#: cheap probes of :meth:`RouterState.revalidate` – the item ids in router
+#: order, or just the number of items when the snapshot has no ids
+PROBE_IDS_COMMAND   = ":put [{path} find]"
+PROBE_COUNT_COMMAND = "{path} print count-only"
+#: seconds after a full read that a probe may stand in for the next one –
+#: edits made outside this app change neither a table's ids nor its count
+PROBE_MAX_AGE = 300.0
+#: more new items than this and one full read beats reading them by id
+PROBE_MAX_NEW = 500
+
+Build = Callable[[Any], Any]
+
+
+class Section:
+    """One published snapshot of a menu path (treat as read-only)."""
+
+    __slots__ = ("path", "records", "version", "command", "fetched_at",
+                 "views", "indexes", "stamp", "cached_at", "diff")
+
+    def __init__(self, path: str, records: Sequence[Any], version: int,
+                 command: str = "", views: dict[str, list] | None = None,
+                 indexes: IndexSet | None = None, stamp: int = 0,
+                 cached_at: float | None = None, diff: SnapshotDiff | None = None) -> None:
+        self.path       = path
+        self.records    = tuple(records)
+        self.version    = version
+        self.command    = command
+        self.fetched_at = time.monotonic()
+        self.views      = views if views is not None else {}
+        self.indexes    = indexes if indexes is not None else build_indexes(path, self.records)
+        self.stamp      = stamp           # store's write count for the path when read
+        self.cached_at  = cached_at       # time.time() of a snapshot restored from disk
+        self.diff       = diff            # changes from the previous version, if there was one
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def __repr__(self) -> str:
+        return f"<Section {self.path} v{self.version} {len(self.records)} records>"
+
+    @property
+    def stale(self) -> bool:
+        """Restored from disk and not yet revalidated against the router."""
+        return self.cached_at is not None
+
+    @property
+    def age(self) -> float:
+        """Seconds since the snapshot was taken."""
+        return time.monotonic() - self.fetched_at
+
+    def find(self, index: str, key: str | None):
+        """First record filed under *key* in *index* (KeyError for unknown indexes)."""
+        return self.indexes[index].get(key)
+
+    def find_all(self, index: str, key: str | None) -> list:
+        return self.indexes[index].get_all(key)
+
+
+class _Subscriber:
+    __slots__ = ("on_change", "on_batch", "on_error")
+
+    def __init__(self, on_change, on_batch, on_error) -> None:
+        self.on_change = on_change
+        self.on_batch  = on_batch
+        self.on_error  = on_error
+
+
+class RouterState(QObject):
+    """Latest snapshot of each menu path of one router (create in the GUI thread)."""
+
+    changed = pyqtSignal(str, int)       # path, new version
+    failed  = pyqtSignal(str, str)       # path, error text
+
+    _published = pyqtSignal(str)         # any thread → _notify in the GUI thread
+
+    def __init__(self, host: str, client=None, parent=None) -> None:
+        super().__init__(parent)
+        self.host    = host
+        self.client  = client
+        self.digests = OutputDigests()
+        self._sections: dict[str, Section] = {}
+        self._versions: dict[str, int] = {}
+        self._views:    dict[str, dict[str, Build]] = {}
+        self._subs:     dict[str, list[_Subscriber]] = {}
+        self._runners:  dict[str, QThread] = {}       # refresh or probe per path
+        self._readbacks: set[QThread] = set()         # write_through reads, any path
+        self._queued:   set[str] = set()              # full refresh due once the runner is done
+        self._pending:  dict[str, int] = {}           # path → stamp when its refresh started
+        self._first:    set[str] = set()              # refreshes whose next batch starts a table
+        self._stamps:   dict[str, int] = {}          # path → writes seen so far
+        self.closed = False
+        self._lock = threading.Lock()
+        self._published.connect(self._notify)
+
+    def set_client(self, client) -> None:
+        self.client = client
+
+    # ------------------------------------------------------------- views
+    def view(self, path: str, name: str, build: Build) -> None:
+        """Register *build* (record → display row) as view *name* of *path*."""
+        with self._lock:
+            self._views.setdefault(path, {})[name] = build
+
+    def _build_views(self, path: str, records: Sequence[Any]) -> dict[str, list]:
+        with self._lock:
+            views = dict(self._views.get(path, {}))
+        return {name: [build(rec) for rec in records] for name, build in views.items()}
+
+    # ------------------------------------------------------------ reading
+    def section(self, path: str) -> Section | None:
+        with self._lock:
+            return self._sections.get(path)
+
+    def paths(self) -> list[str]:
+        """Menu paths that currently have a snapshot."""
+        with self._lock:
+            return list(self._sections)
+
+    def records(self, path: str) -> tuple:
+        sec = self.section(path)
+        return sec.records if sec is not None else ()
+
+    def version(self, path: str) -> int:
+        with self._lock:
+            return self._versions.get(path, 0)
+
+    def rows(self, path: str, name: str) -> list:
+        """Rows of view *name*, built now if the snapshot predates the view."""
+        sec = self.section(path)
+        if sec is None:
+            return []
+        if name not in sec.views:
+            with self._lock:
+                build = self._views[path][name]
+            sec.views[name] = [build(rec) for rec in sec.records]
+        return sec.views[name]
+
+    # ----------------------------------------------------------- writing
+    def publish(self, path: str, records: Iterable[Any], command: str = "",
+                views: dict[str, list] | None = None, indexes: IndexSet | None = None,
+                stamp: int | None = None, cached_at: float | None = None) -> Section | None:
+        """
+        Store a complete snapshot of *path*; safe to call from any thread.
+        *stamp* is :meth:`stamp` from before the read – if a write to the
+        path happened since, the snapshot is published but never fresh.
+        *cached_at* marks a snapshot restored from disk; it is dropped
+        (None returned) when the path already has a snapshot.
+        """
+        if cached_at is not None and self.section(path) is not None:
+            return None
+        sec, prev = self._snapshot(path, records, command, views, indexes, cached_at)
+        return self._install(sec, prev, stamp)
+
+    def _snapshot(self, path: str, records: Iterable[Any], command: str = "",
+                  views: dict[str, list] | None = None, indexes: IndexSet | None = None,
+                  cached_at: float | None = None) -> tuple[Section, Section | None]:
+        """
+        The costly half of :meth:`publish` – views, indexes and the diff
+        against the current snapshot, which is returned alongside – so a
+        worker can do it; :meth:`_install` then only swaps the section in.
+        """
+        records = tuple(records)
+        if views is None:
+            views = self._build_views(path, records)
+        if indexes is None:
+            indexes = build_indexes(path, records)
+        prev = self.section(path)
+        diff = None
+        if prev is not None and cached_at is None:
+            diff = diff_snapshots(prev.records, records, path, base=prev.version)
+        return Section(path, records, 0, command, views, indexes,
+                       cached_at=cached_at, diff=diff), prev
+
+    def _install(self, sec: Section, prev: Section | None, stamp: int | None) -> Section | None:
+        path, records = sec.path, sec.records
+        with self._lock:
+            current = self._stamps.setdefault(path, 0)
+            if sec.stale and path in self._sections:
+                return None                       # a live read got there first
+            if sec.diff is not None and self._sections.get(path) is not prev:
+                sec.diff = None                   # raced another publish
+            version = self._versions.get(path, 0) + 1
+            self._versions[path] = sec.version = version
+            sec.stamp = current if stamp is None else stamp
+            self._sections[path] = sec
+        if not sec.stale:
+            if sec.indexes and stamp in (None, current) and records and ".id" in records[0]:
+                id_cache.learn(self.host, path, indexes=sec.indexes)
+            snapshot_cache.save(self.host, sec, self.digests.get(self.host, sec.command),
+                                FormatNegotiator.known_major(self.host))
+            if sec.command:                       # whole-table reads only
+                snapshot_history.record(self.host, path, records)
+        _log_diff(f"STATE {self.host} {path} v{version} ({len(records)} records", sec.diff)
+        self._published.emit(path)
+        return sec
+
+    def patch(self, path: str, changes: Iterable[tuple[Any, Any]],
+              stamp: int | None = None) -> Section | None:
+        """
+        Publish the current snapshot of *path* with a few records changed,
+        without re-reading the table: *changes* are ``(old, new)`` pairs –
+        ``old`` None adds ``new``, ``new`` None removes ``old`` (matched by
+        identity).  Only the changed rows are rebuilt; None if there is no
+        snapshot or a refresh replaced it meanwhile.  *stamp* re-confirms
+        the result as current up to that write count.  Safe from any thread.
+        """
+        with self._lock:
+            sec = self._sections.get(path)
+            builds = dict(self._views.get(path, {}))
+        if sec is None:
+            return None
+        pos = {id(rec): i for i, rec in enumerate(sec.records)}
+        records = list(sec.records)
+        indexes = sec.indexes.copy()              # the live section is not touched
+
+        views = {name: list(rows) for name, rows in sec.views.items()}
+        doomed: list[int] = []
+        for old, new in changes:
+            i = pos.get(id(old)) if old is not None else None
+            if old is not None and i is None:
+                continue                              # not in this snapshot
+            if i is not None:
+                indexes.remove(old)
+            if new is None:
+                if i is not None:
+                    doomed.append(i)
+                continue
+            indexes.add(new)
+            if i is None:
+                records.append(new)
+                for name, rows in views.items():
+                    rows.append(builds[name](new))
+            else:
+                records[i] = new
+                for name, rows in views.items():
+                    rows[i] = builds[name](new)
+        for i in sorted(doomed, reverse=True):
+            del records[i]
+            for rows in views.values():
+                del rows[i]
+
+        diff = diff_snapshots(sec.records, records, path, base=sec.version)
+        with self._lock:
+            if self._sections.get(path) is not sec:
+                return None
+            version = self._versions[path] = self._versions.get(path, 0) + 1
+            patched = self._sections[path] = Section(
+                path, records, version, sec.command, views, indexes,
+                sec.stamp if stamp is None else stamp, sec.cached_at, diff,
+            )
+            patched.fetched_at = sec.fetched_at   # only a full read makes a table younger
+        id_cache.replace(self.host, path, sec.indexes, indexes)
+        # the router's output no longer matches what the digest was taken of
+        self.digests.forget(self.host, sec.command)
+        _log_diff(f"STATE {self.host} {path} v{version} patched ({len(records)} records", diff)
+        self._published.emit(path)
+        return patched
+
+    def write_through(self, path: str, changes: Iterable[tuple[Any, Any]] = (), *,
+                      since: int | None = None,
+                      match: Sequence[dict[str, str]] | None = None) -> bool:
+        """
+        Apply a write the router accepted without re-reading the table:
+        *changes* (as for :meth:`patch`) are shown right away, then only the
+        items the write touched are read back and replace them – by ``.id``
+        (``print … from=*1A``) or by the path's natural key (``where
+        name="…"``).  *match* names those items as ``{field: value}``
+        conditions instead, for writes whose result the caller cannot guess
+        (records already shown that match are replaced by what the router
+        returns).  *since* is :meth:`stamp` from just before the caller's
+        writes: the snapshot stays fresh if nothing else wrote meanwhile.
+
+        False if there is no snapshot yet or the items cannot be named (then
+        a full refresh runs – or is queued behind the one running).  A full
+        read already running started before the write, so another one is
+        queued behind it.
+        """
+        if self.client is None:
+            return False
+        before = self.section(path)
+        if before is None:
+            self.refresh(path, queue=True)
+            return False
+        if path in self._pending:
+            self.refresh(path, queue=True)        # would publish the table from before the write
+        changes = list(changes)
+        if changes:
+            self.patch(path, changes)
+        confirm = since is not None and before.stamp == since
+        if match is None:
+            match = _conditions(path, [new for _old, new in changes if new is not None])
+        if match is None or len(match) > PROBE_MAX_NEW:
+            self.refresh(path, queue=True)
+            return False
+        stamp = self.stamp(path)
+        if not match:                             # removals only – the router confirmed them
+            self._confirm(path, since if confirm else None, stamp)
+            return True
+        reader = RecordStreamRunner(self.client, self._readback_command(path, match),
+                                    path, parent=self)
+        got: list = []
+        failed: list[str] = []
+        reader.batchReady.connect(got.extend)
+        reader.failed.connect(failed.append)
+        reader.finished.connect(
+            lambda _c, _n: self._on_read_back(path, reader, match, got, failed,
+                                              since if confirm else None, stamp)
+        )
+        self._readbacks.add(reader)
+        reader.start()
+        return True
+
+    def _readback_command(self, path: str, match: Sequence[dict[str, str]]) -> str:
+        if all(list(cond) == [".id"] for cond in match):
+            return f"{self.detail_command(path)} from={','.join(c['.id'] for c in match)}"
+        terms = (" and ".join(f'{f}="{_escape(v)}"' for f, v in cond.items()) for cond in match)
+        return f"{self.detail_command(path)} where " + " or ".join(f"({t})" for t in terms)
+
+    def _on_read_back(self, path: str, reader: RecordStreamRunner,
+                      match: Sequence[dict[str, str]], got: list, failed: list[str],
+                      since: int | None, stamp: int) -> None:
+        self._readbacks.discard(reader)
+        reader.deleteLater()
+        if self.closed:
+            return
+        if failed:
+            self.refresh(path, queue=True)        # the full read settles it
+            return
+        sec = self.section(path)
+        if sec is None:
+            return
+        shown = [rec for rec in sec.records if _matches(rec, match)]
+        changes = _pair(path, shown, got)
+        if self.stamp(path) != stamp:
+            since = None                          # another write raced the read-back
+        if changes:
+            append(f"READBACK {self.host} {path} {len(got)} items, {len(changes)} corrected")
+            self.patch(path, changes, stamp=stamp if self._current(sec, since, stamp) else None)
+        else:
+            self._confirm(path, since, stamp)
+
+    def _current(self, sec: Section, since: int | None, stamp: int) -> bool:
+        # the rest of the table was current before the caller's writes (or read after them)
+        return since is not None and sec.stamp in (since, stamp)
+
+    def _confirm(self, path: str, since: int | None, stamp: int) -> None:
+        sec = self.section(path)
+        if sec is not None and self.stamp(path) == stamp and self._current(sec, since, stamp):
+            sec.stamp = stamp                     # fresh again – fetched_at stays as it was
+
+    # ---------------------------------------------------------- freshness
+    def stamp(self, path: str) -> int:
+        with self._lock:
+            return self._stamps.setdefault(path, 0)
+
+    def fresh(self, path: str, max_age: float | None = None) -> Section | None:
+        """The snapshot of *path* if no write hit it and it is young enough."""
+        limit = read_cache.ttl_for(path) if max_age is None else max_age
+        with self._lock:
+            sec = self._sections.get(path)
+            if sec is None or sec.stale or sec.stamp != self._stamps.get(path, 0):
+                return None
+        return sec if sec.age <= limit else None
+
+    def _on_invalidate(self, host: str, path: str | None, _command: str | None = None) -> None:
+        # ReadCache listener – runs in whichever thread issued the write
+        if host != self.host:
+            return
+        with self._lock:
+            for p in self._stamps:
+                if path is None or _under(p, path):
+                    self._stamps[p] += 1
+
+    def forget(self, path: str | None = None) -> None:
+        """Drop a snapshot (or all); the next refresh publishes even if unchanged."""
+        with self._lock:
+            paths = [path] if path is not None else list(self._sections)
+            for p in paths:
+                self._sections.pop(p, None)
+        for p in paths:
+            self.digests.forget(self.host, DETAIL_COMMAND.format(path=p))
+            self.digests.forget(self.host, DETAIL_IDS_COMMAND.format(path=p))
+
+    # ---------------------------------------------------------- subscribe
+    def subscribe(
+        self,
+        path: str,
+        on_change: Callable[[Section], None],
+        *,
+        on_batch: Callable[[dict[str, list], bool], None] | None = None,
+        on_error: Callable[[str], None] | None = None,
+    ) -> Callable[[], None]:
+        """Call *on_change* for every new snapshot of *path*; returns an unsubscribe callable."""
+        sub = _Subscriber(on_change, on_batch, on_error)
+        self._subs.setdefault(path, []).append(sub)
+        sec = self.section(path)
+        if sec is not None:
+            on_change(sec)
+
+        def unsubscribe() -> None:
+            subs = self._subs.get(path, [])
+            if sub in subs:
+                subs.remove(sub)
+        return unsubscribe
+
+    def _notify(self, path: str) -> None:
+        sec = self.section(path)
+        if sec is None:
+            return
+        for sub in list(self._subs.get(path, ())):
+            sub.on_change(sec)
+        self.changed.emit(path, sec.version)
+        if sec.stale and not self.refreshing(path):
+            self.refresh(path)                    # revalidate a restored table
+
+    # ------------------------------------------------------------ refresh
+    def refreshing(self, path: str) -> bool:
+        runner = self._runners.get(path)
+        return runner is not None and runner.isRunning()
+
+    def detail_command(self, path: str) -> str:
+        """Default refresh command – with ``show-ids`` once the router is known to be v7+."""
+        if FormatNegotiator.known_major(self.host) >= 7:
+            return DETAIL_IDS_COMMAND.format(path=path)
+        return DETAIL_COMMAND.format(path=path)
+
+    def refresh(self, path: str, command: str | None = None, *, queue: bool = False,
+                fresh: bool = False) -> bool:
+        """
+        Start a background full read of *path*; False if one is running or
+        no client.  With *queue* a busy path is read again once its current
+        runner is done – unless that is a full read started after the last
+        write already.  With *fresh* (a Refresh the user asked for) the
+        read-cache entries of *path* are dropped first; that also makes a
+        running read outdated, so with *queue* another one follows it.
+        """
+        if self.client is None:
+            return False
+        if fresh:
+            read_cache.invalidate(self.host, path)
+        if self.refreshing(path):
+            if not queue:
+                return False
+            pending = self._pending.get(path)
+            if pending is None or pending != self.stamp(path):
+                self._queued.add(path)
+            return True
+        with self._lock:
+            names  = tuple(self._views.get(path, {}))
+            builds = tuple(self._views.get(path, {}).values())
+
+        # the snapshot is put together in the worker; batches only carry rows
+        records: list = []
+        views = {name: [] for name in names}
+        columns = tuple(views.values())
+        indexes = new_indexes(path)
+
+        def build(rec):                        # runs in the worker
+            records.append(rec)
+            if indexes:
+                indexes.add(rec)
+            rows = tuple(b(rec) for b in builds)
+            for col, row in zip(columns, rows):
+                col.append(row)
+            return rows
+
+        cmd = command or self.detail_command(path)
+
+        def complete():                        # also in the worker, after the last record
+            return self._snapshot(path, records, cmd, views, indexes)
+
+        runner = RecordStreamRunner(
+            self.client, cmd, path, digests=self.digests, build=build,
+            complete=complete, parent=self,
+        )
+        self._pending[path] = self.stamp(path)
+        self._first.add(path)
+        runner.batchReady.connect(lambda batch: self._on_batch(path, names, batch))
+        runner.failed.connect(lambda err: self._on_failed(path, err))
+        runner.finished.connect(lambda _c, _n: self._on_finished(path, runner))
+        self._runners[path] = runner
+        runner.start()
+        return True
+
+    def revalidate(self, path: str) -> bool:
+        """
+        Background refresh of *path*, only as far as needed: probe the item
+        ids (or the item count) first; an unchanged table is not read again, items
+        that only came and went are read / dropped one by one.  A full
+        refresh runs when the snapshot is missing, restored from disk,
+        written to since, or older than ``PROBE_MAX_AGE``.
+        """
+        if self.client is None or self.refreshing(path):
+            return False
+        sec = self.section(path)
+        stamp = self.stamp(path)
+        if (sec is None or sec.stale or not sec.command or sec.stamp != stamp
+                or sec.age > PROBE_MAX_AGE):
+            return self.refresh(path)
+        ids = bool(sec.records) and ".id" in sec.records[0]
+        cmd = (PROBE_IDS_COMMAND if ids else PROBE_COUNT_COMMAND).format(path=path)
+        runner = CommandRunner(self.client, cmd, parent=self)
+        runner.finished.connect(
+            lambda _c, lines: self._on_probed(path, runner, sec, stamp, ids, lines)
+        )
+        self._runners[path] = runner
+        runner.start()
+        return True
+
+    def _on_probed(self, path: str, runner: CommandRunner, sec: Section, stamp: int,
+                   ids: bool, lines: list[str]) -> None:
+        self._release(path, runner)
+        if self.closed:
+            return
+        text = " ".join(lines).strip()
+        if (self.section(path) is not sec or self.stamp(path) != stamp
+                or text.startswith("ERROR:")):
+            self.refresh(path)                    # raced a write / the probe failed
+            return
+        if not ids:
+            if text.isdigit() and int(text) == len(sec):
+                append(f"PROBE {self.host} {path} unchanged ({text} items)")
+            else:
+                self.refresh(path)
+            return
+
+        now = [i for i in text.split(";") if i.startswith("*")]
+        had = [rec.get(".id") for rec in sec.records]
+        if now == had:
+            append(f"PROBE {self.host} {path} unchanged ({len(now)} ids)")
+            return
+        known, present = set(had), set(now)
+        new = [i for i in now if i not in known]
+        kept = now[:len(now) - len(new)]
+        # only the simple case is patched: survivors in the same order, new items at the end
+        if (len(new) > PROBE_MAX_NEW or kept != [i for i in had if i in present]
+                or any(i not in known for i in kept)):
+            self.refresh(path)
+            return
+        gone = [(rec, None) for rec in sec.records if rec.get(".id") not in present]
+        append(f"PROBE {self.host} {path} +{len(new)} -{len(gone)} ids")
+        if not new:
+            self.patch(path, gone)
+            return
+        cmd = f"{self.detail_command(path)} from={','.join(new)}"
+        reader = RecordStreamRunner(self.client, cmd, path, parent=self)
+        added: list = []
+        reader.batchReady.connect(added.extend)
+        reader.failed.connect(lambda _err: added.clear())
+        reader.finished.connect(
+            lambda _c, _n: self._on_partial(path, reader, sec, stamp, gone, new, added)
+        )
+        self._runners[path] = reader
+        reader.start()
+
+    def _on_partial(self, path: str, reader: RecordStreamRunner, sec: Section, stamp: int,
+                    gone: list, new: list[str], added: list) -> None:
+        self._release(path, reader)
+        if self.closed:
+            return
+        if (self.section(path) is not sec or self.stamp(path) != stamp
+                or [rec.get(".id") for rec in added] != new):
+            self.refresh(path)                    # raced a write, or an item went meanwhile
+            return
+        self.patch(path, gone + [(None, rec) for rec in added])
+
+    def _release(self, path: str, runner: QThread) -> None:
+        if self._runners.get(path) is runner:
+            del self._runners[path]
+        runner.deleteLater()
+        if path in self._queued:
+            # after the finishing handler – it may start a read of its own
+            QTimer.singleShot(0, lambda: self._run_queued(path))
+
+    def _run_queued(self, path: str) -> None:
+        if not self.closed and path in self._queued:
+            self._queued.discard(path)
+            self.refresh(path, queue=True)        # re-queued only if still needed
+
+    def _on_batch(self, path: str, names: tuple[str, ...], batch: list) -> None:
+        first = path in self._first
+        self._first.discard(path)
+        rows = {name: list(col) for name, col in zip(names, zip(*batch))}
+        sec = self.section(path)
+        if sec is not None and sec.stale:
+            return                 # keep showing the cached table until the new one is whole
+        for sub in list(self._subs.get(path, ())):
+            if sub.on_batch is not None:
+                sub.on_batch(rows, first)
+
+    def _on_failed(self, path: str, err: str) -> None:
+        self._pending.pop(path, None)
+        self._first.discard(path)
+        for sub in list(self._subs.get(path, ())):
+            if sub.on_error is not None:
+                sub.on_error(err)
+        self.failed.emit(path, err)
+
+    def _on_finished(self, path: str, runner: RecordStreamRunner) -> None:
+        self._release(path, runner)
+        stamp = self._pending.pop(path, None)
+        self._first.discard(path)
+        if stamp is None:
+            return
+        if runner.output_unchanged:
+            sec = self.section(path)
+            if sec is not None and stamp == self.stamp(path):
+                sec.stamp, sec.fetched_at = stamp, time.monotonic()   # re-confirmed
+                if sec.records and ".id" in sec.records[0] and not id_cache.known(self.host, path):
+                    id_cache.learn(self.host, path, indexes=sec.indexes)
+                if sec.stale:                     # the cached table is still current
+                    sec.cached_at = None
+                    self._notify(path)
+            elif sec is not None and sec.stale:
+                self.refresh(path)                # a write raced the revalidation
+            return
+        if runner.result is not None:             # built in the worker, only swapped in here
+            self._install(*runner.result, stamp)
+
+    def stop(self) -> None:
+        """Wait for running refreshes (call before the store goes away)."""
+        self.closed = True
+        for runner in [*self._runners.values(), *self._readbacks]:
+            runner.wait()
+        self._runners.clear()
+        self._readbacks.clear()
+        self._queued.clear()
+
+
+def _log_diff(head: str, diff: SnapshotDiff | None, limit: int = 10) -> None:
+    # small changes are listed item by item – the audit trail of what the router did
+    if diff is None:
+        append(head + ")")
+        return
+    append(f"{head}, {diff.summary()})")
+    if diff and len(diff) <= limit:
+        for line in diff.report(limit=limit):
+            append(f"    {line}")
+
+
+# ─────────────────────────────────────────────────────────────── read-back
+def _conditions(path: str, records: Sequence[Any]) -> list[dict[str, str]] | None:
+    """Read-back conditions for *records*: their ``.id``s, else natural keys."""
+    if all(rec.get(".id") for rec in records):
+        return [{".id": rec[".id"]} for rec in records]
+    fields = NATURAL_KEYS.get(path)
+    if not fields:
+        return None
+    match = []
+    for rec in records:
+        cond = {f: clean_field(rec.get(f)) for f in fields if clean_field(rec.get(f))}
+        if not cond:
+            return None
+        match.append(cond)
+    return match
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"')
+
+
+def _matches(rec: Any, match: Sequence[dict[str, str]]) -> bool:
+    return any(all(clean_field(rec.get(f)) == clean_field(v) for f, v in cond.items())
+               for cond in match)
+
+
+def _pair(path: str, shown: list, got: list) -> list[tuple[Any, Any]]:
+    """:meth:`RouterState.patch` changes that turn the *shown* records into *got*."""
+    fields = NATURAL_KEYS.get(path, ("name",))
+    by_id = {rec.get(".id"): rec for rec in shown if rec.get(".id")}
+    by_key: dict[tuple, list] = {}
+    for rec in shown:
+        by_key.setdefault(tuple(rec.get(f) for f in fields), []).append(rec)
+    used: set[int] = set()
+    changes = []
+    for new in got:
+        old = by_id.get(new.get(".id"))
+        if old is None or id(old) in used:
+            old = next((r for r in by_key.get(tuple(new.get(f) for f in fields), ())
+                        if id(r) not in used and not (r.get(".id") and new.get(".id"))), None)
+        if old is not None:
+            used.add(id(old))
+            if type(old) is type(new) and old == new:
+                continue                          # the guess may be a plain dict – take the router's
+        changes.append((old, new))
+    changes += [(rec, None) for rec in shown if id(rec) not in used]
+    return changes
+
+
+# ─────────────────────────────────────────────────────────────── registry
+_states: dict[str, RouterState] = {}
+
+
+def router_state(client) -> RouterState:
+    """The store for *client*'s router (created on first use, GUI thread only)."""
+    host = client.host
+    state = _states.get(host)
+    if state is None:
+        state = _states[host] = RouterState(host, client)
+        read_cache.add_listener(state._on_invalidate)
+        # after the pages registered their views (they subscribe right after this)
+        QTimer.singleShot(0, lambda: snapshot_cache.restore(state))
+    else:
+        state.set_client(client)
+    return state
+
+
+def find_router_state(host: str) -> RouterState | None:
+    """The existing store for *host*, if any (safe from any thread)."""
+    return _states.get(host)
+
+
+def router_states() -> list[RouterState]:
+    """Every open store."""
+    return list(_states.values())
+
+
+def fresh_section(host: str, path: str, max_age: float | None = None) -> Section | None:
+    """Fresh snapshot of *path* on *host* (see :meth:`RouterState.fresh`), or None."""
+    state = _states.get(host)
+    return state.fresh(path, max_age) if state is not None else None
+
+
+def drop_router_states() -> None:
+    """Stop and forget every store (on disconnect)."""
+    for state in _states.values():
+        read_cache.remove_listener(state._on_invalidate)
+        state.stop()
+        state.deleteLater()
+    _states.clear()
+
+
+__all__ = [
+    "RouterState", "Section", "router_state", "find_router_state", "router_states",
+    "fresh_section",
+    "drop_router_states", "DETAIL_COMMAND", "DETAIL_IDS_COMMAND",
+]
@@ -0,0 +1,292 @@
+# core/syslog.py
+"""
+Event-driven table updates from RouterOS remote logging.
+
+Point the router's logging at this machine::
+
+    /system logging action add name=inmm target=remote remote=<this PC> remote-port=5514
+    /system logging add topics=dhcp action=inmm
+    /system logging add topics=interface action=inmm
+    /system logging add topics=system,info action=inmm
+
+and start a receiver next to the router stores::
+
+    live = LiveUpdates(SyslogReceiver(port=5514), aliases={"10.9.0.1": "10.0.0.1"})
+    live.start()
+
+Syslog is unauthenticated UDP, so only datagrams from a managed router's
+address (or an alias configured for it – a router may log from another
+interface) are read; everything else is dropped by the receiver unparsed.
+The port is off (0) until the user sets remote logging up.
+
+:class:`SyslogReceiver` reads datagrams on a plain Python thread, parses
+them (utils.syslog) and hands them to the GUI thread in batches of up to
+``batch_max`` events or ``batch_ms`` milliseconds, so thousands of lines
+a second cost one signal per batch.  :class:`LiveUpdates` applies each
+batch to the router's store (core.state):
+
+* DHCP assign / deassign patch the lease in place (``RouterState.patch``)
+  – status, active MAC / address, host name; dynamic leases come and go –
+  and mark ARP entries and simple queues (DHCP rate-limit queues) stale,
+* interface link up / down marks ``/interface`` and ``/ip arp`` stale,
+* "… changed by …" config lines mark the changed menu stale.
+
+Stale means the read cache drops the path (so the store's snapshot stops
+being fresh and learned ids are forgotten) and, when the store holds a
+snapshot of it, one debounced refresh runs ``refresh_ms`` later – however
+many lines arrived meanwhile.
+"""
+from __future__ import annotations
+
+import socket
+import threading
+import time
+from typing import Any
+
+from PyQt6.QtCore import QObject, QTimer, pyqtSignal
+
+from utils.flag_decoder import flag_mask
+from utils.index import norm_ip
+from utils.syslog import LogEvent, parse_datagram
+from .cache import _under, classify, read_cache
+from .log import append
+from .state import RouterState, find_router_state, router_states
+
+DEFAULT_PORT = 5514            # suggested in the setup above; the setting defaults to off
+
+LEASES = "/ip dhcp-server lease"
+QUEUES = "/queue simple"
+ARP    = "/ip arp"
+IFACES = "/interface"
+
+_DYNAMIC = flag_mask(LEASES, "dynamic")
+
+
+# ──────────────────────────────────────────────────────────────── receiver
+class SyslogReceiver(QObject):
+    """
+    UDP syslog listener; ``received`` carries ``[(source ip, LogEvent), …]``.
+    Only datagrams from the addresses in :attr:`sources` are parsed.
+    """
+
+    received = pyqtSignal(list)
+
+    def __init__(self, port: int = DEFAULT_PORT, bind: str = "0.0.0.0", *,
+                 batch_ms: int = 100, batch_max: int = 1000, parent=None) -> None:
+        super().__init__(parent)
+        self.port      = port
+        self.bind      = bind
+        self.batch_ms  = batch_ms
+        self.batch_max = batch_max
+        self.sources: frozenset[str] = frozenset()   # replaced whole, read by the thread
+        self.datagrams = 0
+        self.dropped   = 0
+        self.events    = 0
+        self._sock: socket.socket | None = None
+        self._thread: threading.Thread | None = None
+        self._stop = threading.Event()
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> bool:
+        """Bind and start listening; False (logged) if the port is unavailable."""
+        if self.running:
+            return True
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        try:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4 * 1024 * 1024)
+            sock.bind((self.bind, self.port))
+        except OSError as exc:
+            sock.close()
+            append(f"SYSLOG cannot listen on {self.bind}:{self.port}: {exc}")
+            return False
+        sock.settimeout(self.batch_ms / 1000)
+        self.port = sock.getsockname()[1]                 # port 0 → the one picked
+        self._sock = sock
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._serve, name="syslog", daemon=True)
+        self._thread.start()
+        append(f"SYSLOG listening on {self.bind}:{self.port}")
+        return True
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if self._sock is not None:
+            self._sock.close()
+            self._sock = None
+
+    def _serve(self) -> None:
+        batch: list[tuple[str, LogEvent]] = []
+        flush_at = time.monotonic() + self.batch_ms / 1000
+        while not self._stop.is_set():
+            try:
+                data, (src, _port) = self._sock.recvfrom(65535)
+            except socket.timeout:
+                data = None
+            except OSError:
+                break
+            if data and src not in self.sources:
+                self.dropped += 1
+                data = None
+            if data:
+                self.datagrams += 1
+                event = parse_datagram(data)
+                if event.kind != "other":
+                    batch.append((src, event))
+            now = time.monotonic()
+            if batch and (len(batch) >= self.batch_max or now >= flush_at):
+                self.events += len(batch)
+                self.received.emit(batch)
+                batch = []
+            if now >= flush_at:
+                flush_at = now + self.batch_ms / 1000
+        if batch:
+            self.events += len(batch)
+            self.received.emit(batch)
+
+
+# ──────────────────────────────────────────────────────────────── applying
+def lease_change(sec, fields: dict[str, Any]) -> tuple[Any, Any] | None:
+    """``(old, new)`` lease records for a DHCP event, or None if nothing to patch."""
+    ip = fields["ip"]
+    old = sec.find("address", ip)
+    dynamic = old is None or bool(old.get("_mask", 0) & _DYNAMIC)
+    if not fields["assigned"]:
+        if old is None:
+            return None
+        if dynamic:
+            return old, None                              # dynamic leases just go
+        new = {k: v for k, v in old.items()
+               if k not in ("active-address", "active-mac-address", "host-name")}
+        new["status"] = "waiting"
+        return old, new
+
+    new = dict(old) if old is not None else {
+        "address": ip, "server": fields["server"], "_flags": "D", "_mask": _DYNAMIC,
+    }
+    new.update({
+        "status":             "bound",
+        "active-address":     ip,
+        "active-mac-address": fields["mac"],
+    })
+    if dynamic:
+        new["mac-address"] = fields["mac"]
+    if fields["host_name"]:
+        new["host-name"] = fields["host_name"]
+    return old, new
+
+
+class LiveUpdates(QObject):
+    """Applies syslog events to the router stores (GUI thread)."""
+
+    applied = pyqtSignal(int)                     # events handled in the last batch
+
+    def __init__(self, receiver: SyslogReceiver, *, refresh_ms: int = 300,
+                 aliases: dict[str, str] | None = None, parent=None) -> None:
+        super().__init__(parent)
+        self.receiver   = receiver
+        self.refresh_ms = refresh_ms
+        self.aliases: dict[str, str] = dict(aliases or {})   # extra source ip → store host
+        self._sources: dict[str, str] = {}                    # accepted source ip → store host
+        self._due: set[tuple[str, str | None]] = set()
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self._refresh_due)
+        receiver.received.connect(self.apply)
+
+    def start(self) -> bool:
+        """Listen for the routers that have a store now (and their aliases)."""
+        sources = dict(self.aliases)
+        for state in router_states():
+            try:
+                sources[socket.gethostbyname(state.host)] = state.host
+            except OSError as exc:
+                append(f"SYSLOG cannot resolve {state.host}: {exc}")
+        self._sources = sources
+        self.receiver.sources = frozenset(sources)
+        return self.receiver.start()
+
+    def stop(self) -> None:
+        self.receiver.stop()
+        self._timer.stop()
+        self._due.clear()
+
+    # ------------------------------------------------------------ routing
+    def _state_for(self, src: str) -> RouterState | None:
+        host = self._sources.get(src)
+        return find_router_state(host) if host is not None else None
+
+    def apply(self, batch: list) -> None:
+        leases: dict[RouterState, dict[str, tuple[Any, Any]]] = {}
+        handled = 0
+        for src, event in batch:
+            state = self._state_for(src)
+            if state is None:
+                continue
+            handled += 1
+            f = event.fields
+            if event.kind == "dhcp":
+                sec = state.section(LEASES)
+                if sec is None:
+                    self._stale(state, LEASES)
+                else:
+                    # several events for one lease in a batch: keep the first old, last new
+                    pending = leases.setdefault(state, {})
+                    key = norm_ip(f["ip"])
+                    change = lease_change(_Pending(sec, pending), f)
+                    if change is not None:
+                        first_old = pending[key][0] if key in pending else change[0]
+                        pending[key] = (first_old, change[1])
+                self._stale(state, ARP)
+                self._stale(state, QUEUES)
+            elif event.kind == "link":
+                self._stale(state, IFACES)
+                self._stale(state, ARP)
+            elif event.kind == "config":
+                path = classify(f["command"])[1] if f["command"] else f["path"]
+                self._stale(state, path)
+
+        for state, pending in leases.items():
+            changes = [c for c in pending.values() if c[0] is not c[1]]
+            read_cache.invalidate(state.host, LEASES)
+            if state.patch(LEASES, changes) is None:
+                self._stale(state, LEASES)
+        if self._due and not self._timer.isActive():
+            self._timer.start(self.refresh_ms)
+        if handled:
+            self.applied.emit(handled)
+
+    def _stale(self, state: RouterState, path: str | None) -> None:
+        read_cache.invalidate(state.host, path)
+        self._due.add((state.host, path))
+
+    def _refresh_due(self) -> None:
+        due, self._due = self._due, set()
+        for host, path in due:
+            state = find_router_state(host)
+            if state is None:
+                continue
+            for p in state.paths():
+                if path is None or _under(p, path):
+                    state.refresh(p)
+
+
+class _Pending:
+    """The lease section as patched so far in this batch (for lease_change)."""
+
+    __slots__ = ("_sec", "_pending")
+
+    def __init__(self, sec, pending: dict[str, tuple[Any, Any]]) -> None:
+        self._sec, self._pending = sec, pending
+
+    def find(self, index: str, key: str):
+        hit = self._pending.get(norm_ip(key))
+        return hit[1] if hit is not None else self._sec.find(index, key)
+
+
+__all__ = ["SyslogReceiver", "LiveUpdates", "lease_change", "DEFAULT_PORT"]
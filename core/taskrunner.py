@@ -3,25 +3,63 @@
 """
 CommandRunner – runs a single MikroTik command in a worker thread
 so the GUI stays responsive.  Emits: finished(cmd: str, lines: list[str])
+
+RecordStreamRunner – runs a “print detail” command and emits parsed
+records (compact utils.records types) in batches while the router is
+still sending.  With ``build=`` every record is also turned into its
+display row in the worker, so the GUI thread only appends finished rows.
+Large outputs are parsed in the process pool as they arrive
+(utils.universal_parser.iter_detail_blocks_parallel); ``parallel=False``
+keeps the parse in this thread.  ``complete=`` runs in the worker after
+the last record; what it returns is left in ``result`` for the finished
+slot, so a whole snapshot can be assembled off the GUI thread.
+Emits: batchReady(records: list[dict]), finished(cmd: str, total: int)
+
+Both accept an optional ``digests`` (utils.digest.OutputDigests).  When the
+raw output hashes the same as on the previous run for that router and
+command, the runner emits ``unchanged(cmd)``, sets ``output_unchanged``
+and finishes without a payload (no lines / no batches), so the caller can
+keep what it already shows.
 """
 
 from __future__ import annotations
 
-from typing import List
+import time
+from typing import Any, Callable, List
 
 from PyQt6.QtCore import QThread, pyqtSignal
 
+from utils.digest import LineHasher, OutputDigests
+from utils.records import compact_records
+from utils.universal_parser import iter_detail_blocks, iter_detail_blocks_parallel
 from .client import MikrotikClient
 from .log import append
 
 
+def _digest_hit(digests: OutputDigests, host: str, command: str, digest: bytes) -> bool:
+    hit = digests.unchanged(host, command, digest)
+    append(f"DIGEST {'hit' if hit else 'miss'} {command} -> {host} "
+           f"[{digests.stats.summary()}]")
+    return hit
+
+
 class CommandRunner(QThread):
-    finished = pyqtSignal(str, list)  # command, output lines
+    finished  = pyqtSignal(str, list)  # command, output lines
+    unchanged = pyqtSignal(str)        # command – output same as last run
 
-    def __init__(self, client: MikrotikClient, command: str, parent=None) -> None:
+    def __init__(
+        self,
+        client: MikrotikClient,
+        command: str,
+        parent=None,
+        *,
+        digests: OutputDigests | None = None,
+    ) -> None:
         super().__init__(parent)
         self.client = client
         self.command = command
+        self.digests = digests
+        self.output_unchanged = False
         self._result: List[str] = []
 
     # ----------------------------------------------- worker thread entrypoint
@@ -29,8 +67,106 @@ class CommandRunner(QThread):
         try:
             append(f"TASK {self.command} -> {self.client.host}")
             self._result = self.client.run(self.command)
+            if self.digests is not None:
+                hasher = LineHasher()
+                for line in self._result:
+                    hasher.update(line)
+                if _digest_hit(self.digests, self.client.host, self.command, hasher.digest()):
+                    self.output_unchanged = True
+                    self._result = []
+                    self.unchanged.emit(self.command)
         except Exception as exc:  # pylint: disable=broad-except
             self._result = [f"ERROR: {exc}"]
             append(f"TASK-ERR {exc}")
+            if self.digests is not None:
+                self.digests.forget(self.client.host, self.command)
         finally:
             self.finished.emit(self.command, self._result)
+
+
+class RecordStreamRunner(QThread):
+    batchReady = pyqtSignal(list)      # parsed records, in router order
+    failed     = pyqtSignal(str)       # error text
+    unchanged  = pyqtSignal(str)       # command – output same as last run
+    finished   = pyqtSignal(str, int)  # command, total records
+
+    def __init__(
+        self,
+        client: MikrotikClient,
+        command: str,
+        section: str,
+        *,
+        batch_size: int = 500,
+        max_delay: float = 0.2,
+        digests: OutputDigests | None = None,
+        build: Callable[[Any], Any] | None = None,
+        parallel: bool = True,
+        complete: Callable[[], Any] | None = None,
+        parent=None,
+    ) -> None:
+        super().__init__(parent)
+        self.client     = client
+        self.command    = command
+        self.section    = section
+        self.batch_size = batch_size
+        self.max_delay  = max_delay          # seconds a partial batch may wait
+        self.digests    = digests
+        self.build      = build              # record → display row, run here
+        self.parallel   = parallel           # big outputs parse in the process pool
+        self.complete   = complete           # after the last record, run here
+        self.output_unchanged = False
+        self.result: Any = None              # what *complete* returned
+
+    def _lines(self, hasher: LineHasher):
+        """
+        Raw output for the parser.  With a digest from an earlier run the
+        output is collected first and compared – None means unchanged.
+        Otherwise (first run / no digests) lines stream straight through.
+        """
+        host = self.client.host
+        if self.digests is None or not self.digests.known(host, self.command):
+            return hasher.feed(self.client.stream(self.command))
+        lines = list(hasher.feed(self.client.stream(self.command)))
+        if _digest_hit(self.digests, host, self.command, hasher.digest()):
+            return None
+        return lines
+
+    # ----------------------------------------------- worker thread entrypoint
+    def run(self) -> None:  # noqa: D401
+        total = 0
+        batch: list[dict] = []
+        last  = time.monotonic()
+        hasher = LineHasher()
+        try:
+            append(f"TASK {self.command} -> {self.client.host}")
+            lines = self._lines(hasher)
+            if lines is None:
+                self.output_unchanged = True
+                self.unchanged.emit(self.command)
+                return
+            streamed = not isinstance(lines, list)
+            parse = iter_detail_blocks_parallel if self.parallel else iter_detail_blocks
+            records = compact_records(parse(lines, self.section), self.section)
+            if self.build is not None:
+                records = map(self.build, records)
+            for rec in records:
+                batch.append(rec)
+                now = time.monotonic()
+                if len(batch) >= self.batch_size or now - last >= self.max_delay:
+                    total += len(batch)
+                    self.batchReady.emit(batch)
+                    batch, last = [], now
+            if self.complete is not None:
+                self.result = self.complete()
+            if streamed and self.digests is not None:
+                _digest_hit(self.digests, self.client.host, self.command, hasher.digest())
+        except Exception as exc:  # pylint: disable=broad-except
+            append(f"TASK-ERR {exc}")
+            if self.digests is not None:
+                self.digests.forget(self.client.host, self.command)
+            self.failed.emit(str(exc))
+        finally:
+            if batch:
+                total += len(batch)
+                self.batchReady.emit(batch)
+            self.finished.emit(self.command, total)
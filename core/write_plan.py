@@ -0,0 +1,234 @@
+# core/write_plan.py
+"""
+Drop writes that would not change anything on the router.
+
+Bulk actions and undo replays often re-send values an item already has
+(``limit-at`` that is already the default, ``disabled=no`` on an enabled
+lease, an undo whose queue is already back).  A :class:`WritePlanner`
+checks each write against the store's fresh snapshot (core.state) and
+keeps only the ones that change something::
+
+    planner = WritePlanner(client)
+    for cmd in planner.plan(commands):     # decided up front, in order
+        client.execute(cmd)
+    planner.summary()                      # "3 of 5 writes skipped – already in place"
+
+Understood writes: ``set`` / ``enable`` / ``disable`` / ``remove`` / ``add``
+on one menu path, addressing items as ``numbers=*1A,…``, a bare ``*1A``
+or ``[find field=value …]``.  A write is only dropped when the snapshot
+proves it a no-op – no fresh snapshot, an item it does not know, an
+unknown field or anything else (scripts, ``move``, …) is sent as before.
+:meth:`plan` accounts for the writes it keeps, so a later write in the
+same batch is judged against the state the earlier ones leave behind.
+"""
+from __future__ import annotations
+
+import re
+from typing import Any, Iterable, Mapping
+
+from utils.flag_decoder import flag_mask
+from utils.text import clean_field
+from .cache import classify, normalize_command
+from .log import append
+from .state import fresh_section
+
+#: ``field=value`` with a plain or double-quoted value
+_ARG  = re.compile(r'([\w.-]+)=("(?:[^"\\]|\\.)*"|[^\s\]]*)')
+_FIND = re.compile(r"^\[find(?:\s+where)?(?P<cond>[^\[\]]*)\]")
+_RATE = re.compile(r"^(\d+(?:\.\d+)?)([kMG]?)$")
+_SCALE = {"": 1, "k": 1_000, "M": 1_000_000, "G": 1_000_000_000}
+
+_ITEM_VERBS = frozenset({"set", "enable", "disable", "remove"})
+#: field → snapshot index that can find it (utils.index)
+_INDEX_OF = {"name": "name", "target": "target", "address": "address", "mac-address": "mac"}
+
+_REMOVED = object()
+
+
+def _rate(value: str) -> tuple[float, ...] | None:
+    """``"1600k/6.2M"`` → ``(1600000, 6200000)``; None if not a rate."""
+    out = []
+    for part in value.split("/"):
+        m = _RATE.match(part)
+        if m is None:
+            return None
+        out.append(float(m[1]) * _SCALE[m[2]])
+    return tuple(out)
+
+
+def same_value(field: str, have: str | None, want: str) -> bool:
+    """Whether a snapshot value *have* already equals a written value *want*."""
+    have, want = clean_field(have), clean_field(want)
+    if have == want:
+        return True
+    if not have or not want:
+        return False
+    if field.endswith("mac-address"):
+        return have.upper().replace("-", ":") == want.upper().replace("-", ":")
+    a, b = _rate(have), _rate(want)
+    return a is not None and a == b
+
+
+class WritePlanner:
+    """Decides which writes to send, against fresh snapshots of one router."""
+
+    def __init__(self, client) -> None:
+        self.host     = getattr(client, "host", "")
+        self.planned  = 0
+        self.skipped  = 0
+        self._sections: dict[str, Any] = {}
+        self._by_id:    dict[str, dict[str, Any]] = {}
+        self._overlay:  dict[int, Any] = {}  # id(record) → {field: value} or _REMOVED
+        self._added:    set[str] = set()     # paths with a planned add (finds may hit it)
+
+    # ------------------------------------------------------------ public
+    def plan(self, commands: Iterable[str]) -> list[str]:
+        """The *commands* that change something, in their order."""
+        return [cmd for cmd in commands if self.needed(cmd)]
+
+    def needed(self, command: str) -> bool:
+        """False only if the snapshot proves *command* a no-op (counted as skipped)."""
+        self.planned += 1
+        try:
+            keep = self._judge(normalize_command(command))
+        except (KeyError, ValueError):
+            keep = True
+        if not keep:
+            self.skipped += 1
+        return keep
+
+    def needed_item(self, path: str, verb: str, args: str = "",
+                    rec: Mapping[str, Any] | None = None, **key: str) -> bool:
+        """:meth:`needed` for the write core.ids.run_on_item would send."""
+        if rec is not None and rec.get(".id"):
+            ref = f"numbers={rec['.id']}"
+        else:
+            (field, value), = key.items()
+            ref = f'[find {field.replace("_", "-")}="{value}"]'
+        return self.needed(f"{path} {verb} {ref} {args}".rstrip())
+
+    def summary(self) -> str:
+        return f"{self.skipped} of {self.planned} writes skipped – already in place"
+
+    def log(self, what: str) -> None:
+        if self.skipped:
+            append(f"WRITE {what} on {self.host}: {self.summary()}")
+
+    # ----------------------------------------------------------- judging
+    def _judge(self, cmd: str) -> bool:
+        kind, path = classify(cmd)
+        if kind != "write" or path is None:
+            return True
+        rest = cmd[len(path):].strip()
+        verb, _, rest = rest.partition(" ")
+        sec = self._section(path)
+        if sec is None:
+            return True
+        if verb == "add":
+            return self._judge_add(path, sec, dict(self._args(rest)))
+        if verb not in _ITEM_VERBS:
+            return True
+
+        targets, by_find, rest = self._targets(path, sec, rest.strip())
+        if targets is None:
+            return True
+        live = [r for r in targets if self._overlay.get(id(r)) is not _REMOVED]
+        changes = dict(self._args(rest))
+        if verb in ("enable", "disable"):
+            changes["disabled"] = "yes" if verb == "disable" else "no"
+        if by_find and path in self._added:
+            return self._keep(live, verb, changes)       # the new item may match too
+        if verb == "remove":
+            return bool(live) and self._keep(live, verb, changes)   # else already gone
+        if not live:
+            return True                                   # let the router report it
+        if not changes or any(not self._has(path, r, f, v) for r in live for f, v in changes.items()):
+            return self._keep(live, verb, changes)
+        return False
+
+    def _judge_add(self, path: str, sec, fields: dict[str, str]) -> bool:
+        if not fields or path in self._added:
+            self._added.add(path)
+            return True
+        for rec in sec.records:
+            if self._overlay.get(id(rec)) is _REMOVED:
+                continue
+            if all(self._has(path, rec, f, v) for f, v in fields.items()):
+                return False                              # an identical item is there
+        self._added.add(path)
+        return True
+
+    def _keep(self, live: list, verb: str, changes: dict[str, str]) -> bool:
+        # remember what the kept write does, for the writes planned after it
+        for rec in live:
+            if verb == "remove":
+                self._overlay[id(rec)] = _REMOVED
+                continue
+            over = self._overlay.setdefault(id(rec), {})
+            if over is not _REMOVED:
+                over.update(changes)
+        return True
+
+    # ----------------------------------------------------------- helpers
+    def _section(self, path: str):
+        if path not in self._sections:
+            # never older than the path's read-cache TTL – a skipped write is silent
+            self._sections[path] = fresh_section(self.host, path)
+        return self._sections[path]
+
+    @staticmethod
+    def _args(text: str) -> Iterable[tuple[str, str]]:
+        for m in _ARG.finditer(text):
+            value = m[2]
+            if value.startswith('"'):
+                value = value[1:-1].replace('\\"', '"')
+            yield m[1], value
+
+    def _targets(self, path: str, sec, rest: str) -> tuple[list | None, bool, str]:
+        """``(records addressed, addressed by find, remaining args)``."""
+        m = _FIND.match(rest)
+        if m:
+            cond = dict(self._args(m["cond"]))
+            return self._find(sec, cond), True, rest[m.end():]
+        first, _, tail = rest.partition(" ")
+        if first.startswith("numbers="):
+            first = first[len("numbers="):]
+        elif not first.startswith("*"):
+            return None, False, rest
+        by_id = self._ids(path, sec)
+        ids = first.split(",")
+        if not all(i.startswith("*") for i in ids):
+            return None, False, rest                      # print numbers – not stable
+        return [by_id[i] for i in ids if i in by_id], False, tail
+
+    def _ids(self, path: str, sec) -> dict[str, Any]:
+        by_id = self._by_id.get(path)
+        if by_id is None:
+            by_id = self._by_id[path] = {r.get(".id"): r for r in sec.records if r.get(".id")}
+        return by_id
+
+    def _find(self, sec, cond: dict[str, str]) -> list:
+        if not cond:
+            return list(sec.records)
+        candidates = None
+        for field, value in cond.items():
+            index = _INDEX_OF.get(field)
+            if index is not None and index in sec.indexes:
+                candidates = sec.find_all(index, value)
+                break
+        if candidates is None:
+            candidates = sec.records
+        return [r for r in candidates
+                if all(clean_field(r.get(f)) == clean_field(v) for f, v in cond.items())]
+
+    def _has(self, path: str, rec: Mapping[str, Any], field: str, value: str) -> bool:
+        over = self._overlay.get(id(rec))
+        if over and field in over:
+            return same_value(field, over[field], value)
+        if field == "disabled":
+            disabled = bool(rec.get("_mask", 0) & flag_mask(path, "disabled"))
+            return disabled == (clean_field(value) in ("yes", "true"))
+        return same_value(field, rec.get(field), value)
+
+
+__all__ = ["WritePlanner", "same_value"]
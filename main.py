@@ -1,15 +1,22 @@
 # main.py
 # 123456789
+import multiprocessing
 import sys
 from PyQt6.QtWidgets import QApplication, QMainWindow, QTabWidget
 
 from ui.pages.landing        import LandingPage
 from ui.pages.queue_management import QueuePage
 from ui.pages.ip_routing     import RoutingPage
+from ui.pages.customers      import CustomersPage
 from ui.pages.arp_table      import ArpTablePage
 from ui.pages.speed_test     import SpeedTestPage
 from ui.pages.action_history import ActionHistoryPage
 from ui.pages.wizards        import WizardsPage
+from core.cache              import CachedClient, read_cache
+from core.state              import drop_router_states
+from core.syslog             import LiveUpdates, SyslogReceiver
+from utils.settings          import get_syslog_aliases, get_syslog_port
+from utils.universal_parser  import shutdown_pool
 
 class MainTestWindow(QMainWindow):
     def __init__(self) -> None:
@@ -23,6 +30,7 @@ class MainTestWindow(QMainWindow):
         self.landing  = LandingPage()
         self.queues   = QueuePage()
         self.routes   = RoutingPage()
+        self.customers = CustomersPage()
         self.arp      = ArpTablePage()
         self.wizards  = WizardsPage()
         self.speed    = SpeedTestPage()
@@ -31,6 +39,7 @@ class MainTestWindow(QMainWindow):
         tabs.addTab(self.landing,  "Connect")
         tabs.addTab(self.queues,   "Queues")
         tabs.addTab(self.routes,   "Routes")
+        tabs.addTab(self.customers, "Customers")
         tabs.addTab(self.arp,      "ARP")
         tabs.addTab(self.wizards,  "Wizards")
         tabs.addTab(self.speed,    "Speed Test")
@@ -42,21 +51,37 @@ class MainTestWindow(QMainWindow):
         self.landing.connect_btn.clicked  .connect(self._link_ssh)
         self.landing.disconnect_btn.clicked.connect(self._unlink_ssh)
 
+        # ---------------------------------------------------------------- router logs
+        # DHCP / link / config lines from the router update the tables live
+        # (off until a port is set; only the router's own address is listened to)
+        self.live = LiveUpdates(SyslogReceiver(get_syslog_port()),
+                                aliases=get_syslog_aliases(), parent=self)
+
     # .........................................................................
     def _link_ssh(self) -> None:
         client = self.landing.ssh_client
-        for page in (self.queues, self.routes, self.arp,
+        if client is not None:
+            # repeated reads of the same table within seconds hit the cache
+            client = CachedClient(client)
+        for page in (self.queues, self.routes, self.customers, self.arp,
                      self.wizards, self.speed, self.history):
             page.set_ssh_client(client)
+        if client is not None and self.live.receiver.port:
+            self.live.start()
 
     def _unlink_ssh(self) -> None:
-        for page in (self.queues, self.routes, self.arp,
+        self.live.stop()
+        read_cache.clear()
+        for page in (self.queues, self.routes, self.customers, self.arp,
                      self.wizards, self.speed, self.history):
             page.set_ssh_client(None)
+        drop_router_states()
 
 # ─────────────────────────────────────────────────────────────────────────────
 def main() -> None:
+    multiprocessing.freeze_support()               # parser pool in a frozen build
     app = QApplication(sys.argv)
+    app.aboutToQuit.connect(shutdown_pool)
     win = MainTestWindow()
     win.show()
     sys.exit(app.exec())
@@ -0,0 +1,153 @@
+# tests/test_syslog.py
+"""
+core.syslog end to end: datagrams from a local UDP sender reach a
+SyslogReceiver bound to localhost and are applied to a router store.
+
+    python -m pytest tests          (or: python -m unittest discover tests)
+"""
+import os
+import socket
+import sys
+import time
+import unittest
+from pathlib import Path
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from PyQt6.QtCore import QCoreApplication
+
+from core.snapshot_cache import snapshot_cache
+from core.snapshot_history import snapshot_history
+from core.state import drop_router_states, router_state
+from core.syslog import LEASES, QUEUES, LiveUpdates, SyslogReceiver
+
+ROUTER = "127.0.0.1"
+
+QUEUE_DETAIL = [
+    "Flags: X - disabled, I - invalid, D - dynamic ",
+    ' 0    name="q1" target=10.0.0.5/32 max-limit=1M/1M ',
+    "",
+    ' 1    name="q2" target=10.0.0.6/32 max-limit=2M/2M ',
+    "",
+]
+
+
+class FakeRouter:
+    """Just enough of a client for RouterState.refresh; counts the reads."""
+
+    host = ROUTER
+
+    def __init__(self) -> None:
+        self.reads: list[str] = []
+
+    def stream(self, command: str):
+        self.reads.append(command)
+        yield from QUEUE_DETAIL if command.startswith(QUEUES) else []
+
+    def run(self, command: str) -> list[str]:
+        return list(self.stream(command))
+
+    def execute(self, command: str) -> tuple[str, str]:
+        return "\n".join(self.run(command)), ""
+
+
+def wait_until(app, condition, timeout: float = 3.0) -> bool:
+    end = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > end:
+            return False
+        app.processEvents()
+        time.sleep(0.005)
+    return True
+
+
+class SyslogLiveUpdatesTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.app = QCoreApplication.instance() or QCoreApplication([])
+        cls._saved = snapshot_cache.enabled, snapshot_history.enabled
+        snapshot_cache.enabled = snapshot_history.enabled = False   # nothing on disk
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        snapshot_cache.enabled, snapshot_history.enabled = cls._saved
+
+    def setUp(self) -> None:
+        self.router = FakeRouter()
+        self.state = router_state(self.router)
+        self.state.publish(LEASES, [
+            {"address": "10.0.0.5", "server": "dhcp1", "mac-address": "AA:AA:AA:AA:AA:05",
+             "status": "waiting", "_flags": "", "_mask": 0},
+        ], "")
+        self.receiver = SyslogReceiver(port=0, bind=ROUTER, batch_ms=20)
+        self.live = LiveUpdates(self.receiver, refresh_ms=200)
+        self.applied: list[int] = []
+        self.live.applied.connect(self.applied.append)
+        self.assertTrue(self.live.start())
+        self.sender = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+
+    def tearDown(self) -> None:
+        self.sender.close()
+        self.live.stop()
+        drop_router_states()
+        self.app.processEvents()
+
+    def send(self, line: str, sock: socket.socket | None = None) -> None:
+        (sock or self.sender).sendto(f"<30>{line}".encode(), (ROUTER, self.receiver.port))
+
+    # ------------------------------------------------------------ tests
+    def test_dhcp_events_patch_the_leases(self) -> None:
+        self.send("dhcp,info dhcp1 assigned 10.0.0.5 to 11:22:33:44:55:66 cpe5")
+        self.send("dhcp,info dhcp1 assigned 10.0.0.9 to 11:22:33:44:55:99 newbox")
+        self.assertTrue(wait_until(self.app, lambda: sum(self.applied) >= 2))
+
+        sec = self.state.section(LEASES)
+        known = sec.find("address", "10.0.0.5")
+        self.assertEqual(known["status"], "bound")
+        self.assertEqual(known["active-mac-address"], "11:22:33:44:55:66")
+        self.assertEqual(known["host-name"], "cpe5")
+        self.assertEqual(known["mac-address"], "AA:AA:AA:AA:AA:05")   # static lease keeps it
+        added = sec.find("address", "10.0.0.9")
+        self.assertEqual(added["host-name"], "newbox")
+        self.assertEqual(added["_flags"], "D")
+        self.assertEqual(len(sec), 2)
+        self.assertEqual(self.router.reads, [])                  # patched, not re-read
+
+    def test_config_change_marks_stale_and_refreshes_once(self) -> None:
+        self.state.refresh(QUEUES)
+        self.assertTrue(wait_until(self.app, lambda: self.state.fresh(QUEUES) is not None))
+        self.router.reads.clear()
+
+        for n in range(3):
+            self.send("system,info simple queue changed by ssh:admin@10.0.0.2/action:%d "
+                      "(/queue simple set q1 max-limit=%dM/%dM)" % (40 + n, n + 2, n + 2))
+        self.assertTrue(wait_until(self.app, lambda: sum(self.applied) >= 3))
+        self.assertIsNone(self.state.fresh(QUEUES))               # stale at once
+
+        # the refresh re-confirms the (unchanged) table, which is fresh again
+        self.assertTrue(wait_until(self.app, lambda: self.state.fresh(QUEUES) is not None))
+        self.assertEqual(len(self.router.reads), 1)               # debounced: one read
+        self.assertTrue(self.router.reads[0].startswith(QUEUES))
+
+    def test_other_sources_are_ignored(self) -> None:
+        stranger = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        try:
+            stranger.bind(("127.0.0.2", 0))
+        except OSError:
+            stranger.close()
+            self.skipTest("no second loopback address on this system")
+        try:
+            self.send("dhcp,info dhcp1 assigned 10.0.0.5 to 66:66:66:66:66:66 evil", stranger)
+            self.assertTrue(wait_until(self.app, lambda: self.receiver.dropped >= 1))
+        finally:
+            stranger.close()
+        self.app.processEvents()
+
+        self.assertEqual(self.receiver.datagrams, 0)
+        self.assertEqual(self.applied, [])
+        self.assertEqual(self.state.section(LEASES).find("address", "10.0.0.5")["status"], "waiting")
+
+
+if __name__ == "__main__":
+    unittest.main()
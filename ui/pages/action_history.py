@@ -8,6 +8,7 @@ from PyQt6.QtWidgets import (
 )
 from PyQt6.QtCore import Qt
 from utils.action_manager import manager as action_manager
+from core.write_plan import WritePlanner
 
 class ActionHistoryPage(QWidget):
     def __init__(self, parent=None):
@@ -106,15 +107,21 @@ class ActionHistoryPage(QWidget):
                                 "Select at least one action to undo.")
             return
 
+        # one planner for all of them: each undo is judged against the
+        # state the previous ones leave behind
+        planner = WritePlanner(self.ssh_client)
         for idx in rows:
             action_id = int(self.table.item(idx.row(), 0).text())
             try:
-                action_manager.undo(action_id, self.ssh_client)
+                action_manager.undo(action_id, self.ssh_client, planner.plan)
             except Exception as e:
                 QMessageBox.critical(self, "Undo Failed", str(e))
                 return
 
-        QMessageBox.information(self, "Undone", "Selected actions have been undone.")
+        planner.log("undo")
+        skipped = (f"\n({planner.skipped} command(s) skipped – already in place.)"
+                   if planner.skipped else "")
+        QMessageBox.information(self, "Undone", f"Selected actions have been undone.{skipped}")
         self.load_history()
 
         # if the Queues tab exists, refresh it so the UI reflects the change
@@ -0,0 +1,205 @@
+# ui/pages/customers.py
+"""
+Customers tab – one row per customer IP: DHCP lease, simple queue, ARP
+entry and subnet side by side, joined from the router's shared store
+(core.customers).  Any refreshed table – from this page or another one –
+re-runs the join in a worker thread; the GUI thread only swaps rows.
+Tables restored from the snapshot cache are joined too, shown as cached.
+"""
+from __future__ import annotations
+
+from typing import List, Optional
+
+from PyQt6.QtCore import Qt, QThread, QTimer, QSortFilterProxyModel, pyqtSignal
+from PyQt6.QtWidgets import (
+    QWidget, QHBoxLayout, QVBoxLayout, QPushButton, QLineEdit, QLabel,
+    QTableView, QMessageBox, QSizePolicy, QFrame
+)
+
+from core.customers import (
+    CUSTOMER_PATHS, LEASES, QUEUES, join_sections, refresh_customers
+)
+from core.state import Section, router_state
+from utils.customers import Customer
+from widgets.record_table import DisplayRow, RecordTableModel
+
+__all__ = ["CustomersPage"]
+
+HEADERS = [
+    "IP", "MAC", "Host Name", "Name / Comment", "Queue",
+    "Max-Limit", "Network", "Interface", "ARP",
+]
+
+
+def customer_row(c: Customer) -> DisplayRow:
+    """Display row for one joined customer – runs in the join worker."""
+    if c.arp is None:
+        arp = ""
+    elif c.mac_mismatch:
+        arp = f"MAC {c.arp.get('mac-address', '')}"
+    else:
+        arp = "online"
+    return DisplayRow(
+        (
+            c.ip,
+            c.mac,
+            c.host_name,
+            c.name,
+            c.queue.get("name", "") if c.queue is not None else "",
+            c.rate,
+            c.network,
+            c.interface,
+            arp,
+        ),
+        c,
+        muted=c.lease is None,
+        tooltip="no DHCP lease – static queue only" if c.lease is None else None,
+    )
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Worker thread – join the snapshots and build the rows
+# ──────────────────────────────────────────────────────────────────────────────
+class JoinRunner(QThread):
+    ready = pyqtSignal(list, int)               # display rows, customers online
+
+    def __init__(self, sections: dict[str, Section | None], parent=None):
+        super().__init__(parent)
+        self._sections = sections
+        # oldest snapshot restored from disk and not yet revalidated, if any
+        cached = [s.cached_at for s in sections.values() if s is not None and s.stale]
+        self.cached_at = min(cached) if cached else None
+
+    def run(self):                              # noqa: D401
+        customers = join_sections(self._sections)
+        online = sum(1 for c in customers if c.online)
+        self.ready.emit([customer_row(c) for c in customers], online)
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Main Page
+# ──────────────────────────────────────────────────────────────────────────────
+class CustomersPage(QWidget):
+    def __init__(self, parent: Optional[QWidget] = None):
+        super().__init__(parent)
+        self._state = None
+        self._unsubscribe: List = []
+        self._runner: JoinRunner | None = None
+        self._join_again = False
+        self._build_ui()
+
+    # ------------------------------------------------------------------ UI
+    def _build_ui(self):
+        sidebar = QVBoxLayout()
+        self.btn_refresh = QPushButton("Refresh")
+        self.btn_refresh.setSizePolicy(QSizePolicy.Policy.Expanding,
+                                       QSizePolicy.Policy.Fixed)
+        self.btn_refresh.clicked.connect(self.refresh)
+        sidebar.addWidget(self.btn_refresh)
+        sidebar.addStretch(1)
+
+        sep = QFrame()
+        sep.setFrameShape(QFrame.Shape.VLine)
+        sep.setFrameShadow(QFrame.Shadow.Sunken)
+
+        self.le_filter = QLineEdit(placeholderText="Filter (IP, MAC, name, queue …)")
+        self.lbl_count = QLabel("")
+
+        self.model = RecordTableModel(HEADERS, self)
+        self.proxy = QSortFilterProxyModel(self)
+        self.proxy.setSourceModel(self.model)
+        self.proxy.setFilterKeyColumn(-1)                      # every column
+        self.proxy.setFilterCaseSensitivity(Qt.CaseSensitivity.CaseInsensitive)
+        self.le_filter.textChanged.connect(self.proxy.setFilterFixedString)
+
+        self.tbl = QTableView()
+        self.tbl.setModel(self.proxy)
+        self.tbl.setSortingEnabled(True)
+        self.tbl.setAlternatingRowColors(True)
+        self.tbl.setSelectionBehavior(QTableView.SelectionBehavior.SelectRows)
+        self.tbl.setEditTriggers(QTableView.EditTrigger.NoEditTriggers)
+        self.tbl.horizontalHeader().setStretchLastSection(True)
+        # size columns from the first rows only – 50k rows would stall the GUI
+        self.tbl.horizontalHeader().setResizeContentsPrecision(200)
+
+        top = QHBoxLayout()
+        top.addWidget(self.le_filter, 1)
+        top.addWidget(self.lbl_count)
+
+        content = QVBoxLayout()
+        content.addLayout(top)
+        content.addWidget(self.tbl)
+
+        root = QHBoxLayout(self)
+        root.addLayout(sidebar)
+        root.addWidget(sep)
+        root.addLayout(content, 1)
+
+    # ------------------------------------------------------------ client
+    def set_ssh_client(self, client):
+        for unsubscribe in self._unsubscribe:
+            unsubscribe()
+        self._unsubscribe.clear()
+        self._state = None
+        if client is None:
+            self.model.clear()
+            self.lbl_count.setText("")
+            return
+        self._state = router_state(client)
+        for path in CUSTOMER_PATHS:
+            self._unsubscribe.append(self._state.subscribe(
+                path, self._on_section,
+                on_error=lambda err, p=path: self.lbl_count.setText(f"{p}: {err}"),
+            ))
+
+    # ------------------------------------------------------------ actions
+    def refresh(self):
+        if self._state is None:
+            QMessageBox.warning(self, "No connection", "Connect first.")
+            return
+        if not refresh_customers(self._state, fresh=True):
+            QMessageBox.information(self, "Busy", "Still fetching…")
+
+    # ------------------------------------------------------------- join
+    def _on_section(self, section: Section):
+        # several tables usually land together – join once per event-loop pass
+        if self._runner is not None:
+            self._join_again = True
+            return
+        if not self._join_again:
+            self._join_again = True
+            QTimer.singleShot(0, self._start_join)
+
+    def _start_join(self):
+        self._join_again = False
+        if self._state is None:
+            return
+        sections = {p: self._state.section(p) for p in CUSTOMER_PATHS}
+        if sections[LEASES] is None and sections[QUEUES] is None:
+            return                              # no leases or queues yet
+        self._runner = JoinRunner(sections, self)
+        self._runner.ready.connect(self._on_joined)
+        self._runner.finished.connect(self._on_join_done)
+        self._runner.start()
+
+    def _on_joined(self, rows: List[DisplayRow], online: int):
+        cached_at = self._runner.cached_at if self._runner is not None else None
+        self.model.sync_rows(rows)
+        self.model.set_stale(cached_at)
+        self.lbl_count.setText(f"{len(rows)} customers, {online} online"
+                               + (" (cached – refreshing…)" if cached_at is not None else ""))
+        self.tbl.resizeColumnsToContents()
+
+    def _on_join_done(self):
+        self._runner.deleteLater()
+        self._runner = None
+        if self._join_again:
+            self._start_join()
+
+    def closeEvent(self, ev):
+        for unsubscribe in self._unsubscribe:
+            unsubscribe()
+        self._unsubscribe.clear()
+        if self._runner is not None:
+            self._runner.wait()
+        super().closeEvent(ev)
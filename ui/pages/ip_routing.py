@@ -3,17 +3,44 @@
 from __future__ import annotations
 from typing import List, Optional
 
-from PyQt6.QtCore import pyqtSignal, Qt
+from PyQt6.QtCore import pyqtSignal
 from PyQt6.QtWidgets import (
     QWidget, QHBoxLayout, QVBoxLayout, QPushButton,
-    QTableWidget, QTableWidgetItem, QMessageBox,
+    QTableView, QMessageBox,
     QHeaderView, QSizePolicy, QFrame
 )
 
 from core.client import MikrotikClient
-from core.taskrunner import CommandRunner
-from utils.universal_parser import parse_detail_blocks
+from core.state import Section, router_state
 from widgets.ip_tool_panel import IpToolPanel
+from utils.flag_decoder import compile_flags
+from widgets.record_table import DisplayRow, RecordTableModel
+
+_ROUTE_FLAGS = compile_flags("/ip route")
+#: larger tables keep the default row height (per-row sizing takes seconds)
+_FIT_ROWS_MAX = 2000
+
+HEADERS = [
+    "Flags", "Dst-Address", "Gateway", "Reachable",
+    "Distance", "Scope", "Comment",
+]
+
+
+def route_row(rec) -> DisplayRow:
+    """Display row for one route record – runs in the refresh worker."""
+    return DisplayRow(
+        (
+            rec.get("_flags", ""),
+            rec.get("dst-address", ""),
+            rec.get("gateway", ""),
+            rec.get("gateway-status", ""),
+            rec.get("distance", ""),
+            rec.get("scope", ""),
+            rec.get("comment", ""),
+        ),
+        rec,
+        tooltip=", ".join(_ROUTE_FLAGS.names(rec.get("_mask", 0))) or None,
+    )
 
 __all__ = ["RoutingPage"]
 
@@ -30,16 +57,13 @@ class RoutingPage(QWidget):
     def __init__(self, parent: Optional[QWidget] = None):
         super().__init__(parent)
         self._client: Optional[MikrotikClient] = None
-        self._runner = None
+        self._state = None                       # shared RouterState of the router
+        self._unsubscribe = None
+        self._shown = 0                          # version of the complete table on screen
         self._build_ui()
         self._wire()
 
     def _build_ui(self):
-        headers = [
-            "Flags", "Dst-Address", "Gateway", "Reachable",
-            "Distance", "Scope", "Comment",
-        ]
-
         # ── Sidebar ─────────────────────────────────────────────
         sidebar = QVBoxLayout()
         self.btn_refresh = QPushButton("Refresh Routes")
@@ -55,11 +79,12 @@ class RoutingPage(QWidget):
         sep.setFrameShadow(QFrame.Shadow.Sunken)
 
         # ── Table ────────────────────────────────────────────────
-        self.tbl = QTableWidget(0, len(headers))
-        self.tbl.setHorizontalHeaderLabels(headers)
+        self.model = RecordTableModel(HEADERS, self)
+        self.tbl = QTableView()
+        self.tbl.setModel(self.model)
         self.tbl.setAlternatingRowColors(True)
-        self.tbl.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
-        self.tbl.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        self.tbl.setSelectionBehavior(QTableView.SelectionBehavior.SelectRows)
+        self.tbl.setEditTriggers(QTableView.EditTrigger.NoEditTriggers)
         self.tbl.horizontalHeader().setStretchLastSection(True)
 
         root = QHBoxLayout(self)
@@ -75,61 +100,57 @@ class RoutingPage(QWidget):
         self.tbl.doubleClicked.connect(self._row_double_clicked)
 
     def set_ssh_client(self, client: MikrotikClient | None):
+        if self._unsubscribe is not None:
+            self._unsubscribe()
+            self._unsubscribe = self._state = None
+        self._shown = 0
         self._client = client
         self.ip_tools.set_ssh_client(client)
-
-    def _runner_active(self) -> bool:
-        return getattr(self, "_runner", None) and self._runner.isRunning()
+        if client is not None:
+            self._state = router_state(client)
+            self._state.view("/ip route", "routes", route_row)
+            self._unsubscribe = self._state.subscribe(
+                "/ip route", self._on_routes,
+                on_batch=self._on_batch,
+                on_error=lambda err: QMessageBox.warning(self, "Refresh failed", err),
+            )
+        else:
+            self.model.clear()
 
     def refresh_routes(self):
         if not self._client:
             QMessageBox.warning(self, "No connection", "Connect to a router first.")
             return
-        if self._runner_active():
+        if not self._state.refresh("/ip route", queue=True, fresh=True):
             QMessageBox.information(self, "Busy", "Still fetching…")
-            return
 
-        cmd = "/ip route print detail without-paging"
-        print(f"DEBUG: refreshing routes with `{cmd}`")
-        self._runner = CommandRunner(self._client, cmd, parent=self)
-        self._runner.finished.connect(self._on_done)
-        self._runner.finished.connect(self._runner.deleteLater)
-        self._runner.start()
-
-    def _on_done(self, cmd: str, lines: List[str]):
-        print(f"DEBUG: routes done `{cmd}`, {len(lines)} lines")
-        recs = parse_detail_blocks(lines, "/ip route")
-        self._fill_table(recs)
-        self._runner = None
-
-    def _fill_table(self, recs: List[dict]):
-        self.tbl.setRowCount(0)
-        for rec in recs:
-            r = self.tbl.rowCount()
-            self.tbl.insertRow(r)
-
-            flags   = rec.get("_flags", "")
-            decoded = ", ".join(rec.get("_decoded_flags", {}))
-
-            self._set(r, 0, flags, decoded)
-            self._set(r, 1, rec.get("dst-address", ""))
-            self._set(r, 2, rec.get("gateway", ""))
-            self._set(r, 3, rec.get("gateway-status", ""))
-            self._set(r, 4, rec.get("distance", ""))
-            self._set(r, 5, rec.get("scope", ""))
-            self._set(r, 6, rec.get("comment", ""))
+    def showEvent(self, ev):
+        super().showEvent(ev)
+        # coming back to the tab: a cheap id probe, the table is read only if it changed
+        if self._state is not None and self._shown:
+            self._state.revalidate("/ip route")
 
-        self._fit_comment_column(self.tbl, 6)
+    def _on_batch(self, rows: dict[str, List[DisplayRow]], first: bool):
+        # rows were built in the refresh worker – only swap / append here;
+        # a complete table on screen waits for the snapshot's diff instead
+        if self._shown:
+            return
+        if first:
+            self.model.set_rows(rows["routes"])
+        else:
+            self.model.append_rows(rows["routes"])
 
-    def _set(self, row: int, col: int, text: str, tooltip: str | None = None):
-        item = QTableWidgetItem(text)
-        item.setFlags(Qt.ItemFlag.ItemIsSelectable | Qt.ItemFlag.ItemIsEnabled)
-        if tooltip:
-            item.setToolTip(tooltip)
-        self.tbl.setItem(row, col, item)
+    def _on_routes(self, section: Section):
+        diff = section.diff if section.diff is not None and section.diff.base == self._shown else None
+        self.model.sync_rows(self._state.rows("/ip route", "routes"), diff)
+        self._shown = section.version
+        self.model.set_stale(section.cached_at)
+        self._fit_comment_column(self.tbl, 6)
 
-    def _fit_comment_column(self, table: QTableWidget, col: int, max_px: int = 400):
+    def _fit_comment_column(self, table: QTableView, col: int, max_px: int = 400):
         hdr = table.horizontalHeader()
+        # size from the first rows only – a cached 50k-row table must show at once
+        hdr.setResizeContentsPrecision(200)
         table.resizeColumnsToContents()
         if table.columnWidth(col) > max_px:
             hdr.setSectionResizeMode(col, QHeaderView.ResizeMode.Fixed)
@@ -137,15 +158,17 @@ class RoutingPage(QWidget):
             table.setWordWrap(True)
         else:
             hdr.setSectionResizeMode(col, QHeaderView.ResizeMode.Interactive)
-        table.resizeRowsToContents()
+        if table.model().rowCount() <= _FIT_ROWS_MAX:
+            table.resizeRowsToContents()
 
     def _row_double_clicked(self, idx):
-        gw  = self.tbl.item(idx.row(), 2).text()
-        dst = self.tbl.item(idx.row(), 1).text()
+        gw  = self.model.text(idx.row(), 2)
+        dst = self.model.text(idx.row(), 1)
         self.ip_tools.le_target.setText((gw or dst).split("/")[0])
 
     def closeEvent(self, ev):
         self.ip_tools.cleanup()
-        if self._runner_active():
-            self._runner.quit(); self._runner.wait()
+        if self._unsubscribe is not None:
+            self._unsubscribe()
+            self._unsubscribe = None
         super().closeEvent(ev)
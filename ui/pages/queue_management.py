@@ -1,8 +1,8 @@
 # ui/pages/queue_management.py
 
 from PyQt6.QtWidgets import (
-    QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QTableWidget,
-    QTableWidgetItem, QMessageBox, QDialog, QLineEdit, QLabel,
+    QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QTableView,
+    QMessageBox, QDialog, QLineEdit, QLabel,
     QComboBox, QFormLayout, QInputDialog, QHeaderView,
     QSizePolicy, QFrame
 )
@@ -11,15 +11,38 @@ from utils.ssh import SSHClient
 import datetime
 from utils.text import clean_field, quote_field
 from utils.settings import get_limit_at_default, set_limit_at_default
-from utils.universal_parser import parse_detail_blocks
-from core.taskrunner import CommandRunner
+from core.state import Section, router_state
+from core.ids import run_on_item
+from core.write_plan import WritePlanner
 from typing import List
 from core.queue_converter import QueueConversionError
 from core.log import append as log_append
 from utils.action_manager import manager as action_manager
 from core.queue_conversion_controller import QueueConversionController
+from utils.flag_decoder import flag_mask
+from widgets.record_table import DisplayRow, RecordTableModel
 
 LOG_FILE = "mikrotik_action_log.txt"
+_DISABLED = flag_mask("/queue simple", "disabled")
+#: larger tables keep the default row height (per-row sizing takes seconds)
+_FIT_ROWS_MAX = 2000
+
+
+def queue_row(rec) -> DisplayRow:
+    """Display row for one queue record – runs in the refresh worker."""
+    return DisplayRow(
+        (
+            rec.get("_flags", ""),
+            rec.get("name", ""),
+            rec.get("target", "").split("/")[0],
+            rec.get("limit-at", ""),
+            rec.get("max-limit", ""),
+            rec.get("queue", ""),
+            rec.get("comment", ""),
+        ),
+        rec,
+        muted=bool(rec.get("_mask", 0) & _DISABLED),
+    )
 
 # Predefined speed packages
 SPEED_PACKAGES = {
@@ -46,6 +69,9 @@ class QueuePage(QWidget):
 
         # -------------------------------------------------- instance fields
         self.ssh_client: SSHClient | None = None
+        self._state = None                       # shared RouterState of the router
+        self._unsubscribe = None
+        self._shown = 0                          # version of the complete table on screen
 
         # -------------------------------------------------- widgets
         self.refresh_btn     = QPushButton("Refresh")
@@ -55,8 +81,10 @@ class QueuePage(QWidget):
         self.set_limit_btn   = QPushButton("Set Global Limit-At")
         self.apply_limit_btn = QPushButton("Apply Limit-At to Selected")
 
-        self.queue_table = QTableWidget(0, len(HEADERS))
-        self.queue_table.setHorizontalHeaderLabels(HEADERS)
+        self.queue_model = RecordTableModel(HEADERS, self)
+        self.queue_table = QTableView()
+        self.queue_table.setModel(self.queue_model)
+        self.queue_table.setSelectionBehavior(QTableView.SelectionBehavior.SelectRows)
         self.queue_table.horizontalHeader().setStretchLastSection(True)
 
         # -------------------------------------------------- layout
@@ -93,12 +121,10 @@ class QueuePage(QWidget):
         self.set_limit_btn.clicked.connect(self.set_global_limit_at)
         self.apply_limit_btn.clicked.connect(self.apply_limit_at_to_selected)
 
-    def _runner_active(self) -> bool:
-        """True if a CommandRunner exists and is still running."""
-        return getattr(self, "_runner", None) and self._runner.isRunning()
-
-    def _fit_comment_column(self, table: QTableWidget, col: int, max_px: int = 400):
+    def _fit_comment_column(self, table: QTableView, col: int, max_px: int = 400):
         header = table.horizontalHeader()
+        # size from the first rows only – a cached 50k-row table must show at once
+        header.setResizeContentsPrecision(200)
         table.resizeColumnsToContents()
         if table.columnWidth(col) > max_px:
             header.setSectionResizeMode(col, QHeaderView.ResizeMode.Fixed)
@@ -106,10 +132,26 @@ class QueuePage(QWidget):
             table.setWordWrap(True)
         else:
             header.setSectionResizeMode(col, QHeaderView.ResizeMode.Interactive)
-        table.resizeRowsToContents()
+        if table.model().rowCount() <= _FIT_ROWS_MAX:
+            table.resizeRowsToContents()
 
     def set_ssh_client(self, ssh_client):
+        if self._unsubscribe is not None:
+            self._unsubscribe()
+            self._unsubscribe = self._state = None
+        self._shown = 0
         self.ssh_client = ssh_client
+        if ssh_client is not None:
+            # the queue table comes from the router's shared store
+            self._state = router_state(ssh_client)
+            self._state.view("/queue simple", "queues", queue_row)
+            self._unsubscribe = self._state.subscribe(
+                "/queue simple", self._on_queues,
+                on_batch=self._on_queue_batch,
+                on_error=lambda err: QMessageBox.warning(self, "Refresh failed", err),
+            )
+        else:
+            self.queue_model.clear()
 
     def set_global_limit_at(self):
         current = get_limit_at_default()
@@ -128,49 +170,35 @@ class QueuePage(QWidget):
         if not self.ssh_client:
             QMessageBox.warning(self, "No connection", "Connect first.")
             return
-        if self._runner_active():
+        # a full read from the router (never the read cache) – only rows that
+        # changed are repainted; a read already running is followed by this one
+        if not self._state.refresh("/queue simple", queue=True, fresh=True):
             QMessageBox.information(self, "Busy", "Still fetching…")
+
+    def showEvent(self, ev):
+        super().showEvent(ev)
+        # coming back to the tab: a cheap id probe, the table is read only if it changed
+        if self._state is not None and self._shown:
+            self._state.revalidate("/queue simple")
+
+    def _on_queue_batch(self, rows: dict[str, list[DisplayRow]], first: bool):
+        # rows were built in the refresh worker – only swap / append here;
+        # a complete table on screen waits for the snapshot's diff instead
+        if self._shown:
             return
+        if first:
+            self.queue_model.set_rows(rows["queues"])
+        else:
+            self.queue_model.append_rows(rows["queues"])
 
-        cmd = "/queue simple print detail without-paging"
-        self._runner = CommandRunner(self.ssh_client, cmd, parent=self)
-        self._runner.finished.connect(self._on_queues_done)
-        self._runner.finished.connect(self._runner.deleteLater)
-        self._runner.start()
-
-    def _on_queues_done(self, cmd: str, lines: List[str]):
-        records = parse_detail_blocks(lines, "/queue simple")
-        self._populate(records)
-        self._runner = None
-
-    def _populate(self, recs: list[dict]):
-        tbl = self.queue_table
-        tbl.setRowCount(0)
-
-        for rec in recs:
-            r = tbl.rowCount()
-            tbl.insertRow(r)
-
-            flags    = rec.get("_flags", "")
-            disabled = bool(rec.get("disabled", False)) or "X" in flags
-
-            data = [
-                flags,
-                rec.get("name", ""),
-                rec.get("target", "").split("/")[0],
-                rec.get("limit-at", ""),
-                rec.get("max-limit", ""),
-                rec.get("queue", ""),
-                rec.get("comment", ""),
-            ]
-            for c, text in enumerate(data):
-                item = QTableWidgetItem(text)
-                item.setFlags(Qt.ItemFlag.ItemIsSelectable | Qt.ItemFlag.ItemIsEnabled)
-                if disabled:
-                    item.setForeground(Qt.GlobalColor.darkGray)
-                tbl.setItem(r, c, item)
-
-        self._fit_comment_column(tbl, 6)
+    def _on_queues(self, section: Section):
+        # complete snapshot – from this page's refresh, any other reader or
+        # the snapshot cache; only rows that differ are repainted
+        diff = section.diff if section.diff is not None and section.diff.base == self._shown else None
+        self.queue_model.sync_rows(self._state.rows("/queue simple", "queues"), diff)
+        self._shown = section.version
+        self.queue_model.set_stale(section.cached_at)
+        self._fit_comment_column(self.queue_table, 6)
 
     def apply_limit_at_to_selected(self):
         rows = self.queue_table.selectionModel().selectedRows()
@@ -180,34 +208,43 @@ class QueuePage(QWidget):
 
         limit_at = get_limit_at_default()
         failed = []
+        changes = []
+        # queues that already have the value are left alone – judged only
+        # against a snapshot younger than the read-cache TTL
+        planner = WritePlanner(self.ssh_client)
+        since = self._state.stamp("/queue simple")
 
         for index in rows:
-            row = index.row()
-            name = clean_field(self.queue_table.item(row, 0).text())
+            rec = self.queue_model.record(index.row())
+            name = clean_field(rec.get("name")) if rec is not None else ""
             if not name:
                 continue
-            cmd = (
-                f'/queue simple set '
-                f'[find name={quote_field(name)}] '
-                f'limit-at={limit_at}'
-            )
-            stdout, stderr = self.ssh_client.execute(cmd)
+            if not planner.needed_item("/queue simple", "set", f"limit-at={limit_at}",
+                                       rec=rec, name=name):
+                continue
+            # the snapshot's .id when it has one, else [find name=…]
+            stdout, stderr = run_on_item(self.ssh_client, "/queue simple", "set",
+                                         f"limit-at={limit_at}", rec=rec, name=name)
             if stderr or "failure" in stdout.lower():
                 failed.append(name)
             else:
+                changes.append((rec, {**rec, "limit-at": limit_at}))
                 log_append(f'Set limit-at={limit_at} for queue "{name}"')
 
+        planner.log("limit-at")
+        if changes:
+            self._state.write_through("/queue simple", changes, since=since)
+        skipped = f"\n({planner.skipped} already had it.)" if planner.skipped else ""
         if failed:
             QMessageBox.warning(
                 self, "Partial Failure",
-                "Failed to update:\n" + "\n".join(failed)
+                "Failed to update:\n" + "\n".join(failed) + skipped
             )
         else:
             QMessageBox.information(
                 self, "Success",
-                f"Limit-at set to {limit_at} for selected queue(s)."
+                f"Limit-at set to {limit_at} for selected queue(s).{skipped}"
             )
-        self.refresh_queues()
 
     def convert_dhcp_queues(self):
         rows = self.queue_table.selectionModel().selectedRows()
@@ -223,11 +260,13 @@ class QueuePage(QWidget):
             get_limit_at_default(),
             parent_widget=self
         )
+        since = self._state.stamp("/queue simple")
+        touched = []                 # queues a conversion may have added / removed
 
         for idx in rows:
             row    = idx.row()
-            name   = clean_field(self.queue_table.item(row, 1).text())
-            target = clean_field(self.queue_table.item(row, 2).text())
+            name   = clean_field(self.queue_model.text(row, 1))
+            target = clean_field(self.queue_model.text(row, 2))
 
             resp = QMessageBox.question(
                 self,
@@ -243,20 +282,25 @@ class QueuePage(QWidget):
                 log_append(f"SKIP: conversion of '{name}' ({target})")
                 continue
 
+            touched += [cond for cond in ({"name": name}, {"name": target},
+                                          {"target": f"{target}/32"}) if all(cond.values())]
             try:
                 controller.convert_dhcp_queue(name, target)
             except QueueConversionError as e:
                 QMessageBox.critical(self, "Conversion Failed", str(e))
 
-        self.refresh_queues()
+        if touched:
+            # what the controller did depends on conflicts – read those queues back
+            self._state.write_through("/queue simple", match=touched, since=since)
 
     def delete_selected_queue(self):
-        row = self.queue_table.currentRow()
+        row = self.queue_table.currentIndex().row()
         if row < 0:
             QMessageBox.warning(self, "No Selection", "Select a queue to delete.")
             return
 
-        name = clean_field(self.queue_table.item(row, 0).text())
+        rec = self.queue_model.record(row) or {}
+        name = clean_field(rec.get("name"))
         confirm = QMessageBox.question(
             self, "Confirm Deletion",
             f"Delete queue '{name}'?",
@@ -265,23 +309,24 @@ class QueuePage(QWidget):
         if confirm != QMessageBox.StandardButton.Yes:
             return
 
-        cmd = f"/queue simple remove [find name={quote_field(name)}]"
-        stdout, stderr = self.ssh_client.execute(cmd)
+        since = self._state.stamp("/queue simple")
+        stdout, stderr = run_on_item(self.ssh_client, "/queue simple", "remove",
+                                     rec=rec, name=name)
         if stderr:
             QMessageBox.critical(self, "Error", f"Failed to delete queue:\n{stderr}")
             return
+        self._state.write_through("/queue simple", [(rec, None)], since=since)
 
         details = {
             "name":   name,
-            "target": clean_field(self.queue_table.item(row, 1).text()),
-            "limit-at": clean_field(self.queue_table.item(row, 2).text()),
-            "max-limit": clean_field(self.queue_table.item(row, 3).text()),
-            "queue":     clean_field(self.queue_table.item(row, 4).text()),
-            "comment":   clean_field(self.queue_table.item(row, 5).text()),
+            "target": clean_field(rec.get("target", "")).split("/")[0],
+            "limit-at": clean_field(rec.get("limit-at")),
+            "max-limit": clean_field(rec.get("max-limit")),
+            "queue":     clean_field(rec.get("queue")),
+            "comment":   clean_field(rec.get("comment")),
         }
         action_manager.record("delete_queue", details)
         log_append(f"Deleted queue: {details}")
-        self.refresh_queues()
 
     def open_add_dialog(self):
         if not self.ssh_client:
@@ -302,19 +347,26 @@ class QueuePage(QWidget):
             f'queue=default-small/default-small '
             f'comment={quote_field(data["comment"])}'
         )
+        since = self._state.stamp("/queue simple")
         stdout, stderr = self.ssh_client.execute(cmd)
         if stderr:
             QMessageBox.critical(self, "Error", f"Failed to add queue:\n{stderr}")
             return
+        # shown at once; the router's copy (with .id and flags) replaces it
+        self._state.write_through("/queue simple", [(None, {
+            "_flags": "", "_mask": 0,
+            "name": data["name"], "target": data["target"],
+            "limit-at": data["limit"], "max-limit": data["max"],
+            "queue": "default-small/default-small", "comment": data["comment"],
+        })], since=since)
 
         action_manager.record("add_queue", data)
         log_append(f"Added queue: {data}")
-        self.refresh_queues()
 
     def closeEvent(self, ev):
-        if self._runner_active():
-            self._runner.quit()
-            self._runner.wait()
+        if self._unsubscribe is not None:
+            self._unsubscribe()
+            self._unsubscribe = None
         super().closeEvent(ev)
 
 
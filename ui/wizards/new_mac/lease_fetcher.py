@@ -14,6 +14,7 @@ from typing import Optional, List, Dict
 
 from PyQt6.QtCore import QObject, pyqtSignal, QThread
 from core.client  import MikrotikClient
+from core.state   import fresh_section
 from utils.universal_parser import parse_detail_blocks
 
 
@@ -56,6 +57,10 @@ class LeaseFetcher(QObject):
     # ---------------------------------------------------------------- worker slot
     def _process(self):
         try:
+            lease = self._cached_lease(self.host, self.client_ip)
+            if lease is not None:
+                self.lease_loaded.emit(lease)
+                return
             with MikrotikClient(self.host, self.user, self.password, self.port) as cli:
                 lease = self._fetch_lease(cli, self.client_ip)
             if lease is None:
@@ -72,6 +77,17 @@ class LeaseFetcher(QObject):
         m = re.match(r"\s*(?:#)?(\d+)", first_line.strip())
         return m.group(1) if m else ""
 
+    @staticmethod
+    def _cached_lease(host: str, ip: str) -> Optional[dict]:
+        """Lease from the pages' shared snapshot – no login when it is fresh."""
+        sec = fresh_section(host, "/ip dhcp-server lease")
+        rec = sec.find("address", ip) if sec is not None else None
+        if rec is None:
+            return None
+        lease = dict(rec)
+        lease.update({"id": lease.get(".id", ""), "address": ip})
+        return lease
+
     @classmethod
     def _fetch_lease(cls, cli: "MikrotikClient", ip: str) -> Optional[dict]:
         cmd = f"/ip dhcp-server lease print detail without-paging where address={ip}"
@@ -17,8 +17,10 @@ from PyQt6.QtWidgets import (
     QHBoxLayout, QCheckBox, QPushButton, QTextEdit, QMessageBox
 )
 
-from utils.universal_parser import parse_detail_blocks
-from core.client            import MikrotikClient
+from core.client          import MikrotikClient
+from core.query           import query
+from core.queue_converter import CONFLICT_FIELDS
+from core.state           import fresh_section
 
 
 # ───────────────────────── helper HTML builders
@@ -166,20 +168,29 @@ class LeaseReviewPanel(QWidget):
 
     # ────────────────────────────────────────── find conflict
     def _find_conflict(self) -> Optional[dict]:
+        ip = self.lease.get("address", "")
+        sec = fresh_section(self.creds["host"], "/queue simple")
+        if sec is not None:
+            return next(
+                (dict(r) for r in sec.find_all("target", ip)
+                 if r.get("target", "").split("/")[0] == ip),
+                None
+            )
         try:
             with MikrotikClient(
                 self.creds["host"], self.creds["user"],
                 self.creds["password"], self.creds["port"]
             ) as cli:
-                raw = cli.cmd("/queue simple print detail without-paging")
+                recs = (query("/queue simple")
+                        .where(target=f"{ip}/32")
+                        .fields(*CONFLICT_FIELDS)
+                        .fetch(cli))
         except Exception as err:
             QMessageBox.warning(self, "Warning",
                                 f"Could not fetch queue list:\n{err}")
             return None
-        ip = self.lease.get("address", "")
         return next(
-            (r for r in parse_detail_blocks(raw.splitlines(), "/queue simple")
-             if r.get("target", "").split("/")[0] == ip),
+            (r for r in recs if r.get("target", "").split("/")[0] == ip),
             None
         )
 
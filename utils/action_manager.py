@@ -45,7 +45,12 @@ class ActionManager:
     def clear(self):
         self._save([])
 
-    def undo(self, action_id: int, ssh_client) -> None:
+    def undo(self, action_id: int, ssh_client, plan=None) -> int:
+        """
+        Replay the action's inverse commands.  *plan* (e.g.
+        core.write_plan.WritePlanner.plan) may drop the ones the router
+        already satisfies; returns how many were dropped.
+        """
         entry = next((a for a in self._load() if a["id"] == action_id), None)
         if not entry:
             raise ValueError(f"Action {action_id} not found")
@@ -54,10 +59,12 @@ class ActionManager:
         if not inv:
             raise NotImplementedError("Nothing to undo for this action")
 
-        for cmd in inv:
+        cmds = plan(inv) if plan is not None else inv
+        for cmd in cmds:
             out, err = ssh_client.execute(cmd)
             if err or "failure" in out.lower():
                 raise RuntimeError(f"Undo failed on '{cmd}': {err or out}")
+        return len(inv) - len(cmds)
 
 
 # singleton
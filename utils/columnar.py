@@ -0,0 +1,377 @@
+# utils/columnar.py
+"""
+Columnar (NumPy) representation of a parsed RouterOS section.
+
+Built in one pass from ``parse_detail_blocks`` output or straight from the
+``iter_detail_blocks`` stream, a :class:`ColumnarTable` stores
+
+    IPv4 fields   (address, target, dst-address …)  → uint32 + uint8 prefix
+    MAC fields    (mac-address …)                    → uint64
+    rate fields   (rate-limit, max-limit, limit-at)  → two int64 columns
+    header flags  (_flags / _mask)                   → uint64 bitmask
+    everything else                                  → dictionary-encoded
+                                                       categorical (int32 codes)
+
+so filters run as array operations instead of comprehensions over dicts::
+
+    t = ColumnarTable.from_records(recs, "/ip dhcp-server lease")
+    hits = t.has_flags("disabled") & t.in_subnet("address", "10.20.0.0/16") \
+         & t.is_set("rate-limit")
+    rows = t.records(hits)
+
+A field that holds anything its typed column cannot represent exactly
+(e.g. an interface name in ``gateway``) is stored as a categorical, so
+``records()`` always returns the original strings.
+
+numpy is optional.  Without it :data:`HAVE_NUMPY` is False, ColumnarTable
+cannot be built, and :func:`select` filters the record list directly::
+
+    rows = select(recs, "/ip dhcp-server lease", flags=("disabled",),
+                  subnet=("address", "10.20.0.0/16"), is_set=("rate-limit",))
+"""
+from __future__ import annotations
+
+import ipaddress
+from typing import Any, Iterable, Mapping, Sequence
+
+try:
+    import numpy as np
+except ImportError:                 # optional – select() falls back to the lists
+    np = None
+
+from utils.flag_decoder import compile_flags, encode_flags
+
+IPV4_FIELDS = frozenset({
+    "address", "active-address", "dst-address", "target", "network",
+    "pref-src", "gateway", "src-address",
+})
+MAC_FIELDS  = frozenset({"mac-address", "active-mac-address"})
+RATE_FIELDS = frozenset({"rate-limit", "max-limit", "limit-at", "burst-limit"})
+
+_NO_PREFIX = 255
+_UNITS     = {"": 1, "k": 1_000, "M": 1_000_000, "G": 1_000_000_000}
+_HEX       = frozenset("0123456789ABCDEF")
+
+HAVE_NUMPY = np is not None
+
+
+# ─────────────────────────────────────────────────────────── value parsers
+def _ipv4(text: str) -> tuple[int, int] | None:
+    """``"10.0.0.5/32"`` → (address, prefix); None unless it round-trips exactly."""
+    addr, sep, plen = text.partition("/")
+    parts = addr.split(".")
+    if len(parts) != 4:
+        return None
+    value = 0
+    for p in parts:
+        if not p.isdigit() or (len(p) > 1 and p[0] == "0") or int(p) > 255:
+            return None
+        value = (value << 8) | int(p)
+    if not sep:
+        return value, _NO_PREFIX
+    if not plen.isdigit() or (len(plen) > 1 and plen[0] == "0") or int(plen) > 32:
+        return None
+    return value, int(plen)
+
+
+def _mac(text: str) -> int | None:
+    if len(text) != 17 or text[2::3] != ":::::":
+        return None
+    digits = text.replace(":", "")
+    if not _HEX.issuperset(digits):
+        return None
+    return int(digits, 16)
+
+
+def _bps(text: str) -> int | None:
+    num = text.rstrip("kMG")
+    unit = text[len(num):]
+    if not num.isdigit() or unit not in _UNITS:
+        return None
+    return int(num) * _UNITS[unit]
+
+
+def _rate(text: str) -> tuple[int, int] | None:
+    """``"8300k/82100k …"`` → (upload, download) in bit/s (first pair only)."""
+    first = text.split(None, 1)[0] if text else ""
+    up, sep, down = first.partition("/")
+    up_bps, down_bps = _bps(up), _bps(down)
+    if not sep or up_bps is None or down_bps is None:
+        return None
+    return up_bps, down_bps
+
+
+# ───────────────────────────────────────────────────────────────── columns
+class CategoricalColumn:
+    """int32 codes into *categories*; -1 = field absent."""
+
+    def __init__(self, values: list[str | None]):
+        lookup: dict[str, int] = {}
+        codes = []
+        for val in values:
+            if val is None:
+                codes.append(-1)
+                continue
+            code = lookup.get(val)
+            if code is None:
+                code = lookup[val] = len(lookup)
+            codes.append(code)
+        self.codes      = np.array(codes, dtype=np.int32)
+        self.categories = np.array(list(lookup), dtype=object)
+        self._lookup    = lookup
+
+    @property
+    def valid(self) -> np.ndarray:
+        return self.codes >= 0
+
+    def code_of(self, value: str) -> int:
+        return self._lookup.get(value, -2)      # -2 never matches
+
+    def equals(self, value: str) -> np.ndarray:
+        return self.codes == self.code_of(value)
+
+    def is_set(self) -> np.ndarray:
+        return self.valid & (self.codes != self.code_of(""))
+
+    def value(self, i: int) -> str | None:
+        code = self.codes[i]
+        return None if code < 0 else self.categories[code]
+
+
+class IPv4Column:
+    def __init__(self, parsed: list[tuple[int, int] | None]):
+        self.valid  = np.array([p is not None for p in parsed], dtype=bool)
+        self.values = np.array([p[0] if p else 0 for p in parsed], dtype=np.uint32)
+        self.prefix = np.array([p[1] if p else _NO_PREFIX for p in parsed], dtype=np.uint8)
+
+    def in_subnet(self, cidr: str) -> np.ndarray:
+        net  = ipaddress.IPv4Network(cidr, strict=False)
+        mask = np.uint32(int(net.netmask))
+        return self.valid & ((self.values & mask) == np.uint32(int(net.network_address)))
+
+    def equals(self, value: str) -> np.ndarray:
+        item = _ipv4(value)
+        if item is None:
+            return np.zeros(len(self.values), dtype=bool)
+        hit = self.valid & (self.values == np.uint32(item[0]))
+        if item[1] != _NO_PREFIX:
+            hit &= self.prefix == item[1]
+        return hit
+
+    def is_set(self) -> np.ndarray:
+        return self.valid
+
+    def value(self, i: int) -> str | None:
+        if not self.valid[i]:
+            return None
+        text = str(ipaddress.IPv4Address(int(self.values[i])))
+        return text if self.prefix[i] == _NO_PREFIX else f"{text}/{self.prefix[i]}"
+
+
+class MacColumn:
+    def __init__(self, parsed: list[int | None]):
+        self.values = np.array([0 if v is None else v for v in parsed], dtype=np.uint64)
+        self.valid  = np.array([v is not None for v in parsed], dtype=bool)
+
+    def equals(self, value: str) -> np.ndarray:
+        mac = _mac(value.upper())
+        if mac is None:
+            return np.zeros(len(self.values), dtype=bool)
+        return self.valid & (self.values == np.uint64(mac))
+
+    def is_set(self) -> np.ndarray:
+        return self.valid
+
+    def value(self, i: int) -> str | None:
+        if not self.valid[i]:
+            return None
+        digits = f"{int(self.values[i]):012X}"
+        return ":".join(digits[j:j + 2] for j in range(0, 12, 2))
+
+
+class RateColumn:
+    """Upload / download bit/s as two int64 columns; -1 = unset or unparsable."""
+
+    def __init__(self, values: list[str | None]):
+        seen: dict[str, tuple[int, int]] = {}     # rates repeat a lot
+        pairs = []
+        for val in values:
+            pair = seen.get(val) if val else None
+            if pair is None and val:
+                pair = seen[val] = _rate(val) or (-1, -1)
+            pairs.append(pair or (-1, -1))
+        self.up   = np.array([p[0] for p in pairs], dtype=np.int64)
+        self.down = np.array([p[1] for p in pairs], dtype=np.int64)
+        self.text = CategoricalColumn(values)   # lossless display / round-trip
+
+    @property
+    def valid(self) -> np.ndarray:
+        return self.text.valid
+
+    def equals(self, value: str) -> np.ndarray:
+        return self.text.equals(value)
+
+    def is_set(self) -> np.ndarray:
+        return self.up >= 0
+
+    def value(self, i: int) -> str | None:
+        return self.text.value(i)
+
+
+# ─────────────────────────────────────────────────────────────────── table
+class ColumnarTable:
+    def __init__(self, section: str, n_rows: int, columns: dict[str, Any],
+                 flags: np.ndarray):
+        self.section   = section
+        self.columns   = columns
+        self.flags     = flags                  # uint64 bitmask per row (_mask)
+        self.flag_bits = compile_flags(section).bits    # flag letter / name → bit
+        self._n        = n_rows
+
+    # ---------------------------------------------------------------- build
+    @classmethod
+    def from_records(cls, records: Iterable[Mapping[str, Any]], section: str) -> "ColumnarTable":
+        """Single pass over *records* (a list or a live iterator)."""
+        if not HAVE_NUMPY:
+            raise ImportError("ColumnarTable needs numpy")
+        raw: dict[str, list] = {}
+        n = 0
+        for rec in records:
+            for key, val in rec.items():
+                col = raw.get(key)
+                if col is None:
+                    col = raw[key] = []
+                if len(col) < n:            # field absent in earlier rows
+                    col.extend([None] * (n - len(col)))
+                col.append(val)
+            n += 1
+        for col in raw.values():
+            col.extend([None] * (n - len(col)))
+
+        # the bitmask is derived from _flags, so it is rebuilt on the way out
+        raw.pop("_mask", None)
+        combos = raw.pop("_flags", [None] * n)
+        flags  = np.array([encode_flags(c) if c else 0 for c in combos], dtype=np.uint64)
+
+        columns: dict[str, Any] = {"_flags": CategoricalColumn(combos)}
+        for key, values in raw.items():
+            columns[key] = cls._build_column(key, values)
+        return cls(section, n, columns, flags)
+
+    @staticmethod
+    def _build_column(key: str, values: list):
+        if key in IPV4_FIELDS:
+            parsed = [None if v is None else _ipv4(v) for v in values]
+            if all(p is not None for p, v in zip(parsed, values) if v is not None):
+                return IPv4Column(parsed)
+        elif key in MAC_FIELDS:
+            parsed = [None if v is None else _mac(v) for v in values]
+            if all(p is not None for p, v in zip(parsed, values) if v is not None):
+                return MacColumn(parsed)
+        elif key in RATE_FIELDS:
+            return RateColumn(values)
+        return CategoricalColumn(values)
+
+    # ---------------------------------------------------------------- query
+    def __len__(self) -> int:
+        return self._n
+
+    def __getitem__(self, key: str):
+        return self.columns[key]
+
+    def has_flags(self, *names: str) -> np.ndarray:
+        """Rows carrying *all* given flags (letters or decoded names)."""
+        want = 0
+        for name in names:
+            bit = self.flag_bits.get(name)
+            if bit is None:
+                return np.zeros(self._n, dtype=bool)
+            want |= bit
+        return (self.flags & np.uint64(want)) == np.uint64(want)
+
+    def in_subnet(self, key: str, cidr: str) -> np.ndarray:
+        col = self.columns.get(key)
+        if not isinstance(col, IPv4Column):
+            return np.zeros(self._n, dtype=bool)
+        return col.in_subnet(cidr)
+
+    def equals(self, key: str, value: str) -> np.ndarray:
+        col = self.columns.get(key)
+        if col is None:
+            return np.zeros(self._n, dtype=bool)
+        return col.equals(value)
+
+    def is_set(self, key: str) -> np.ndarray:
+        """Field present and not empty (for rates: parsable)."""
+        col = self.columns.get(key)
+        if col is None:
+            return np.zeros(self._n, dtype=bool)
+        return col.is_set()
+
+    # --------------------------------------------------------------- decode
+    def record(self, i: int) -> dict[str, Any]:
+        rec: dict[str, Any] = {}
+        for key, col in self.columns.items():
+            val = col.value(i)
+            if val is not None:
+                rec[key] = val
+        if "_flags" in rec:
+            rec["_mask"] = int(self.flags[i])
+        return rec
+
+    def records(self, mask: np.ndarray | None = None) -> list[dict[str, Any]]:
+        rows = range(self._n) if mask is None else np.flatnonzero(mask)
+        return [self.record(int(i)) for i in rows]
+
+
+# ──────────────────────────────────────────────────────────────── select
+def select(records: Sequence[Mapping[str, Any]], section: str, *,
+           flags: Iterable[str] = (), subnet: tuple[str, str] | None = None,
+           is_set: Iterable[str] = ()) -> list:
+    """
+    The *records* (same objects, same order) that carry all *flags*, whose
+    ``subnet[0]`` field lies in ``subnet[1]`` and whose *is_set* fields are
+    present and non-empty (rates: parsable).  Vectorised when numpy is
+    installed, a plain pass over the dicts otherwise.
+    """
+    flags, is_set = tuple(flags), tuple(is_set)
+    if HAVE_NUMPY:
+        table = ColumnarTable.from_records(records, section)
+        hit = table.has_flags(*flags)
+        if subnet is not None:
+            hit &= table.in_subnet(*subnet)
+        for key in is_set:
+            hit &= table.is_set(key)
+        return [records[int(i)] for i in np.flatnonzero(hit)]
+
+    bits = compile_flags(section).bits
+    if any(name not in bits for name in flags):
+        return []
+    want = 0
+    for name in flags:
+        want |= bits[name]
+    if subnet is not None:
+        key, cidr = subnet
+        net = ipaddress.IPv4Network(cidr, strict=False)
+        mask, base = int(net.netmask), int(net.network_address)
+
+    def keep(rec: Mapping[str, Any]) -> bool:
+        if want and encode_flags(rec.get("_flags")) & want != want:
+            return False
+        if subnet is not None:
+            parsed = _ipv4(rec.get(key) or "")
+            if parsed is None or parsed[0] & mask != base:
+                return False
+        for name in is_set:
+            val = rec.get(name)
+            if not val or (name in RATE_FIELDS and _rate(val) is None):
+                return False
+        return True
+
+    return [rec for rec in records if keep(rec)]
+
+
+__all__ = [
+    "ColumnarTable", "CategoricalColumn", "IPv4Column", "MacColumn", "RateColumn",
+    "HAVE_NUMPY", "select",
+]
@@ -0,0 +1,162 @@
+# utils/customers.py
+"""
+One row per customer: DHCP lease ⋈ simple queue ⋈ ARP entry ⋈ the
+``/ip address`` subnet the customer sits in.
+
+The join is a hash join – queues and ARP entries are looked up by IP in
+the utils.index hash indexes (reused from the store's snapshots when
+given) and subnets by masking the address once per configured prefix
+length – so a whole router is joined in one pass over its leases::
+
+    customers = join_customers(leases, queues, arp, addresses)
+    c = customers[0]
+    c.ip, c.mac, c.queue.get("max-limit"), c.network, c.online
+
+Static queues whose target has no lease become customers too (lease
+``None``); ARP entries without a lease or queue are not customers.
+"""
+from __future__ import annotations
+
+import ipaddress
+import socket
+from typing import Any, Iterable, Mapping
+
+from utils.index import HashIndex, build_indexes, norm_ip, norm_mac
+
+Rec = Mapping[str, Any]
+
+
+# ─────────────────────────────────────────────────────────────── subnets
+def _ip4(text: str) -> int | None:
+    try:
+        return int.from_bytes(socket.inet_aton(text), "big")
+    except OSError:
+        return None
+
+
+class SubnetTable:
+    """Longest-prefix match of IPv4 addresses against ``/ip address`` entries."""
+
+    def __init__(self, addresses: Iterable[Rec] = ()) -> None:
+        # prefix length → {network bits: (address record, "net/len")}, longest first
+        by_len: dict[int, dict[int, tuple[Rec, str]]] = {}
+        for rec in addresses:
+            try:
+                net = ipaddress.IPv4Interface(rec.get("address", "")).network
+            except ValueError:
+                continue
+            key = int(net.network_address) >> (32 - net.prefixlen)
+            by_len.setdefault(net.prefixlen, {}).setdefault(key, (rec, str(net)))
+        self._tables = sorted(by_len.items(), reverse=True)
+
+    def find(self, ip: str) -> tuple[Rec, str] | None:
+        """``(address record, "10.0.0.0/24")`` of the narrowest subnet holding *ip*."""
+        value = _ip4(ip)
+        if value is None:
+            return None
+        for plen, table in self._tables:
+            hit = table.get(value >> (32 - plen))
+            if hit is not None:
+                return hit
+        return None
+
+
+# ─────────────────────────────────────────────────────────────── customer
+class Customer:
+    """The joined records of one customer IP (any part may be missing)."""
+
+    __slots__ = ("ip", "lease", "queue", "arp", "address", "network")
+
+    def __init__(self, ip: str, lease: Rec | None, queue: Rec | None,
+                 arp: Rec | None, subnet: tuple[Rec, str] | None = None) -> None:
+        self.ip      = ip
+        self.lease   = lease
+        self.queue   = queue
+        self.arp     = arp
+        # /ip address entry of the customer's subnet and that subnet ("10.0.0.0/24")
+        self.address, self.network = subnet if subnet is not None else (None, "")
+
+    def __repr__(self) -> str:
+        return f"<Customer {self.ip} {self.mac or '-'}>"
+
+    def _get(self, rec: Rec | None, key: str) -> str:
+        return rec.get(key, "") if rec is not None else ""
+
+    @property
+    def mac(self) -> str:
+        return norm_mac(self._get(self.lease, "mac-address") or self._get(self.arp, "mac-address"))
+
+    @property
+    def host_name(self) -> str:
+        return self._get(self.lease, "host-name")
+
+    @property
+    def name(self) -> str:
+        """Lease comment, else the queue's comment or name."""
+        return (self._get(self.lease, "comment") or self._get(self.queue, "comment")
+                or self._get(self.queue, "name"))
+
+    @property
+    def rate(self) -> str:
+        """Queue max-limit, else the lease rate-limit."""
+        return self._get(self.queue, "max-limit") or self._get(self.lease, "rate-limit")
+
+    @property
+    def interface(self) -> str:
+        return self._get(self.address, "interface") or self._get(self.arp, "interface")
+
+    @property
+    def online(self) -> bool:
+        return self.arp is not None and not self.mac_mismatch
+
+    @property
+    def mac_mismatch(self) -> bool:
+        """The ARP entry answers with another MAC than the lease's."""
+        lease_mac = norm_mac(self._get(self.lease, "mac-address"))
+        arp_mac   = norm_mac(self._get(self.arp, "mac-address"))
+        return bool(lease_mac and arp_mac and lease_mac != arp_mac)
+
+
+# ─────────────────────────────────────────────────────────────────── join
+def join_customers(
+    leases: Iterable[Rec],
+    queues: Iterable[Rec] = (),
+    arp: Iterable[Rec] = (),
+    addresses: Iterable[Rec] = (),
+    *,
+    queue_index: HashIndex | None = None,
+    arp_index: HashIndex | None = None,
+) -> list[Customer]:
+    """
+    Join the four tables by IP.  *queue_index* (queues by ``target``) and
+    *arp_index* (ARP by ``address``) are built here unless passed in.
+    """
+    queues = tuple(queues)
+    if queue_index is None:
+        queue_index = build_indexes("/queue simple", queues)["target"]
+    if arp_index is None:
+        arp_index = build_indexes("/ip arp", arp)["address"]
+    subnets = SubnetTable(addresses)
+    # keys below are normalized once, so the indexes need not do it again
+    find_queue, find_arp = queue_index.get_normalized, arp_index.get_normalized
+    find_net = subnets.find
+
+    customers: list[Customer] = []
+    seen: set[str] = set()
+    for lease in leases:
+        ip = norm_ip(lease.get("address"))
+        if not ip or ip in seen:
+            continue
+        seen.add(ip)
+        customers.append(Customer(ip, lease, find_queue(ip), find_arp(ip), find_net(ip)))
+
+    # static queues of hosts without a lease
+    for ip in queue_index.keys():
+        if ip in seen or "/" in ip:
+            continue
+        seen.add(ip)
+        customers.append(Customer(ip, None, find_queue(ip), find_arp(ip), find_net(ip)))
+    return customers
+
+
+__all__ = ["Customer", "SubnetTable", "join_customers"]
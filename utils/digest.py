@@ -0,0 +1,121 @@
+# utils/digest.py
+"""
+Content digests of raw command output, to skip work on unchanged refreshes.
+
+A page keeps one :class:`OutputDigests` and hands it to its runner.  The
+runner hashes the raw lines as they arrive; when the digest for
+(router, command) matches the previous refresh, parsing and re-rendering
+are skipped and the refresh costs only the transfer::
+
+    self._digests = OutputDigests()
+    runner = RecordStreamRunner(client, cmd, "/queue simple", digests=self._digests)
+
+Hits and misses of every consumer are counted in :data:`digest_stats`.
+"""
+from __future__ import annotations
+
+import hashlib
+import threading
+from typing import Iterable, Iterator
+
+
+class DigestStats:
+    """Process-wide hit/miss counter (thread-safe)."""
+
+    def __init__(self) -> None:
+        self.hits   = 0
+        self.misses = 0
+        self._lock  = threading.Lock()
+
+    def record(self, hit: bool) -> None:
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    @property
+    def ratio(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def summary(self) -> str:
+        return f"{self.ratio:.0%} unchanged ({self.hits}/{self.hits + self.misses})"
+
+    def reset(self) -> None:
+        with self._lock:
+            self.hits = self.misses = 0
+
+
+digest_stats = DigestStats()
+
+
+class LineHasher:
+    """Incremental digest over lines; wraps a stream without buffering it."""
+
+    def __init__(self) -> None:
+        self._h = hashlib.blake2b(digest_size=16)
+
+    def update(self, line: str) -> None:
+        self._h.update(line.encode("utf-8", "surrogatepass"))
+        self._h.update(b"\n")
+
+    def feed(self, lines: Iterable[str]) -> Iterator[str]:
+        for line in lines:
+            self.update(line)
+            yield line
+
+    def digest(self) -> bytes:
+        return self._h.digest()
+
+
+def digest_lines(lines: Iterable[str]) -> bytes:
+    hasher = LineHasher()
+    for line in lines:
+        hasher.update(line)
+    return hasher.digest()
+
+
+class OutputDigests:
+    """Last output digest per (host, command) for one consumer."""
+
+    def __init__(self, stats: DigestStats = digest_stats) -> None:
+        self.stats = stats
+        self._last: dict[tuple[str, str], bytes] = {}
+        self._lock = threading.Lock()
+
+    def known(self, host: str, command: str) -> bool:
+        with self._lock:
+            return (host, command) in self._last
+
+    def unchanged(self, host: str, command: str, digest: bytes) -> bool:
+        """Store *digest*; True if it equals the previous one (a hit)."""
+        key = (host, command)
+        with self._lock:
+            hit = self._last.get(key) == digest
+            self._last[key] = digest
+        self.stats.record(hit)
+        return hit
+
+    def get(self, host: str, command: str) -> bytes | None:
+        with self._lock:
+            return self._last.get((host, command))
+
+    def seed(self, host: str, command: str, digest: bytes) -> None:
+        """Remember *digest* from elsewhere (e.g. a saved snapshot) without counting it."""
+        with self._lock:
+            self._last.setdefault((host, command), digest)
+
+    def forget(self, host: str | None = None, command: str | None = None) -> None:
+        """Drop stored digests (all, one host, or one host/command)."""
+        with self._lock:
+            if host is None:
+                self._last.clear()
+            elif command is None:
+                for key in [k for k in self._last if k[0] == host]:
+                    del self._last[key]
+            else:
+                self._last.pop((host, command), None)
+
+
+__all__ = ["DigestStats", "digest_stats", "LineHasher", "digest_lines", "OutputDigests"]
@@ -0,0 +1,185 @@
+# utils/export_parser.py
+"""
+Parser for RouterOS ``/export`` output.
+
+One ``/export terse`` (or ``/export verbose``) returns the whole static
+configuration, so a router can be read in a single round-trip instead of
+one ``print detail`` per section.  :func:`parse_export` turns it into the
+same per-section records the print parsers produce::
+
+    /ip address                                  {"/ip address": [
+    add address=10.0.0.1/24 interface=bridge  →     {"address": "10.0.0.1/24",
+                                                     "interface": "bridge"}, …],
+    /ip dhcp-server lease add address=10.0.0.5 \\     "/ip dhcp-server lease": [
+        comment="Jane \\"JJ\\" Doe" disabled=yes        {"address": "10.0.0.5",
+                                                     "comment": 'Jane "JJ" Doe',
+                                                     "_flags": "X", …}]}
+
+Handled:
+  * plain exports (a ``/menu`` line followed by commands) and ``terse``
+    exports (the menu repeated in front of every command),
+  * ``\\`` line continuations – also inside quoted strings,
+  * RouterOS escapes in quoted values (``\\"`` ``\\\\`` ``\\n`` ``\\t`` ``\\$``
+    ``\\?`` ``\\_`` and ``\\HH`` byte escapes),
+  * ``set [ find default-name=ether1 ] …`` – the ``find`` keys are merged
+    into the record,
+  * bare words such as ``blackhole`` (read as ``=yes``) and boolean
+    properties, folded into ``_flags`` / ``_mask`` like ``print as-value``.
+
+Every record also carries the export command under ``_op`` (``add`` /
+``set``) and, for ``set <name>``, the item under ``_item``.  Dynamic
+entries are never exported – read those with ``print`` (see
+core.snapshot).
+"""
+from __future__ import annotations
+
+import re
+from typing import Any, Iterable, Iterator
+
+from utils.wire_formats import fold_flag_properties
+
+# commands that describe an item; anything else (remove, move …) is skipped
+_ITEM_COMMANDS = frozenset({"add", "set"})
+_MENU_COMMANDS = _ITEM_COMMANDS | {"remove", "unset", "enable", "disable", "move", "edit"}
+
+_QUOTED = r'"(?:\\.|[^"\\])*"'
+_TOKEN_RE = re.compile(
+    rf"""
+      (?P<find>\[(?:{_QUOTED}|[^\]"])*\])                  # [ find … ]
+    | (?P<key>[^\s=\["]+)=(?P<val>{_QUOTED}|[^\s"]\S*|)   # key=value
+    | (?P<word>\S+)                                       # bare word
+    """,
+    re.X,
+)
+_ESCAPE_RE = re.compile(r"\\(?:([0-9A-Fa-f]{2})|(.))", re.S)
+_SIMPLE_ESCAPES = {
+    "n": "\n", "r": "\r", "t": "\t", "a": "\a", "b": "\b", "f": "\f",
+    "v": "\v", "_": " ",
+}
+_ON_ERROR_RE = re.compile(r"^:do\s*\{\s*(?P<body>.*?)\s*\}\s*on-error=\{.*\}\s*$")
+
+
+# ──────────────────────────────────────────────────────────────── strings
+def unescape(value: str) -> str:
+    """
+    Decode a RouterOS value: strip the surrounding quotes and resolve
+    backslash escapes.  ``\\HH`` escapes are raw bytes (RouterOS prints
+    non-ASCII text that way) and are decoded as UTF-8.
+    """
+    if len(value) >= 2 and value[0] == value[-1] == '"':
+        value = value[1:-1]
+    if "\\" not in value:
+        return value
+
+    out = bytearray()
+    pos = 0
+    for m in _ESCAPE_RE.finditer(value):
+        out += value[pos:m.start()].encode()
+        hexbyte, char = m.groups()
+        if hexbyte is not None:
+            out.append(int(hexbyte, 16))
+        else:
+            out += _SIMPLE_ESCAPES.get(char, char).encode()
+        pos = m.end()
+    out += value[pos:].encode()
+    return out.decode("utf-8", errors="replace")
+
+
+def logical_lines(lines: Iterable[str]) -> Iterator[str]:
+    """
+    Join ``\\``-continued lines.  The backslash, the newline and the next
+    line's indentation are dropped, so a quoted string broken across lines
+    comes back whole.  ``#`` comment lines are skipped.
+    """
+    buf = ""
+    for raw in lines:
+        line = raw.rstrip("\r\n")
+        if buf:
+            line = line.lstrip()
+        elif not line.strip() or line.lstrip().startswith("#"):
+            continue
+        # an odd number of trailing backslashes is a continuation
+        stripped = line.rstrip()
+        tail = len(stripped) - len(stripped.rstrip("\\"))
+        if tail % 2:
+            buf += stripped[:-1]
+            continue
+        yield (buf + line).strip()
+        buf = ""
+    if buf.strip():
+        yield buf.strip()
+
+
+# ──────────────────────────────────────────────────────────────── records
+def _split_menu(tokens: list[re.Match]) -> tuple[str | None, list[re.Match]]:
+    """Leading ``/ip dhcp-server lease`` words → menu path, rest of the line."""
+    words: list[str] = []
+    i = 0
+    while i < len(tokens) and tokens[i]["word"] is not None:
+        word = tokens[i]["word"]
+        if word in _MENU_COMMANDS or (words and word.startswith("/")):
+            break
+        words.append(word)
+        i += 1
+    if not words:
+        return None, tokens
+    return " ".join(words), tokens[i:]
+
+
+def _find_keys(expr: str) -> dict[str, str]:
+    """``[ find default-name=ether1 ]`` → ``{"default-name": "ether1"}``."""
+    keys: dict[str, str] = {}
+    for m in _TOKEN_RE.finditer(expr.strip("[] ")):
+        if m["key"] is not None and m["key"] != "where":
+            keys[m["key"]] = unescape(m["val"])
+    return keys
+
+
+def parse_export(lines: Iterable[str]) -> dict[str, list[dict[str, Any]]]:
+    """
+    Parse ``/export`` / ``/export terse`` / ``/export verbose`` output into
+    ``{menu path: [records]}``, sections in the order they first appear.
+    """
+    sections: dict[str, list[dict[str, Any]]] = {}
+    menu: str | None = None
+
+    for line in logical_lines(lines):
+        m = _ON_ERROR_RE.match(line)            # RouterOS 7 “:do { add … } on-error={}”
+        if m:
+            line = m["body"]
+        elif line.startswith(":"):
+            continue                            # scripting, not configuration
+
+        tokens = list(_TOKEN_RE.finditer(line))
+        if line.startswith("/"):
+            path, tokens = _split_menu(tokens)
+            if path is not None:
+                menu = path
+        if not tokens or menu is None:
+            continue
+
+        command = tokens[0]["word"]
+        if command not in _ITEM_COMMANDS:
+            continue
+
+        raw: dict[str, Any] = {}
+        item: str | None = None
+        for pos, tok in enumerate(tokens[1:]):
+            if tok["find"] is not None:
+                raw.update(_find_keys(tok["find"]))
+            elif tok["key"] is not None:
+                raw[tok["key"]] = unescape(tok["val"])
+            elif command == "set" and pos == 0:
+                item = unescape(tok["word"])    # “set ether1 …” / “set 0 …”
+            else:
+                raw[tok["word"]] = "yes"        # e.g. “add blackhole …”
+        rec = fold_flag_properties(raw, menu)
+        rec["_op"] = command
+        if item is not None:
+            rec["_item"] = item
+        sections.setdefault(menu, []).append(rec)
+
+    return sections
+
+
+__all__ = ["parse_export", "logical_lines", "unescape"]
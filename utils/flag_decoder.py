@@ -1,48 +1,21 @@
 # utils/flag_decoder.py
 
-from typing import Optional
-
-# Define known flag sets and what they mean
-FLAG_MAP = {
-    'route': {
-        'X': 'disabled',
-        'A': 'active',
-        'D': 'dynamic',
-        'C': 'connected',
-        'S': 'static',
-        'r': 'rip',
-        'b': 'bgp',
-        'o': 'ospf',
-        'm': 'mme',
-        'B': 'blackhole',
-        'U': 'unreachable',
-        'P': 'prohibit'
-    },
-    'arp': {
-        'X': 'disabled',
-        'I': 'invalid',
-        'H': 'DHCP',
-        'D': 'dynamic',
-        'P': 'published',
-        'C': 'complete'
-    },
-    'interface': {
-        'D': 'dynamic',
-        'X': 'disabled',
-        'R': 'running',
-        'S': 'slave'
-    },
-    'interface-list': {
-        '*': 'builtin',
-        'D': 'dynamic'
-    },
-    'dhcp-lease': {
-        'X': 'disabled',
-        'R': 'radius',
-        'D': 'dynamic',
-        'B': 'blocked'
-    }
-}
+"""
+RouterOS header flags (“ 0 XD  …”) as integer bitmasks.
+
+Every flag letter owns one fixed bit (see ``LETTER_BITS``), so the mask of
+a header is independent of the table it came from and two masks can be
+compared directly.  Only the *meaning* of a letter is per section; each
+section's letter/name → bit table is compiled once (``compile_flags``)
+and answers questions like “disabled and dynamic” with one ``&``::
+
+    want = flag_mask("/ip route", "active", "static")
+    static_routes = [r for r in routes if r.get("_mask", 0) & want == want]
+"""
+import string
+from functools import lru_cache
+from typing import Any, Iterable, Iterator, Mapping
+
 
 def normalize_section(section: str) -> str:
     section = section.lower().strip()
@@ -60,54 +33,153 @@ def normalize_section(section: str) -> str:
         return section
 
 
+# Known flag meanings per normalised section
+_SECTION_FLAGS: dict[str, dict[str, str]] = {
+    "/ip route": {
+        "X": "disabled",
+        "A": "active",
+        "D": "dynamic",
+        "C": "connect",
+        "S": "static",
+        "r": "rip",
+        "b": "bgp",
+        "o": "ospf",
+        "m": "mme",
+        "B": "blackhole",
+        "U": "unreachable",
+        "P": "prohibit",
+    },
+    "/interface": {
+        "D": "dynamic",
+        "X": "disabled",
+        "R": "running",
+        "S": "slave",
+    },
+    "/ip arp": {
+        "X": "disabled",
+        "I": "invalid",
+        "H": "dhcp",
+        "D": "dynamic",
+        "P": "published",
+        "C": "complete",
+    },
+    "/ip dhcp-server lease": {
+        "X": "disabled",
+        "R": "radius",
+        "D": "dynamic",
+        "B": "blocked",
+    },
+    "/interface list": {
+        "*": "builtin",
+        "D": "dynamic",
+    },
+}
+
+# one bit per header letter, shared by every section
+FLAG_ALPHABET = string.ascii_uppercase + string.ascii_lowercase + "*"
+LETTER_BITS: dict[str, int] = {ch: 1 << i for i, ch in enumerate(FLAG_ALPHABET)}
+
+
+# boolean properties every table reports the same way (as-value / JSON)
+_COMMON_LETTERS = {"disabled": "X", "dynamic": "D", "invalid": "I"}
+
+
+class FlagTable:
+    """Compiled flag table of one section – build through :func:`compile_flags`."""
+
+    __slots__ = ("section", "letters", "bits")
+
+    def __init__(self, section: str, letters: dict[str, str]):
+        self.section = section
+        self.letters = letters                      # letter → meaning
+        bits = {name: LETTER_BITS[ch] for name, ch in _COMMON_LETTERS.items()}
+        for ch, name in letters.items():
+            bits[name] = LETTER_BITS[ch]
+        bits.update(LETTER_BITS)                    # letters always resolve
+        self.bits = bits                            # letter / name → bit
+
+    def mask(self, *names: str) -> int:
+        """OR of the bits for *names* (letters or meanings)."""
+        want = 0
+        for name in names:
+            try:
+                want |= self.bits[name]
+            except KeyError:
+                raise KeyError(f"unknown flag {name!r} for {self.section}") from None
+        return want
+
+    def names(self, mask: int) -> list[str]:
+        """Meanings of the bits set in *mask*, in alphabet order."""
+        return [self.letters.get(ch, ch) for ch in flag_string(mask)]
+
+
+@lru_cache(maxsize=None)
+def compile_flags(section: str) -> FlagTable:
+    """Per-section :class:`FlagTable` (any spelling normalize_section accepts)."""
+    norm = normalize_section(section)
+    return FlagTable(norm, _SECTION_FLAGS.get(norm, {}))
+
+
+def flag_table(section: str) -> dict[str, str]:
+    """Flag letter → meaning for *section*."""
+    return compile_flags(section).letters
+
+
+@lru_cache(maxsize=None)
+def flag_letters(section: str) -> dict[str, str]:
+    """Inverse of :func:`flag_table` – property name → flag letter."""
+    letters = dict(_COMMON_LETTERS)
+    letters.update({name: ch for ch, name in flag_table(section).items()})
+    return letters
+
+
+# ──────────────────────────────────────────────────────────────── masks
+@lru_cache(maxsize=1024)
+def encode_flags(flags: str | None) -> int:
+    """Header flags string (``"XD"``) → bitmask; unknown characters are dropped."""
+    mask = 0
+    for ch in flags or ():
+        mask |= LETTER_BITS.get(ch, 0)
+    return mask
+
+
+def flag_string(mask: int) -> str:
+    """Bitmask → flag letters in alphabet order."""
+    return "".join(ch for ch, bit in LETTER_BITS.items() if mask & bit)
+
+
+def flag_mask(section: str, *names: str) -> int:
+    """Bitmask for *names* – flag letters or their meaning in *section*."""
+    return compile_flags(section).mask(*names)
+
+
+def has_flags(mask: int, want: int) -> bool:
+    """All bits of *want* set in *mask*."""
+    return mask & want == want
+
+
+def has_any_flag(mask: int, want: int) -> bool:
+    return bool(mask & want)
+
+
+def filter_flags(records: Iterable[Mapping[str, Any]], section: str, *names: str,
+                 without: Iterable[str] = ()) -> Iterator[Mapping[str, Any]]:
+    """
+    Records of *section* carrying every flag in *names* and none in
+    *without*, e.g. ``filter_flags(routes, "/ip route", "A", without=["D"])``.
+    """
+    table = compile_flags(section)
+    want  = table.mask(*names)
+    deny  = table.mask(*without)
+    for rec in records:
+        mask = rec.get("_mask", 0)
+        if mask & want == want and not mask & deny:
+            yield rec
+
+
 def decode_flags(flags: str, section: str) -> dict[str, bool]:
+    """Header flags → ``{meaning: True}``, for callers that want names."""
     if not flags:
         return {}
-
-    # Known flag meanings per section
-    section_flags = {
-        "/ip route": {
-            "X": "disabled",
-            "A": "active",
-            "D": "dynamic",
-            "C": "connect",
-            "S": "static",
-            "r": "rip",
-            "b": "bgp",
-            "o": "ospf",
-            "m": "mme",
-            "B": "blackhole",
-            "U": "unreachable",
-            "P": "prohibit",
-        },
-        "/interface": {
-            "D": "dynamic",
-            "X": "disabled",
-            "R": "running",
-            "S": "slave",
-        },
-        "/ip arp": {
-            "X": "disabled",
-            "I": "invalid",
-            "H": "dhcp",
-            "D": "dynamic",
-            "P": "published",
-            "C": "complete",
-        },
-        "/ip dhcp-server lease": {
-            "X": "disabled",
-            "R": "radius",
-            "D": "dynamic",
-            "B": "blocked",
-        },
-    }
-
-    results = {}
-    flag_map = section_flags.get(normalize_section(section), {})
-    for char in flags:
-        if char in flag_map:
-            results[flag_map[char]] = True
-        else:
-            results[char] = True  # catch-all for unknowns
-
-    return results
+    table = flag_table(section)
+    return {table.get(ch, ch): True for ch in flags}
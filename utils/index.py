@@ -0,0 +1,160 @@
+# utils/index.py
+"""
+Secondary hash indexes over parsed router tables.
+
+Lookups such as "the queue whose target is 10.0.0.5" or "the lease with
+MAC AA:BB:…" are O(1) dictionary hits instead of a scan with
+``clean_field`` / ``split("/")`` per record::
+
+    idx = build_indexes("/queue simple", records)
+    idx["target"].get("10.0.0.5")          # first match or None
+    idx["name"].get_all("Jane")            # every match
+
+Keys are normalized once, when a record is added: names are unquoted,
+queue targets are split into their addresses without the ``/32``, MACs
+are upper-case with colons.  Look-ups normalize the key the same way.
+Indexes can be filled record by record while a table streams in
+(:meth:`IndexSet.add`) and patched with :meth:`HashIndex.remove`.
+"""
+from __future__ import annotations
+
+from typing import Any, Callable, Iterable, Mapping
+
+from utils.text import clean_field
+
+KeysOf = Callable[[Mapping[str, Any]], Iterable[str]]
+
+
+# ──────────────────────────────────────────────────────────── normalizers
+def norm_name(value: str | None) -> str:
+    return clean_field(value)
+
+
+def norm_ip(value: str | None) -> str:
+    """``"10.0.0.5/32"`` → ``"10.0.0.5"`` (other prefixes are kept as-is)."""
+    value = clean_field(value)
+    return value[:-3] if value.endswith("/32") else value
+
+
+def norm_mac(value: str | None) -> str:
+    return clean_field(value).upper().replace("-", ":")
+
+
+def _one(field: str, norm: Callable[[str | None], str]) -> KeysOf:
+    def keys(rec: Mapping[str, Any]) -> Iterable[str]:
+        key = norm(rec.get(field))
+        return (key,) if key else ()
+    return keys
+
+
+def _targets(rec: Mapping[str, Any]) -> Iterable[str]:
+    # "10.0.0.5/32,10.0.0.6/32" – a queue can shape several addresses
+    return tuple(k for k in map(norm_ip, clean_field(rec.get("target")).split(",")) if k)
+
+
+#: index name → (keys of a record, normalizer for look-ups), per menu path
+INDEX_SPECS: dict[str, dict[str, tuple[KeysOf, Callable[[str | None], str]]]] = {
+    "/queue simple": {
+        "name":   (_one("name", norm_name), norm_name),
+        "target": (_targets, norm_ip),
+    },
+    "/ip dhcp-server lease": {
+        "address": (_one("address", norm_ip), norm_ip),
+        "mac":     (_one("mac-address", norm_mac), norm_mac),
+    },
+    "/ip arp": {
+        "address": (_one("address", norm_ip), norm_ip),
+        "mac":     (_one("mac-address", norm_mac), norm_mac),
+    },
+}
+
+
+# ──────────────────────────────────────────────────────────────── indexes
+class HashIndex:
+    """Normalized key → records (insertion order kept per key)."""
+
+    __slots__ = ("name", "keys_of", "norm", "_map")
+
+    def __init__(self, name: str, keys_of: KeysOf,
+                 norm: Callable[[str | None], str] = clean_field) -> None:
+        self.name    = name
+        self.keys_of = keys_of
+        self.norm    = norm
+        self._map: dict[str, list] = {}
+
+    def __len__(self) -> int:
+        return len(self._map)
+
+    def __contains__(self, key: str) -> bool:
+        return self.norm(key) in self._map
+
+    def add(self, rec) -> None:
+        for key in self.keys_of(rec):
+            self._map.setdefault(key, []).append(rec)
+
+    def remove(self, rec) -> None:
+        """Drop *rec* (matched by identity) from every key it is filed under."""
+        for key in self.keys_of(rec):
+            bucket = self._map.get(key)
+            if not bucket:
+                continue
+            bucket[:] = [r for r in bucket if r is not rec]
+            if not bucket:
+                del self._map[key]
+
+    def get(self, key: str | None, default=None):
+        bucket = self._map.get(self.norm(key))
+        return bucket[0] if bucket else default
+
+    def get_normalized(self, key: str, default=None):
+        """:meth:`get` for a key that is already normalized (hot loops)."""
+        bucket = self._map.get(key)
+        return bucket[0] if bucket else default
+
+    def get_all(self, key: str | None) -> list:
+        return list(self._map.get(self.norm(key), ()))
+
+    def keys(self):
+        return self._map.keys()
+
+
+class IndexSet(dict):
+    """``{index name: HashIndex}`` for one table."""
+
+    def copy(self) -> "IndexSet":
+        """Independent copy – patching it leaves this set (and its readers) alone."""
+        out = IndexSet()
+        for name, index in self.items():
+            dup = out[name] = HashIndex(name, index.keys_of, index.norm)
+            dup._map = {key: list(bucket) for key, bucket in index._map.items()}
+        return out
+
+    def add(self, rec) -> None:
+        for index in self.values():
+            index.add(rec)
+
+    def remove(self, rec) -> None:
+        for index in self.values():
+            index.remove(rec)
+
+
+def new_indexes(section: str) -> IndexSet:
+    """Empty indexes for *section* (no entries if the menu has no spec)."""
+    return IndexSet({
+        name: HashIndex(name, keys_of, norm)
+        for name, (keys_of, norm) in INDEX_SPECS.get(section, {}).items()
+    })
+
+
+def build_indexes(section: str, records: Iterable[Any]) -> IndexSet:
+    indexes = new_indexes(section)
+    if indexes:
+        for rec in records:
+            indexes.add(rec)
+    return indexes
+
+
+__all__ = [
+    "HashIndex", "IndexSet", "INDEX_SPECS", "new_indexes", "build_indexes",
+    "norm_name", "norm_ip", "norm_mac",
+]
@@ -6,13 +6,12 @@ HOST = "192.168.0.1"
 USERNAME = "Temp"
 PASSWORD = "TempPassword123"
 
+# full configuration in one export, plus what /export leaves out
 COMMANDS = [
-    "/ip route print detail without-paging",
-    "/ip dhcp-server lease print detail without-paging",
-    "/ip arp print detail without-paging",
-    "/interface print detail without-paging",
-    "/interface list print detail without-paging",
-    "/queue simple print detail without-paging",
+    "/export terse",
+    "/ip route print detail without-paging where dynamic",
+    "/ip dhcp-server lease print detail without-paging where dynamic",
+    "/ip arp print detail without-paging where dynamic",
 ]
 
 
@@ -0,0 +1,197 @@
+# utils/records.py
+"""
+Compact, read-only record types for parsed RouterOS tables.
+
+A parsed record is normally a plain ``dict[str, str]``: every lease or
+queue carries its own copy of the ~20 key strings and its own hash table.
+The classes here keep one *key table* per section (shared by every record
+of that type) and store only a tuple of values per record, with every
+string value interned so repeated values such as
+``default-small/default-small`` or an interface name exist once.
+
+Records behave like a read-only mapping – ``rec["name"]``, ``rec.get()``,
+``in``, ``keys()/items()``, ``dict(rec)`` and ``==`` against a dict all
+work – so pages and controllers that were written for dicts keep working.
+
+    recs = compact_records(iter_detail_blocks(lines, "/queue simple"),
+                           "/queue simple")
+"""
+from __future__ import annotations
+
+import sys
+import threading
+from collections.abc import Mapping
+from typing import Any, ClassVar, Iterable, Iterator
+
+from utils.flag_decoder import normalize_section
+
+_intern = sys.intern
+
+
+class Record(Mapping):
+    """Base class – one shared key table per subclass, one value tuple per record."""
+
+    __slots__ = ("_values",)
+
+    SECTION: ClassVar[str] = ""
+    #: common keys, seeded into the key table so their order is stable
+    FIELDS: ClassVar[tuple[str, ...]] = ()
+
+    _index: ClassVar[dict[str, int]]
+    _names: ClassVar[list[str]]
+    _lock:  ClassVar[threading.Lock]
+
+    def __init_subclass__(cls, **kw):
+        super().__init_subclass__(**kw)
+        cls._names = []
+        cls._index = {}
+        cls._lock  = threading.Lock()
+        for name in ("_flags", "_mask", *cls.FIELDS):
+            cls._add_key(name)
+
+    # ---------------------------------------------------------------- build
+    @classmethod
+    def _add_key(cls, key: str) -> int:
+        with cls._lock:
+            idx = cls._index.get(key)
+            if idx is None:
+                idx = len(cls._names)
+                cls._names.append(_intern(key))
+                cls._index[cls._names[idx]] = idx
+            return idx
+
+    @classmethod
+    def from_dict(cls, data: Mapping[str, Any]) -> "Record":
+        index  = cls._index
+        values = [None] * len(cls._names)
+        for key, val in data.items():
+            idx = index.get(key)
+            if idx is None:
+                idx = cls._add_key(key)
+            if idx >= len(values):
+                values.extend([None] * (idx + 1 - len(values)))
+            values[idx] = _intern(val) if val.__class__ is str else val
+        rec = object.__new__(cls)
+        rec._values = tuple(values)
+        return rec
+
+    # ---------------------------------------------------------- mapping API
+    def __getitem__(self, key: str) -> Any:
+        idx = self._index.get(key)
+        if idx is not None and idx < len(self._values):
+            val = self._values[idx]
+            if val is not None:
+                return val
+        raise KeyError(key)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        idx = self._index.get(key)
+        if idx is not None and idx < len(self._values):
+            val = self._values[idx]
+            if val is not None:
+                return val
+        return default
+
+    def __contains__(self, key: object) -> bool:
+        return self.get(key) is not None          # type: ignore[arg-type]
+
+    def __iter__(self) -> Iterator[str]:
+        names = self._names
+        return (names[i] for i, v in enumerate(self._values) if v is not None)
+
+    def __len__(self) -> int:
+        return len(self._values) - self._values.count(None)
+
+    # ---------------------------------------------------------------- misc
+    def to_dict(self) -> dict[str, Any]:
+        return dict(self.items())
+
+    def __reduce__(self):
+        return (self.__class__.from_dict, (self.to_dict(),))
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({self.to_dict()!r})"
+
+
+# ──────────────────────────────────────────────────────── per-section types
+class Lease(Record):
+    __slots__ = ()
+    SECTION = "/ip dhcp-server lease"
+    FIELDS  = (
+        "address", "mac-address", "client-id", "address-lists", "server",
+        "dhcp-option", "rate-limit", "status", "expires-after", "last-seen",
+        "active-address", "active-mac-address", "active-client-id",
+        "active-server", "host-name", "comment",
+    )
+
+
+class SimpleQueue(Record):
+    __slots__ = ()
+    SECTION = "/queue simple"
+    FIELDS  = (
+        "name", "target", "parent", "packet-marks", "priority", "queue",
+        "limit-at", "max-limit", "burst-limit", "burst-threshold",
+        "burst-time", "bucket-size", "comment",
+    )
+
+
+class Route(Record):
+    __slots__ = ()
+    SECTION = "/ip route"
+    FIELDS  = (
+        "dst-address", "pref-src", "gateway", "gateway-status", "distance",
+        "scope", "target-scope", "routing-mark", "vrf-interface", "comment",
+    )
+
+
+class ArpEntry(Record):
+    __slots__ = ()
+    SECTION = "/ip arp"
+    FIELDS  = (
+        "address", "mac-address", "interface", "comment",
+    )
+
+
+class Address(Record):
+    __slots__ = ()
+    SECTION = "/ip address"
+    FIELDS  = (
+        "address", "network", "interface", "actual-interface", "comment",
+    )
+
+
+RECORD_TYPES: dict[str, type[Record]] = {
+    cls.SECTION: cls for cls in (Lease, SimpleQueue, Route, ArpEntry, Address)
+}
+
+
+def record_type(section: str) -> type[Record] | None:
+    """Record class for *section* (``None`` for tables without one)."""
+    norm = normalize_section(section)
+    if norm in RECORD_TYPES:
+        return RECORD_TYPES[norm]
+    # normalize_section only knows the flag-bearing sections
+    for name, cls in RECORD_TYPES.items():
+        if name in norm:
+            return cls
+    return None
+
+
+def compact_records(records: Iterable[Mapping[str, Any]], section: str) -> Iterator[Mapping[str, Any]]:
+    """
+    Convert parsed dicts to the compact type for *section*, lazily.
+    Sections without a record type are passed through unchanged.
+    """
+    cls = record_type(section)
+    if cls is None:
+        yield from records
+        return
+    build = cls.from_dict
+    for rec in records:
+        yield build(rec)
+
+
+__all__ = [
+    "Record", "Lease", "SimpleQueue", "Route", "ArpEntry", "Address",
+    "RECORD_TYPES", "record_type", "compact_records",
+]
@@ -22,3 +22,21 @@ def set_limit_at_default(value):
     settings = load_settings()
     settings["limit_at_default"] = value
     save_settings(settings)
+
+def get_syslog_port():
+    """UDP port for the router's remote logging (0, the default, turns the receiver off)."""
+    return int(load_settings().get("syslog_port", 0))
+
+def set_syslog_port(value):
+    settings = load_settings()
+    settings["syslog_port"] = int(value)
+    save_settings(settings)
+
+def get_syslog_aliases():
+    """Other source addresses a router logs from: ``{source ip: managed host}``."""
+    return dict(load_settings().get("syslog_aliases", {}))
+
+def set_syslog_aliases(value):
+    settings = load_settings()
+    settings["syslog_aliases"] = dict(value)
+    save_settings(settings)
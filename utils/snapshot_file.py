@@ -0,0 +1,192 @@
+# utils/snapshot_file.py
+"""
+Compact, memory-mappable file format for one parsed table snapshot.
+
+    write_snapshot(file, records, {"path": "/queue simple", …})
+    snap = SnapshotFile(file)            # mmaps the file, reads the header only
+    snap.meta["path"], len(snap)
+    snap[17]                             # one record, decoded on demand
+    records = snap.records()             # the whole table in one pass
+
+Layout (little-endian)::
+
+    b"IMMSNAP" + version byte
+    u32 header length, header JSON     meta + record shapes
+    u16[count]                         shape of each record
+    u64[count + 1]                     record offsets into the blob
+    blob                               UTF-8, records split by RS (0x1e)
+
+Records of one table mostly have the same keys, so each distinct key
+tuple (a *shape*) is stored once in the header and a record is just its
+values joined by US (0x1f) – decoding is ``dict(zip(keys, values))``.
+Integer values (``_mask``) are marked per shape and restored as ints.
+Writes go to a temporary file that replaces the old one atomically.
+"""
+from __future__ import annotations
+
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+from typing import Any, Iterable, Mapping
+
+MAGIC   = b"IMMSNAP\x01"
+_RS, _US = "\x1e", "\x1f"
+_HEAD   = struct.Struct("<I")
+
+
+class SnapshotFormatError(ValueError):
+    """The file is not a snapshot this version can read."""
+
+
+def _le(arr: array) -> array:
+    if sys.byteorder != "little":
+        arr.byteswap()
+    return arr
+
+
+# ──────────────────────────────────────────────────────────────── writing
+def encode_snapshot(records: Iterable[Mapping[str, Any]], meta: Mapping[str, Any]) -> bytes:
+    """Serialize *records* (str / int values) with *meta* into the file format."""
+    shape_ids: dict[tuple, int] = {}
+    shapes: list[list[str]] = []
+    ints: list[list[int]] = []
+    kinds = array("H")
+    offsets = array("Q", [0])
+    chunks: list[bytes] = []
+    pos = 0
+    for rec in records:
+        keys = tuple(rec)
+        numeric = tuple(i for i, v in enumerate(rec.values()) if type(v) is int)
+        sid = shape_ids.get((keys, numeric))
+        if sid is None:
+            sid = shape_ids[keys, numeric] = len(shapes)
+            shapes.append(list(keys))
+            ints.append(list(numeric))
+        values = [v if type(v) is str else str(v) for v in rec.values()]
+        text = _US.join(values)
+        if _RS in text or text.count(_US) != max(len(values) - 1, 0):
+            raise SnapshotFormatError("value contains a separator character")
+        data = text.encode("utf-8", "surrogatepass")
+        if kinds:
+            data = b"\x1e" + data
+        chunks.append(data)
+        pos += len(data)
+        kinds.append(sid)
+        offsets.append(pos)
+    if len(shapes) > 0xFFFF:
+        raise SnapshotFormatError("too many record shapes")
+
+    head = dict(meta, count=len(kinds), shapes=shapes, ints=ints)
+    header = json.dumps(head, separators=(",", ":")).encode("utf-8")
+    return b"".join((
+        MAGIC, _HEAD.pack(len(header)), header,
+        _le(kinds).tobytes(), _le(offsets).tobytes(), *chunks,
+    ))
+
+
+def write_snapshot(file: str | os.PathLike, records: Iterable[Mapping[str, Any]],
+                   meta: Mapping[str, Any]) -> int:
+    """Write a snapshot file atomically; returns its size in bytes."""
+    data = encode_snapshot(records, meta)
+    tmp = f"{os.fspath(file)}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, file)
+    return len(data)
+
+
+# ──────────────────────────────────────────────────────────────── reading
+class SnapshotFile:
+    """Read-only view of a snapshot file; records are decoded on demand."""
+
+    def __init__(self, file: str | os.PathLike) -> None:
+        with open(file, "rb") as f:
+            try:
+                self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError as exc:                     # empty file
+                raise SnapshotFormatError(str(exc)) from exc
+        try:
+            self._parse()
+        except Exception:
+            self._mm.close()
+            raise
+
+    def _parse(self) -> None:
+        mm = self._mm
+        if mm[:len(MAGIC)] != MAGIC:
+            raise SnapshotFormatError("not a snapshot file")
+        pos = len(MAGIC)
+        (hlen,) = _HEAD.unpack_from(mm, pos)
+        pos += _HEAD.size
+        try:
+            head = json.loads(mm[pos:pos + hlen])
+        except ValueError as exc:
+            raise SnapshotFormatError(f"bad header: {exc}") from exc
+        pos += hlen
+        count = head.pop("count")
+        self._shapes = [tuple(s) for s in head.pop("shapes")]
+        self._ints   = head.pop("ints")
+        self.meta: dict[str, Any] = head
+
+        kinds_end = pos + 2 * count
+        offs_end  = kinds_end + 8 * (count + 1)
+        if offs_end > len(mm):
+            raise SnapshotFormatError("truncated file")
+        self._kinds   = _le(array("H", mm[pos:kinds_end]))
+        self._offsets = _le(array("Q", mm[kinds_end:offs_end]))
+        self._blob    = offs_end
+        if self._blob + self._offsets[-1] > len(mm):
+            raise SnapshotFormatError("truncated file")
+
+    def close(self) -> None:
+        self._mm.close()
+
+    def __enter__(self) -> "SnapshotFile":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return len(self._kinds)
+
+    def _make(self, sid: int, text: str) -> dict[str, Any]:
+        rec = dict(zip(self._shapes[sid], text.split(_US)))
+        for i in self._ints[sid]:
+            key = self._shapes[sid][i]
+            rec[key] = int(rec[key])
+        return rec
+
+    def __getitem__(self, i: int) -> dict[str, Any]:
+        if not -len(self) <= i < len(self):
+            raise IndexError(i)
+        i %= len(self)
+        start = self._blob + self._offsets[i] + (1 if i else 0)
+        end   = self._blob + self._offsets[i + 1]
+        return self._make(self._kinds[i], self._mm[start:end].decode("utf-8", "surrogatepass"))
+
+    def records(self) -> list[dict[str, Any]]:
+        """Every record, decoded in one pass over the blob."""
+        if not len(self):
+            return []
+        text = self._mm[self._blob:self._blob + self._offsets[-1]].decode("utf-8", "surrogatepass")
+        shapes, ints = self._shapes, self._ints
+        if len(shapes) == 1 and not ints[0]:                      # the common case
+            keys = shapes[0]
+            return [dict(zip(keys, r.split(_US))) for r in text.split(_RS)]
+        return [self._make(sid, r) for sid, r in zip(self._kinds, text.split(_RS))]
+
+
+def read_snapshot(file: str | os.PathLike) -> tuple[dict[str, Any], list[dict[str, Any]]]:
+    """``(meta, records)`` of a snapshot file."""
+    with SnapshotFile(file) as snap:
+        return snap.meta, snap.records()
+
+
+__all__ = [
+    "SnapshotFile", "SnapshotFormatError", "encode_snapshot", "write_snapshot",
+    "read_snapshot", "MAGIC",
+]
@@ -29,6 +29,15 @@ class SSHClient:
             raise RuntimeError(stderr)
         return stdout.splitlines()
 
+    def stream(self, command: str):
+        """Yield stdout lines as they arrive; raise if stderr is not empty."""
+        stdin, stdout, stderr = self.client.exec_command(command)
+        for line in stdout:
+            yield line.rstrip("\r\n")
+        err = stderr.read().decode()
+        if err:
+            raise RuntimeError(err)
+
     def find(self, path: str, **conditions) -> tuple[str, str]:
         """
         Run a print detail where X query (e.g., find a lease by address).
@@ -41,13 +50,10 @@ class SSHClient:
 
     def find_ids(self, path: str, **conditions) -> list[str]:
         """
-        Finds IDs matching conditions. Useful for remove/set targeting.
-        Returns list of numeric IDs as strings.
+        Finds the internal IDs (``*1A``) of the items matching conditions.
+        Unlike print row numbers they stay valid across sessions, so they
+        can be used as ``numbers=*1A,*2B`` in remove/set commands.
         """
-        stdout, _ = self.find(path, **conditions)
-        ids = []
-        for line in stdout.splitlines():
-            parts = line.strip().split()
-            if parts and parts[0].isdigit():
-                ids.append(parts[0])
-        return ids
+        condition_str = " ".join(f'{k}={quote_field(v)}' for k, v in conditions.items())
+        stdout, _ = self.execute(f":put [{path} find {condition_str}]")
+        return [i for i in stdout.strip().split(";") if i.startswith("*")]
@@ -0,0 +1,136 @@
+# utils/syslog.py
+"""
+Parser for RouterOS remote-logging (syslog) messages.
+
+RouterOS sends one UDP datagram per log line, with or without a BSD
+syslog header::
+
+    <30>Oct 19 02:40:01 MikroTik dhcp,info dhcp1 assigned 10.0.0.5 to 00:0C:29:AA:BB:CC
+    <30>dhcp,info defconf deassigned 10.0.0.5 for 00:0C:29:AA:BB:CC
+    <30>interface,info ether2 link down
+    <30>system,info simple queue changed by ssh:admin@10.0.0.2/action:42 (/queue simple set q1 max-limit=2M/2M)
+
+:func:`parse_datagram` turns one into a :class:`LogEvent` whose *kind* is
+
+    "dhcp"    fields: server, assigned (bool), ip, mac, host_name
+    "link"    fields: interface, up (bool)
+    "config"  fields: what, action (added/changed/removed/moved), user,
+              command (RouterOS 7 only), path (menu guessed from *what*)
+    "other"   anything else – fields empty
+
+Everything is plain string work, cheap enough for thousands of lines a
+second.
+"""
+from __future__ import annotations
+
+import re
+from typing import Any
+
+_PRI    = re.compile(r"<\d{1,3}>")
+_STAMP  = re.compile(r"(?:[A-Z][a-z]{2} [ \d]\d \d\d:\d\d:\d\d|\d{4}-\d\d-\d\dT\S+) ")
+_TOPICS = re.compile(r"[a-z]+(?:,[a-z]+)+$")
+
+_DHCP = re.compile(
+    r"(?P<server>\S+) (?P<op>assigned|deassigned) (?P<ip>\d{1,3}(?:\.\d{1,3}){3}) "
+    r"(?:to|from|for) (?P<mac>[0-9A-Fa-f]{2}(?:[:-][0-9A-Fa-f]{2}){5})(?: (?P<host>\S+))?"
+)
+_LINK   = re.compile(r"(?P<iface>\S+) link (?P<state>up|down)\b")
+_CONFIG = re.compile(
+    r"(?P<what>.+?) (?P<op>added|changed|removed|moved) by (?P<user>\S+)"
+    r"(?: \((?P<cmd>/.*)\))?\s*$"
+)
+
+#: words in a config-change line → menu path (first match wins, longest phrases first)
+CONFIG_PATHS: tuple[tuple[str, str], ...] = (
+    ("simple queue",  "/queue simple"),
+    ("queue tree",    "/queue tree"),
+    ("address list",  "/ip firewall address-list"),
+    ("address-list",  "/ip firewall address-list"),
+    ("lease",         "/ip dhcp-server lease"),
+    ("dhcp",          "/ip dhcp-server"),
+    ("arp",           "/ip arp"),
+    ("route",         "/ip route"),
+    ("address",       "/ip address"),
+    ("firewall",      "/ip firewall"),
+    ("dns",           "/ip dns"),
+    ("interface",     "/interface"),
+)
+
+
+class LogEvent:
+    """One parsed log line."""
+
+    __slots__ = ("kind", "topics", "message", "fields")
+
+    def __init__(self, kind: str, topics: tuple[str, ...], message: str,
+                 fields: dict[str, Any] | None = None) -> None:
+        self.kind    = kind
+        self.topics  = topics
+        self.message = message
+        self.fields  = fields or {}
+
+    def __repr__(self) -> str:
+        return f"<LogEvent {self.kind} {self.fields or self.message!r}>"
+
+
+def config_path(what: str) -> str | None:
+    """Menu path a config-change subject refers to (``"simple queue"`` → ``/queue simple``)."""
+    what = what.lower()
+    for phrase, path in CONFIG_PATHS:
+        if phrase in what:
+            return path
+    return None
+
+
+def split_header(line: str) -> tuple[tuple[str, ...], str]:
+    """``(topics, message)`` of a syslog line (PRI, timestamp and host name dropped)."""
+    m = _PRI.match(line)
+    if m:
+        line = line[m.end():]
+    m = _STAMP.match(line)
+    if m:
+        line = line[m.end():]
+    head, _, rest = line.partition(" ")
+    if not _TOPICS.match(head):
+        # "<host> <topics> message" – only when the second word really is topics
+        second, _, tail = rest.partition(" ")
+        if not _TOPICS.match(second):
+            return (), line.strip()
+        head, rest = second, tail
+    return tuple(head.split(",")), rest.strip()
+
+
+def parse_message(line: str) -> LogEvent:
+    topics, msg = split_header(line)
+    m = _DHCP.match(msg)
+    if m:
+        return LogEvent("dhcp", topics, msg, {
+            "server":    m["server"],
+            "assigned":  m["op"] == "assigned",
+            "ip":        m["ip"],
+            "mac":       m["mac"].upper().replace("-", ":"),
+            "host_name": m["host"] or "",
+        })
+    m = _LINK.match(msg)
+    if m:
+        return LogEvent("link", topics, msg, {"interface": m["iface"], "up": m["state"] == "up"})
+    m = _CONFIG.match(msg)
+    if m:
+        return LogEvent("config", topics, msg, {
+            "what":    m["what"],
+            "action":  m["op"],
+            "user":    m["user"],
+            "command": m["cmd"] or "",
+            "path":    config_path(m["what"]),
+        })
+    return LogEvent("other", topics, msg)
+
+
+def parse_datagram(data: bytes) -> LogEvent:
+    return parse_message(data.decode("utf-8", "replace").rstrip("\r\n\x00"))
+
+
+__all__ = [
+    "LogEvent", "CONFIG_PATHS", "config_path", "split_header",
+    "parse_message", "parse_datagram",
+]
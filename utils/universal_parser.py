@@ -1,122 +1,351 @@
 # utils/universal_parser.py
+"""
+RouterOS “print detail” parser.
+
+Everything that does not depend on the input is built once at import time:
+the key=value tokenizer is a pre-compiled pattern and header flags are
+encoded to a bitmask through a cached table (see utils.flag_decoder).  The parser
+itself is a single pass over the lines with a tiny state machine:
+
+    header          “ 0 X  key=val …”      → start a new record
+                    “*1A X key=val …”      → the same, keeping ``.id`` (show-ids)
+    comment header  “ 0 X ;;; text”         → start a record, stash comment
+    comment wrap    “     more text”        → glue onto stashed comment
+    continuation    “     key=val …”        → add fields to current record
+    blank line                              → close current record
+
+For very large outputs the same parser runs in a process pool:
+``iter_detail_blocks_parallel`` cuts a (possibly still arriving) output
+at record boundaries and hands each chunk to a worker as soon as it is
+complete, ``parse_all_sections(..., parallel=True)`` also fans sections
+out.  Workers marshal their records into a shared-memory block owned by
+the parent, so results come back without a pickle round-trip through the
+pool's pipe.  RecordStreamRunner (core.taskrunner) reads every table this
+way; on a single-core machine it is the plain in-process parser.
+"""
+import marshal
+import os
 import re
-from utils.text import clean_field
-from utils.flag_decoder import decode_flags
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from itertools import islice
+from multiprocessing import shared_memory
+from typing import Iterable, Iterator
 
-def parse_detail_blocks(lines: list[str], section: str) -> list[dict[str, str]]:
-    """
-    Parse RouterOS “print detail” output into a list[dict].
+from utils.flag_decoder import encode_flags
 
-    The patch below adds one line: when the record-header line looks like
-        “0 X ;;; comment …”     (flags but NO key-value pairs)
-    we still capture the flags (e.g. “X”, “D”, etc.) so the GUI can decide
-    whether the lease is disabled.
+# key=value tokens; value is either a "quoted string" or a bare word
+_KV_RE = re.compile(r'([\w\-]+)=("[^"]*"|\S+)')
 
-    Only the marked block ◀▶ is new; everything else is unchanged.
+
+def iter_detail_blocks(lines: Iterable[str], section: str) -> Iterator[dict[str, str]]:
     """
-    import re
-    from utils.text import clean_field
-    from utils.flag_decoder import decode_flags
+    Yield RouterOS “print detail” records one by one, as soon as each
+    block is complete.
+
+    *lines* may be any iterable – a list, or a live stream such as
+    ``client.stream(cmd)`` – so callers can start showing rows while the
+    router is still sending.  Records are exactly what
+    :func:`parse_detail_blocks` returns.
+    """
+    findall = _KV_RE.findall
+    encode  = encode_flags
 
-    records: list[dict[str, str]] = []
     current: dict[str, str]     = {}
     current_flags: str | None   = None
     pending_comment: str | None = None
 
-    def flush():
+    def close() -> dict[str, str]:
+        """Finish *current* (flags, stashed comment) and start an empty record."""
         nonlocal current, current_flags, pending_comment
-        if current:
-            if current_flags:
-                current["_flags"] = current_flags
-                current.update(decode_flags(current_flags, section))
-            if pending_comment and "comment" not in current:
-                current["comment"] = pending_comment
-                pending_comment = None
-            records.append(current)
-            current = {}
-            current_flags = None
+        rec = current
+        if current_flags:
+            rec["_flags"] = current_flags
+            rec["_mask"]  = encode(current_flags)
+        if pending_comment and "comment" not in rec:
+            rec["comment"] = pending_comment
+            pending_comment = None
+        current = {}
+        current_flags = None
+        return rec
 
     for raw in lines:
-        line = raw.rstrip("\n")
-        stripped = line.strip()
+        stripped = raw.strip()
 
-        if stripped.startswith("Flags:"):
-            continue
+        # ───────── blank line closes the record
         if not stripped:
-            flush(); continue
-
-        left  = line.lstrip()
-        first = left[0]
-
-        # ───────── comment-only record header (no key-value on same line)
-        if (first.isdigit() or first == "*") and ";;;" in left and "=" not in left:
-            flush()
-            # ◀─ NEW: grab flags even on comment-only header
-            hdr_parts = left.split(";;;", 1)[0].split(None, 2)
-            if len(hdr_parts) >= 2 and hdr_parts[1].isalpha():
-                current_flags = hdr_parts[1]
-            # ────────────────────────────────────────────────────────────
-            pending_comment = left.split(";;;", 1)[1].strip()
+            if current:
+                yield close()
             continue
 
-        # ───────── real record header (with = …)
-        if (first.isdigit() or first == "*") and "=" in left:
-            flush()
-            if ";;;" in left:
-                before, after = left.split(";;;", 1)
-                inline = after.strip(); left = before.rstrip()
-            else:
-                inline = None
-
-            if left[0] == "*":          # drop leading “* ”
-                left = left[1:].lstrip()
-            parts = left.split(None, 2)
-            if len(parts) >= 2 and parts[1].isalpha():
-                current_flags = parts[1]
-                remainder     = parts[2] if len(parts) == 3 else ""
-            else:
-                current_flags = None
-                remainder     = " ".join(parts[1:]) if len(parts) > 1 else ""
+        first = stripped[0]
+
+        if first.isdigit() or first == "*":
+            has_eq = "=" in stripped
+
+            # ───────── comment-only record header (no key-value on same line)
+            if not has_eq and ";;;" in stripped:
+                if current:
+                    yield close()
+                head, _, tail = stripped.partition(";;;")
+                # grab flags even on a comment-only header
+                hdr_parts = head.split(None, 2)
+                if hdr_parts and len(hdr_parts[0]) > 1 and hdr_parts[0][0] == "*":
+                    current[".id"] = hdr_parts[0]           # “print … show-ids”
+                if len(hdr_parts) >= 2 and hdr_parts[1].isalpha():
+                    current_flags = hdr_parts[1]
+                pending_comment = tail.strip()
+                continue
 
-            if pending_comment:
-                current["comment"] = pending_comment; pending_comment = None
-            if inline:
-                current["comment"] = inline
+            # ───────── real record header (with = …)
+            if has_eq:
+                if current:
+                    yield close()
 
-            for key, val in re.findall(r'([\w\-]+)=("[^"]*"|\S+)', remainder):
-                if key == "comment":
-                    current["comment"] = clean_field(val)
+                left = stripped
+                if ";;;" in left:
+                    before, _, after = left.partition(";;;")
+                    inline = after.strip(); left = before.rstrip()
                 else:
-                    current[clean_field(key)] = clean_field(val)
+                    inline = None
+
+                if left[0] == "*" and left[1:2] in (" ", ""):   # drop leading “* ”
+                    left = left[1:].lstrip()
+                parts = left.split(None, 2)
+                if parts[0][0] == "*":      # “*1A” instead of a number: show-ids
+                    current[".id"] = parts[0]
+                if len(parts) >= 2 and parts[1].isalpha():
+                    current_flags = parts[1]
+                    remainder     = parts[2] if len(parts) == 3 else ""
+                else:
+                    current_flags = None
+                    remainder     = " ".join(parts[1:]) if len(parts) > 1 else ""
+
+                if pending_comment:
+                    current["comment"] = pending_comment; pending_comment = None
+                if inline:
+                    current["comment"] = inline
+
+                for key, val in findall(remainder):
+                    current[key] = val.strip('"').strip("'")
+                continue
+
+        # ───────── “Flags: X - disabled …” legend
+        if first == "F" and stripped.startswith("Flags:"):
             continue
 
         # ───────── wrapped comment continuation
         if pending_comment and "=" not in stripped:
-            fragment = stripped
-            if pending_comment[-1].isalnum() and fragment and fragment[0].isalnum():
-                pending_comment += fragment
+            if pending_comment[-1].isalnum() and first.isalnum():
+                pending_comment += stripped
             else:
-                pending_comment += " " + fragment
+                pending_comment += " " + stripped
             continue
 
         # ───────── normal key=value continuation
-        for key, val in re.findall(r'([\w\-]+)=("[^"]*"|\S+)', line):
-            if key == "comment":
-                current["comment"] = clean_field(val)
-            else:
-                current[clean_field(key)] = clean_field(val)
+        for key, val in findall(stripped):
+            current[key] = val.strip('"').strip("'")
 
-    flush()          # final record
-    return records
+    # final record
+    if current:
+        yield close()
 
 
+def parse_detail_blocks(lines: Iterable[str], section: str) -> list[dict[str, str]]:
+    """
+    Parse RouterOS “print detail” output into a list[dict].
 
-def parse_all_sections(lines: list[str]) -> dict[str, list[dict[str, str]]]:
+    Each record carries its raw header flags under ``_flags`` and the same
+    flags as an integer bitmask under ``_mask`` (see utils.flag_decoder).  A ``;;; comment``
+    that is printed on its own header line (and possibly wrapped over
+    several lines) ends up under ``comment``.
     """
-    Break a big dump with === /cmd === into sections.
-    Returns {section_header: parsed_records}
+    return list(iter_detail_blocks(lines, section))
+
+
+# ───────────────────────────────────────────────────────── process pool
+#: below this many lines an output is parsed in-process
+PARALLEL_MIN_LINES = 50_000
+#: target lines per chunk handed to one worker
+CHUNK_LINES = 100_000
+
+_pool: ProcessPoolExecutor | None = None       # singleton per process
+
+
+def _get_pool(workers: int | None = None) -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=workers or os.cpu_count() or 1)
+    return _pool
+
+
+def shutdown_pool() -> None:
+    """Stop the parser worker processes (call on application exit)."""
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(cancel_futures=True)
+        _pool = None
+
+
+def _starts_record(lines: list[str], i: int) -> bool:
+    """True if lines[i] is a header right after a closed record (no parser state)."""
+    head = lines[i].lstrip()
+    return bool(head and (head[0].isdigit() or head[0] == "*")
+                and not lines[i - 1].strip()
+                and "=" in lines[i - 2])
+
+
+def split_at_records(lines: list[str], chunk_lines: int = CHUNK_LINES) -> list[list[str]]:
     """
-    sections: dict[str, list[dict[str, str]]] = {}
+    Cut *lines* into chunks of roughly *chunk_lines* that each start on a
+    record header following a blank line, i.e. where the parser has just
+    closed a record and carries no state into the next one.
+    """
+    chunks: list[list[str]] = []
+    start, n = 0, len(lines)
+    while n - start > chunk_lines:
+        cut = start + chunk_lines
+        while cut < n and not _starts_record(lines, cut):
+            cut += 1
+        if cut >= n:
+            break
+        chunks.append(lines[start:cut])
+        start = cut
+    chunks.append(lines[start:])
+    return chunks
+
+
+def _parse_chunk(text: str, section: str, shm_name: str, shm_size: int):
+    """Worker side: parse one chunk, marshal the records into shared memory."""
+    payload = marshal.dumps(parse_detail_blocks(text.split("\n"), section))
+    if len(payload) > shm_size:
+        return "inline", payload
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        shm.buf[:len(payload)] = payload
+    finally:
+        shm.close()
+    return "shm", len(payload)
+
+
+def _submit(pool: ProcessPoolExecutor, section: str,
+            chunk: list[str]) -> tuple[shared_memory.SharedMemory, Future]:
+    text = "\n".join(chunk)
+    # parent owns the block so it outlives the worker's handle
+    shm = shared_memory.SharedMemory(create=True, size=2 * len(text) + 65_536)
+    try:
+        return shm, pool.submit(_parse_chunk, text, section, shm.name, shm.size)
+    except BaseException:
+        _release(shm)
+        raise
+
+
+def _collect(shm: shared_memory.SharedMemory, fut: Future) -> list[dict[str, str]]:
+    try:
+        kind, data = fut.result()
+        if kind == "shm":
+            data = bytes(shm.buf[:data])
+        return marshal.loads(data)
+    finally:
+        _release(shm)
+
+
+def _release(shm: shared_memory.SharedMemory) -> None:
+    shm.close()
+    shm.unlink()
+
+
+def _parse_chunks(tasks: list[tuple[str, list[str]]], workers: int | None) -> list[list[dict[str, str]]]:
+    """Parse (section, lines) chunks in the pool; results in task order."""
+    pool = _get_pool(workers)
+    submitted: list[tuple[shared_memory.SharedMemory, Future]] = []
+    try:
+        for section, chunk in tasks:
+            submitted.append(_submit(pool, section, chunk))
+        results = []
+        while submitted:
+            results.append(_collect(*submitted.pop(0)))
+        return results
+    finally:
+        for shm, fut in submitted:
+            fut.cancel()
+            _release(shm)
+
+
+def iter_detail_blocks_parallel(
+    lines: Iterable[str],
+    section: str,
+    *,
+    workers: int | None = None,
+    chunk_lines: int = CHUNK_LINES,
+) -> Iterator[dict[str, str]]:
+    """
+    Same records as :func:`iter_detail_blocks`, parsed in worker processes.
+
+    *lines* may be a live stream: each record-aligned chunk of about
+    *chunk_lines* goes to the pool as soon as it has arrived, and records
+    are yielded in order whenever the oldest chunk is back.  Outputs under
+    :data:`PARALLEL_MIN_LINES`, and every output on a single core, are
+    parsed in-process.
+    """
+    if (workers or os.cpu_count() or 1) < 2:
+        yield from iter_detail_blocks(lines, section)
+        return
+    it  = iter(lines)
+    buf = list(islice(it, PARALLEL_MIN_LINES))
+    if len(buf) < PARALLEL_MIN_LINES:
+        yield from iter_detail_blocks(buf, section)
+        return
+
+    pool = _get_pool(workers)
+    pending: deque[tuple[shared_memory.SharedMemory, Future]] = deque()
+    try:
+        for line in it:
+            buf.append(line)
+            if len(buf) > chunk_lines and _starts_record(buf, len(buf) - 1):
+                pending.append(_submit(pool, section, buf[:-1]))
+                buf = [line]
+            while pending and pending[0][1].done():
+                yield from _collect(*pending.popleft())
+        if pending:
+            pending.append(_submit(pool, section, buf))
+            buf = []
+        while pending:
+            yield from _collect(*pending.popleft())
+        yield from iter_detail_blocks(buf, section)     # never went to the pool
+    finally:
+        for shm, fut in pending:
+            fut.cancel()
+            _release(shm)
+
+
+def parse_detail_blocks_parallel(
+    lines: list[str],
+    section: str,
+    *,
+    workers: int | None = None,
+    chunk_lines: int = CHUNK_LINES,
+) -> list[dict[str, str]]:
+    """
+    Same result as :func:`parse_detail_blocks`, parsed in worker processes.
+
+    The output is split at record boundaries into chunks of about
+    *chunk_lines*, parsed in parallel and concatenated in order.  Small
+    outputs are parsed in-process.
+    """
+    if len(lines) < max(PARALLEL_MIN_LINES, chunk_lines + 1):
+        return parse_detail_blocks(lines, section)
+    chunks = split_at_records(lines, chunk_lines)
+    if len(chunks) == 1:
+        return parse_detail_blocks(lines, section)
+    records: list[dict[str, str]] = []
+    for part in _parse_chunks([(section, c) for c in chunks], workers):
+        records.extend(part)
+    return records
+
+
+def _split_sections(lines: list[str]) -> list[tuple[str, list[str]]]:
+    sections: list[tuple[str, list[str]]] = []
     header: str | None = None
     block: list[str] = []
 
@@ -124,14 +353,43 @@ def parse_all_sections(lines: list[str]) -> dict[str, list[dict[str, str]]]:
         ln = line.rstrip("\n")
         if ln.startswith("=== ") and ln.endswith(" ==="):
             if header is not None and block:
-                sections[header] = parse_detail_blocks(block, header)
-                block.clear()
+                sections.append((header, block))
+                block = []
             header = ln[4:-4].strip()
         else:
             if header is not None:
                 block.append(ln)
 
     if header is not None and block:
-        sections[header] = parse_detail_blocks(block, header)
-
+        sections.append((header, block))
     return sections
+
+
+def parse_all_sections(
+    lines: list[str],
+    *,
+    parallel: bool = False,
+    workers: int | None = None,
+) -> dict[str, list[dict[str, str]]]:
+    """
+    Break a big dump with === /cmd === into sections.
+    Returns {section_header: parsed_records}
+
+    With ``parallel=True`` every section – and every record-aligned chunk
+    of a huge section – is parsed in the process pool.
+    """
+    blocks = _split_sections(lines)
+    if not parallel or sum(len(b) for _, b in blocks) < PARALLEL_MIN_LINES:
+        return {header: parse_detail_blocks(block, header) for header, block in blocks}
+
+    tasks: list[tuple[str, list[str]]] = []
+    owners: list[int] = []
+    for idx, (header, block) in enumerate(blocks):
+        for chunk in split_at_records(block):
+            tasks.append((header, chunk))
+            owners.append(idx)
+
+    parsed: list[list[dict[str, str]]] = [[] for _ in blocks]
+    for idx, part in zip(owners, _parse_chunks(tasks, workers)):
+        parsed[idx].extend(part)
+    return {header: recs for (header, _), recs in zip(blocks, parsed)}
@@ -0,0 +1,134 @@
+# utils/wire_formats.py
+"""
+Decoders for the compact RouterOS print formats.
+
+    print terse          one record per line:  “ 0 X key=val key=val …”
+    print as-value       “.id=*1;key=val;…” (one record per line)
+    :serialize to=json   JSON array of objects (RouterOS 7)
+
+Every decoder returns the same record shape as
+``utils.universal_parser.parse_detail_blocks``: header flags under
+``_flags`` and their bitmask under ``_mask``, ``comment`` for the
+comment, everything else as strings.  as-value / JSON report flags as
+boolean properties (``disabled=false``); those are folded back into
+``_flags`` so pages cannot tell which format a table came from.
+"""
+from __future__ import annotations
+
+import json
+import re
+from typing import Any, Iterable
+
+from utils.flag_decoder import encode_flags, flag_letters
+
+_KV_RE = re.compile(r'([\w\-.]+)=("[^"]*"|\S+)')
+_TRUE  = frozenset({"true", "yes"})
+
+
+def _finish(rec: dict[str, Any], flags: str) -> dict[str, Any]:
+    if flags:
+        rec["_flags"] = flags
+        rec["_mask"]  = encode_flags(flags)
+    return rec
+
+
+def fold_flag_properties(raw: dict[str, Any], section: str) -> dict[str, Any]:
+    """``disabled=false/true`` style properties → detail-style ``_flags``."""
+    letters = flag_letters(section)
+    rec: dict[str, Any] = {}
+    flags = ""
+    for key, val in raw.items():
+        letter = letters.get(key)
+        if letter is not None:
+            if str(val).lower() in _TRUE:
+                flags += letter
+            continue
+        rec[key] = val if isinstance(val, str) else _to_str(val)
+    return _finish(rec, flags)
+
+
+def _to_str(val: Any) -> str:
+    if isinstance(val, bool):
+        return "true" if val else "false"
+    if isinstance(val, list):
+        return ",".join(_to_str(v) for v in val)
+    return "" if val is None else str(val)
+
+
+# ──────────────────────────────────────────────────────────────── terse
+def parse_terse(lines: Iterable[str], section: str) -> list[dict[str, Any]]:
+    """``print terse`` – one record per non-empty line."""
+    records: list[dict[str, Any]] = []
+    for raw in lines:
+        line = raw.strip()
+        if not line or line.startswith("Flags:"):
+            continue
+        first = line[0]
+        if not (first.isdigit() or first == "*"):
+            continue
+
+        rec: dict[str, Any] = {}
+        ident, _, rest = line.partition(" ")
+        if ident.startswith("*"):
+            rec[".id"] = ident
+
+        # header flags sit between the index and the first key=value / ;;;
+        flags = ""
+        rest = rest.lstrip()
+        head, sep, tail = rest.partition(" ")
+        if head.isalpha() and "=" not in head:
+            flags, rest = head, tail.lstrip()
+
+        if rest.startswith(";;;"):
+            # inline comment runs up to the first key=value token
+            body = rest[3:]
+            m = _KV_RE.search(body)
+            comment = (body[:m.start()] if m else body).strip()
+            if comment:
+                rec["comment"] = comment
+            rest = body[m.start():] if m else ""
+
+        for key, val in _KV_RE.findall(rest):
+            rec[key] = val.strip('"').strip("'")
+        records.append(_finish(rec, flags))
+    return records
+
+
+# ───────────────────────────────────────────────────────────── as-value
+_AV_KEY = re.compile(r"^[\w\-.]+$")
+
+
+def parse_as_value(lines: Iterable[str], section: str) -> list[dict[str, Any]]:
+    """
+    ``print as-value`` printed one record per line (``:foreach … do={:put $r}``)
+    – ``key=val`` pairs separated by ``;``.  RouterOS does not quote the
+    values, so a ``;`` inside one cannot be told apart from a separator:
+    a piece that is not ``key=val`` or a key seen twice raises ValueError
+    instead of returning a cut-short record.
+    """
+    records: list[dict[str, Any]] = []
+    for raw in lines:
+        line = raw.strip()
+        if not line:
+            continue
+        rec: dict[str, Any] = {}
+        for item in line.split(";"):
+            key, sep, val = item.partition("=")
+            key = key.strip()
+            if not sep or not _AV_KEY.match(key) or key in rec:
+                raise ValueError(f"ambiguous as-value record: {line[:80]!r}")
+            rec[key] = val.strip('"')
+        records.append(fold_flag_properties(rec, section))
+    return records
+
+
+# ───────────────────────────────────────────────────────────────── json
+def parse_json(text: str, section: str) -> list[dict[str, Any]]:
+    """``:serialize to=json`` output (an object or an array of objects)."""
+    data = json.loads(text)
+    if isinstance(data, dict):
+        data = [data]
+    return [fold_flag_properties(obj, section) for obj in data if isinstance(obj, dict)]
+
+
+__all__ = ["parse_terse", "parse_as_value", "parse_json", "fold_flag_properties"]
@@ -17,8 +17,9 @@ from PyQt6.QtWidgets import (
 )
 
 from core.client import MikrotikClient
-from core.taskrunner import CommandRunner          # QThread subclass
+from core.state import Section, router_state      # shared per-router tables
 from core.log import log_cmd                       # shared log util
+from utils.diff import NATURAL_KEYS
 
 # ---------- Utilities -------------------------------------------------------
 def resource_path(rel: str) -> Path:
@@ -29,6 +30,21 @@ def load_speed_packages() -> List[Dict[str, Any]]:
     with open(resource_path("data/speeds.json"), "r", encoding="utf-8") as fh:
         return json.load(fh)
 
+_LEASE_KEY = NATURAL_KEYS["/ip dhcp-server lease"]      # address, server
+
+# one table row per lease record (runs in the store's refresh worker) ........
+def lease_row(rec) -> Dict[str, str]:
+    # "#" is the lease's .id when the read carried one (show-ids, RouterOS 7);
+    # plain print detail has none, so the lease goes by address @ server
+    return {
+        "#":        rec.get(".id") or " @ ".join(filter(None, map(rec.get, _LEASE_KEY))),
+        "MAC":      rec.get("mac-address", ""),
+        "IP":       rec.get("address", ""),
+        "Hostname": rec.get("host-name", ""),
+        "Comment":  rec.get("comment", ""),
+        "Status":   rec.get("status", ""),
+    }
+
 # ---------- Table Model -----------------------------------------------------
 class LeaseTableModel(QAbstractTableModel):
     HEADERS = ["#", "MAC", "IP", "Hostname", "Comment", "Status"]
@@ -78,8 +94,13 @@ class AddressPage(QWidget):
         self._setup_ui()
         self._connect_signals()
 
-        # keep references to live workers
-        self._workers: list[CommandRunner] = []
+        # leases come from the router's shared store
+        self._state = router_state(client)
+        self._state.view("/ip dhcp-server lease", "address", lease_row)
+        self._unsubscribe = self._state.subscribe(
+            "/ip dhcp-server lease", self._on_leases,
+            on_error=lambda err: QMessageBox.warning(self, "Refresh failed", err),
+        )
 
     # ---- UI -----------------------------------------------------------------
     def _setup_ui(self):
@@ -119,42 +140,13 @@ class AddressPage(QWidget):
     # ---- Core Actions -------------------------------------------------------
     def refresh_leases(self):
         # Avoid launching a second job if one is still running
-        if any(w.isRunning() for w in self._workers):
+        if not self._state.refresh("/ip dhcp-server lease", fresh=True):
             QMessageBox.information(self, "Busy", "Still fetching leases …")
-            return
 
-        cmd = "/ip dhcp-server lease print as-value"
-        runner = CommandRunner(self.client, cmd, parent=self)
-        runner.finished.connect(self._on_leases_fetched)
-
-        # lifetime-guard: own the runner until it finishes
-        def _cleanup():
-            self._workers.remove(runner)
-            runner.deleteLater()
-        runner.finished.connect(_cleanup)
-
-        self._workers.append(runner)
-        runner.start()
-
-    def _on_leases_fetched(self, cmd: str, lines: List[str]):
-        rows = self._parse_lease_lines(lines)
-        self.tbl_model.replace_all(rows)
-
-    # quick-n-dirty parser (unchanged) .......................................
-    def _parse_lease_lines(self, lines: List[str]) -> List[Dict[str, str]]:
-        leases = []
-        for ln in lines:
-            if "address=" in ln:
-                fields = dict(item.split("=", 1) for item in ln.split(" ") if "=" in item)
-                leases.append({
-                    "#":        fields.get(".id", ""),
-                    "MAC":      fields.get("mac-address", ""),
-                    "IP":       fields.get("address", ""),
-                    "Hostname": fields.get("host-name", ""),
-                    "Comment":  fields.get("comment", ""),
-                    "Status":   fields.get("status", ""),
-                })
-        return leases
+    def _on_leases(self, section: Section):
+        self.tbl_model.replace_all(self._state.rows("/ip dhcp-server lease", "address"))
+        # restored from the snapshot cache – the store is revalidating it
+        self.tbl.setToolTip("Cached leases – refreshing from the router…" if section.stale else "")
 
     # ---- Find-Free-IP placeholder ------------------------------------------
     def handle_find_free(self):
@@ -178,10 +170,7 @@ class AddressPage(QWidget):
 
     # ---- Graceful shutdown --------------------------------------------------
     def closeEvent(self, event):
-        for w in self._workers:
-            if w.isRunning():
-                w.quit()
-                w.wait()
+        self._unsubscribe()
         super().closeEvent(event)
 
 # ---------- Static Wizard Dialog (unchanged) -------------------------------
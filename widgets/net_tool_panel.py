@@ -1,6 +1,7 @@
 # widgets/net_tool_panel.py
 from __future__ import annotations
 import ipaddress, itertools, textwrap
+from functools import partial
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from typing import Optional, Iterable
 
@@ -10,7 +11,8 @@ from PyQt6.QtWidgets import (
 )
 
 from utils.text import clean_field
-from utils.universal_parser import parse_detail_blocks
+from core.query import query
+from core.singleflight import SingleFlight
 
 
 MAX_WORKERS = 100         # how many *Python* threads ping in parallel
@@ -23,11 +25,14 @@ class NetToolPanel(QWidget):
     ---------------------------------
     • Uses a global ThreadPoolExecutor (max 100 workers by default).
     • No QThreads are created ⇒ no ‘destroyed while running’ crashes.
+    • A host already being pinged (overlapping subnets, a second panel)
+      joins the running ping instead of sending another one.
     • Summary pop-ups list every scanned subnet and its usable-host range.
     """
     networkPingsDone = pyqtSignal(str, int)      # subnet / "ALL", count
 
     _pool: ThreadPoolExecutor | None = None      # singleton per process
+    _pings = SingleFlight()                      # (router, host) → running ping
 
     def __init__(self, ssh_client: Optional[object] = None, parent=None):
         super().__init__(parent)
@@ -80,12 +85,12 @@ class NetToolPanel(QWidget):
         if not self._ssh:
             QMessageBox.warning(self, "No Connection", "Connect first.")
             return
-        raw, err = self._ssh.execute("/ip address print detail without-paging")
-        if err:
-            QMessageBox.critical(self, "Error", err)
+        try:
+            recs = query("/ip address").fields("address").fetch(self._ssh)
+        except RuntimeError as err:
+            QMessageBox.critical(self, "Error", str(err))
             return
 
-        recs   = parse_detail_blocks(raw.splitlines(), "/ip address")
         subnets = set()
         for r in recs:
             if "address" in r:
@@ -146,8 +151,12 @@ class NetToolPanel(QWidget):
             on_complete(net_str)
             return
 
-        pool = NetToolPanel._pool
-        futures = [pool.submit(self._ssh_ping, str(h)) for h in hosts]
+        pool   = NetToolPanel._pool
+        router = getattr(self._ssh, "host", "")
+        futures = [
+            NetToolPanel._pings.submit((router, h), partial(self._ssh_ping, h), pool)
+            for h in map(str, hosts)
+        ]
 
         # poll futures with a tiny QTimer so we stay in Qt thread
         check = QTimer(self)
@@ -0,0 +1,226 @@
+# widgets/record_table.py
+# ---------------------------------------------------------------------------
+# Read-only table model for parsed RouterOS records
+# ---------------------------------------------------------------------------
+"""
+RecordTableModel shows rows that were fully prepared off the GUI thread.
+
+A runner turns every parsed record into a :class:`DisplayRow` (cell texts
+plus a little styling) in its worker thread, using a plain function such
+as ``queue_row(rec)``; the GUI thread only swaps or appends the finished
+rows – no parsing, no per-cell item objects::
+
+    model = RecordTableModel(HEADERS)
+    view.setModel(model)
+    runner = RecordStreamRunner(client, cmd, "/queue simple", build=queue_row)
+    runner.batchReady.connect(model.append_rows)
+
+:meth:`RecordTableModel.sync_rows` swaps in a new complete table but only
+signals the rows that differ – found by position, or taken from the
+snapshot's keyed diff (utils.diff) – so selection and scroll position
+survive a refresh.  :meth:`RecordTableModel.set_stale` greys out and italicises a
+table restored from the snapshot cache until it has been revalidated.
+"""
+from __future__ import annotations
+
+import time
+from typing import Any, Mapping, Sequence
+
+from PyQt6.QtCore import Qt, QAbstractTableModel, QModelIndex
+from PyQt6.QtGui import QFont
+
+from utils.diff import SnapshotDiff
+
+#: more changed spans than this and a model reset is cheaper for the view
+_MAX_SPANS = 500
+
+
+def _spans(positions: Sequence[int]) -> list[tuple[int, int]]:
+    """Sorted row numbers → ``(first, last)`` runs of consecutive rows."""
+    spans: list[tuple[int, int]] = []
+    for p in positions:
+        if spans and spans[-1][1] == p - 1:
+            spans[-1] = (spans[-1][0], p)
+        else:
+            spans.append((p, p))
+    return spans
+
+
+class DisplayRow:
+    """One table row: display texts, the source record and its styling."""
+
+    __slots__ = ("cells", "record", "muted", "tooltip")
+
+    def __init__(
+        self,
+        cells: Sequence[str],
+        record: Mapping[str, Any] | None = None,
+        *,
+        muted: bool = False,
+        tooltip: str | None = None,
+    ) -> None:
+        self.cells   = tuple(cells)
+        self.record  = record
+        self.muted   = muted          # greyed out (e.g. disabled entries)
+        self.tooltip = tooltip        # shown on the first column
+
+
+class RecordTableModel(QAbstractTableModel):
+    def __init__(self, headers: Sequence[str], parent=None):
+        super().__init__(parent)
+        self.headers = list(headers)
+        self._rows: list[DisplayRow] = []
+        self._stale: str | None = None        # tooltip while showing a cached table
+
+    # Qt overrides ...........................................................
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.headers)
+
+    def data(self, index: QModelIndex, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        row = self._rows[index.row()]
+        if role == Qt.ItemDataRole.DisplayRole:
+            col = index.column()
+            return row.cells[col] if col < len(row.cells) else ""
+        if role == Qt.ItemDataRole.ForegroundRole and (row.muted or self._stale):
+            return Qt.GlobalColor.darkGray
+        if role == Qt.ItemDataRole.FontRole and self._stale:
+            font = QFont()
+            font.setItalic(True)
+            return font
+        if role == Qt.ItemDataRole.ToolTipRole:
+            if self._stale:
+                return self._stale
+            if index.column() == 0:
+                return row.tooltip
+        return None
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if (
+            orientation == Qt.Orientation.Horizontal
+            and role == Qt.ItemDataRole.DisplayRole
+        ):
+            return self.headers[section]
+        return super().headerData(section, orientation, role)
+
+    def flags(self, index: QModelIndex):
+        if not index.isValid():
+            return Qt.ItemFlag.NoItemFlags
+        return Qt.ItemFlag.ItemIsSelectable | Qt.ItemFlag.ItemIsEnabled
+
+    # helpers .................................................................
+    def set_rows(self, rows: list[DisplayRow]) -> None:
+        """Swap in a complete, ready-built table."""
+        self.beginResetModel()
+        self._rows = rows
+        self.endResetModel()
+
+    def append_rows(self, rows: list[DisplayRow]) -> None:
+        if not rows:
+            return
+        first = len(self._rows)
+        self.beginInsertRows(QModelIndex(), first, first + len(rows) - 1)
+        self._rows.extend(rows)
+        self.endInsertRows()
+
+    def sync_rows(self, rows: list[DisplayRow], diff: SnapshotDiff | None = None) -> None:
+        """
+        Swap in a complete table like :meth:`set_rows`, but signal only the
+        rows whose display changed (compared by position) plus any rows
+        added or dropped at the end – no model reset.  With the snapshot's
+        *diff* against the table on screen (``section.diff``), rows are
+        inserted / removed / repainted where the diff says instead.
+        """
+        old = self._rows
+        if not old:
+            self.set_rows(rows)
+            return
+        if (diff is not None and diff.ordered
+                and diff.old_len == len(old) and diff.new_len == len(rows)):
+            self._apply_diff(rows, diff)
+            return
+        common = min(len(old), len(rows))
+        spans: list[list[int]] = []
+        for i in range(common):
+            a, b = old[i], rows[i]
+            if a is b or (a.cells == b.cells and a.muted == b.muted and a.tooltip == b.tooltip):
+                continue
+            if spans and spans[-1][1] == i - 1:
+                spans[-1][1] = i
+            else:
+                spans.append([i, i])
+                if len(spans) > _MAX_SPANS:
+                    self.set_rows(rows)
+                    return
+
+        # new lists throughout – *rows* / the old list may be a snapshot's view
+        if len(rows) < len(old):
+            self.beginRemoveRows(QModelIndex(), len(rows), len(old) - 1)
+            self._rows = old[:len(rows)]
+            self.endRemoveRows()
+        self._rows = rows[:common]
+        last = len(self.headers) - 1
+        for first, end in spans:
+            self.dataChanged.emit(self.index(first, 0), self.index(end, last))
+        if len(rows) > common:
+            self.beginInsertRows(QModelIndex(), common, len(rows) - 1)
+            self._rows = list(rows)
+            self.endInsertRows()
+
+    def _apply_diff(self, rows: list[DisplayRow], diff: SnapshotDiff) -> None:
+        removed = _spans([i for i, _ in diff.removed])
+        added   = _spans([j for j, _ in diff.added])
+        changed = _spans(sorted(c.new_pos for c in diff.changed))
+        if len(removed) + len(added) + len(changed) > _MAX_SPANS:
+            self.set_rows(rows)
+            return
+        # surviving rows kept their order: drop from the back, then insert
+        # front to back at their new positions
+        cur = self._rows = list(self._rows)
+        for first, end in reversed(removed):
+            self.beginRemoveRows(QModelIndex(), first, end)
+            del cur[first:end + 1]
+            self.endRemoveRows()
+        for first, end in added:
+            self.beginInsertRows(QModelIndex(), first, end)
+            cur[first:first] = rows[first:end + 1]
+            self.endInsertRows()
+        self._rows = list(rows)
+        last = len(self.headers) - 1
+        for first, end in changed:
+            self.dataChanged.emit(self.index(first, 0), self.index(end, last))
+
+    def set_stale(self, cached_at: float | None) -> None:
+        """Mark the table as restored from disk at *cached_at* (None = live again)."""
+        stale = None
+        if cached_at is not None:
+            stale = time.strftime("Cached %Y-%m-%d %H:%M – refreshing from the router…",
+                                  time.localtime(cached_at))
+        if stale == self._stale:
+            return
+        self._stale = stale
+        if self._rows:
+            self.dataChanged.emit(self.index(0, 0),
+                                  self.index(len(self._rows) - 1, len(self.headers) - 1))
+
+    @property
+    def stale(self) -> bool:
+        return self._stale is not None
+
+    def clear(self) -> None:
+        self._stale = None
+        self.set_rows([])
+
+    def text(self, row: int, col: int) -> str:
+        cells = self._rows[row].cells
+        return cells[col] if col < len(cells) else ""
+
+    def record(self, row: int) -> Mapping[str, Any] | None:
+        return self._rows[row].record
+
+
+__all__ = ["DisplayRow", "RecordTableModel"]